@@ -1,16 +1,31 @@
+import profiling
 import tkinter as tk
 from tkinter import ttk, messagebox
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import mysql.connector
-import json
-import os
+import theme
+import ui_metrics
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import sessions
+import search_index
 from datetime import datetime, timedelta
 import hashlib
 import re
+from isbn import looks_like_isbn, normalize_isbn
+from genres import get_or_create_genre_id
+from inventory import (
+    AVAILABLE_COPIES_SQL, ON_LOAN_COPIES_SQL, TOTAL_COPIES_SQL,
+    add_copies, clean_barcode, looks_like_barcode, set_copy_count
+)
+from virtual_table import VirtualTable
+from table_actions import RowAction, TableActions
+from table_sync import TableSync
+from chunked_loader import ChunkedLoader
+from fines_data import FINES_PAGE_SIZE, FinesDataset, FinesFilter, fines_page_query, parse_date
 
 # ------------------- Constants -------------------
-SESSION_FILE = 'admin_session.json'
+SESSION_KIND = "admin"
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -21,32 +36,23 @@ DB_CONFIG = {
 # ------------------- Database Connection -------------------
 def connect_db():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return query_log.connect(**DB_CONFIG)
     except mysql.connector.Error as err:
         messagebox.showerror("Database Connection Error", f"Failed to connect to database: {err}")
         return None
 
 # ------------------- Session Management -------------------
 def load_session():
-    """Load admin session data"""
-    try:
-        if os.path.exists(SESSION_FILE):
-            with open(SESSION_FILE, 'r') as f:
-                return json.load(f)
-        return None
-    except Exception as e:
-        messagebox.showerror("Session Error", f"Failed to load session: {e}")
-        return None
+    """Load admin data from the active session"""
+    return sessions.current(SESSION_KIND)
 
 def save_session(admin_data):
-    """Save admin session data"""
-    with open(SESSION_FILE, 'w') as f:
-        json.dump(admin_data, f)
+    """Start an admin session after login"""
+    sessions.start(SESSION_KIND, admin_data)
 
 def clear_session():
-    """Delete the session file"""
-    if os.path.exists(SESSION_FILE):
-        os.remove(SESSION_FILE)
+    """End the active session"""
+    sessions.end(SESSION_KIND)
 
 # ------------------- Admin Auth Functions -------------------
 def admin_login(email, password):
@@ -76,43 +82,68 @@ def admin_login(email, password):
             connection.close()
 
 # ------------------- Book Management Functions -------------------
-def get_books(search_term=""):
-    """Get all books with optional search"""
+# Columns the books table may be sorted by on the server
+BOOK_SORT_COLUMNS = {
+    "book_id": "b.book_id",
+    "title": "b.title",
+    "author": "b.author",
+    "genre": "g.name",
+    "isbn": "b.isbn",
+    "publication_year": "b.publication_year",
+    "available_copies": "available_copies",
+    "total_copies": "total_copies"
+}
+
+def book_search_filter(search_term):
+    """Build the WHERE clause and parameters for a book search"""
+    isbn_key = normalize_isbn(search_term) if looks_like_isbn(search_term) else None
+    
+    if isbn_key:
+        # Scanner fast path: single point lookup on the unique index
+        return "WHERE b.isbn_normalized = %s", (isbn_key,)
+    if looks_like_barcode(search_term):
+        # Copy barcode: resolve the book through the unique barcode index
+        return "WHERE b.book_id = (SELECT book_id FROM BookCopies WHERE barcode = %s)", (clean_barcode(search_term),)
+    if search_term:
+        search_param = f"%{search_term}%"
+        return (
+            "WHERE b.title LIKE %s OR b.author LIKE %s OR g.name LIKE %s OR b.isbn LIKE %s",
+            (search_param, search_param, search_param, search_param)
+        )
+    return "", ()
+
+def get_books_page(search_term="", offset=0, limit=None, sort_column="title", descending=False):
+    """Get one window of books, sorted on the server"""
     connection = connect_db()
     if not connection:
         return []
     
+    where, params = book_search_filter(search_term)
+    order = BOOK_SORT_COLUMNS.get(sort_column, "b.title")
+    direction = "DESC" if descending else "ASC"
+    
     try:
         cursor = connection.cursor(dictionary=True)
         
-        if search_term:
-            query = """
-                SELECT 
-                    book_id, title, author, genre, isbn, publication_year, 
-                    available_copies, total_copies, 
-                    (total_copies - available_copies) AS borrowed_copies
-                FROM 
-                    Books
-                WHERE 
-                    title LIKE %s OR author LIKE %s OR genre LIKE %s OR isbn LIKE %s
-                ORDER BY 
-                    title
-            """
-            search_param = f"%{search_term}%"
-            cursor.execute(query, (search_param, search_param, search_param, search_param))
-        else:
-            query = """
-                SELECT 
-                    book_id, title, author, genre, isbn, publication_year, 
-                    available_copies, total_copies, 
-                    (total_copies - available_copies) AS borrowed_copies
-                FROM 
-                    Books
-                ORDER BY 
-                    title
-            """
-            cursor.execute(query)
+        query = f"""
+            SELECT 
+                b.book_id, b.title, b.author, g.name AS genre, b.isbn, b.publication_year, 
+                {AVAILABLE_COPIES_SQL} AS available_copies, 
+                {TOTAL_COPIES_SQL} AS total_copies, 
+                {ON_LOAN_COPIES_SQL} AS borrowed_copies
+            FROM 
+                Books b
+            LEFT JOIN 
+                Genres g ON g.genre_id = b.genre_id
+            {where}
+            ORDER BY 
+                {order} {direction}, b.book_id {direction}
+        """
+        if limit is not None:
+            query += " LIMIT %s OFFSET %s"
+            params = params + (limit, offset)
         
+        cursor.execute(query, params)
         return cursor.fetchall()
     except mysql.connector.Error as err:
         messagebox.showerror("Database Error", str(err))
@@ -122,8 +153,70 @@ def get_books(search_term=""):
             cursor.close()
             connection.close()
 
+def get_books(search_term=""):
+    """Get all books with optional search"""
+    return get_books_page(search_term)
+
+def count_books(search_term=""):
+    """Count the books matching a search"""
+    connection = connect_db()
+    if not connection:
+        return 0
+    
+    where, params = book_search_filter(search_term)
+    
+    try:
+        cursor = connection.cursor()
+        
+        # The genre join is only needed when the search matches on genre name
+        join = "LEFT JOIN Genres g ON g.genre_id = b.genre_id" if "g.name" in where else ""
+        cursor.execute(f"SELECT COUNT(*) FROM Books b {join} {where}", params)
+        return cursor.fetchone()[0]
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Error", str(err))
+        return 0
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_book(book_id):
+    """Get a single book by id"""
+    connection = connect_db()
+    if not connection:
+        return None
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        
+        cursor.execute(f"""
+            SELECT 
+                b.book_id, b.title, b.author, g.name AS genre, b.isbn, b.publication_year, 
+                b.description, 
+                {AVAILABLE_COPIES_SQL} AS available_copies, 
+                {TOTAL_COPIES_SQL} AS total_copies
+            FROM 
+                Books b
+            LEFT JOIN 
+                Genres g ON g.genre_id = b.genre_id
+            WHERE 
+                b.book_id = %s
+        """, (book_id,))
+        return cursor.fetchone()
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Error", str(err))
+        return None
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
 def add_book(title, author, genre, isbn, publication_year, total_copies, description=""):
     """Add a new book"""
+    isbn_key = normalize_isbn(isbn)
+    if not isbn_key:
+        return False, "Invalid ISBN: check the digits and try again"
+    
     connection = connect_db()
     if not connection:
         return False, "Database connection failed"
@@ -131,23 +224,28 @@ def add_book(title, author, genre, isbn, publication_year, total_copies, descrip
     try:
         cursor = connection.cursor()
         
-        # Check if book with same ISBN already exists
-        cursor.execute("SELECT book_id FROM Books WHERE isbn = %s", (isbn,))
+        # Check if book with same ISBN already exists (in either ISBN-10 or ISBN-13 form)
+        cursor.execute("SELECT book_id FROM Books WHERE isbn_normalized = %s", (isbn_key,))
         if cursor.fetchone():
             return False, "A book with this ISBN already exists"
         
+        genre_id = get_or_create_genre_id(connection, genre)
+        
         # Insert the new book
         cursor.execute(
             """
             INSERT INTO Books (
-                title, author, genre, isbn, publication_year, 
-                total_copies, available_copies, description
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                title, author, genre_id, isbn, isbn_normalized, publication_year, description
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s)
             """,
-            (title, author, genre, isbn, publication_year, total_copies, total_copies, description)
+            (title, author, genre_id, isbn, isbn_key, publication_year, description)
         )
         
+        # One row per physical copy
+        add_copies(cursor, cursor.lastrowid, total_copies)
+        
         connection.commit()
+        search_index.invalidate_index()
         return True, "Book added successfully"
     except mysql.connector.Error as err:
         return False, f"Database Error: {err}"
@@ -158,6 +256,10 @@ def add_book(title, author, genre, isbn, publication_year, total_copies, descrip
 
 def update_book(book_id, title, author, genre, isbn, publication_year, total_copies, description=""):
     """Update an existing book"""
+    isbn_key = normalize_isbn(isbn)
+    if not isbn_key:
+        return False, "Invalid ISBN: check the digits and try again"
+    
     connection = connect_db()
     if not connection:
         return False, "Database connection failed"
@@ -166,31 +268,40 @@ def update_book(book_id, title, author, genre, isbn, publication_year, total_cop
         cursor = connection.cursor()
         
         # Check if book exists
-        cursor.execute("SELECT available_copies FROM Books WHERE book_id = %s", (book_id,))
-        result = cursor.fetchone()
-        if not result:
+        cursor.execute("SELECT book_id FROM Books WHERE book_id = %s", (book_id,))
+        if not cursor.fetchone():
             return False, "Book not found"
         
-        available_copies = result[0]
+        # Check the ISBN is not used by another book
+        cursor.execute(
+            "SELECT book_id FROM Books WHERE isbn_normalized = %s AND book_id <> %s", 
+            (isbn_key, book_id)
+        )
+        if cursor.fetchone():
+            return False, "A book with this ISBN already exists"
+        
+        # Add or withdraw physical copies; copies on loan are never withdrawn
+        success, message = set_copy_count(cursor, book_id, total_copies)
+        if not success:
+            connection.rollback()
+            return False, message
         
-        # Calculate new available copies
-        borrowed_copies = total_copies - available_copies
-        new_available = max(0, total_copies - borrowed_copies)
+        genre_id = get_or_create_genre_id(connection, genre)
         
         # Update the book
         cursor.execute(
             """
             UPDATE Books SET 
-                title = %s, author = %s, genre = %s, isbn = %s, 
-                publication_year = %s, total_copies = %s, 
-                available_copies = %s, description = %s
+                title = %s, author = %s, genre_id = %s, isbn = %s, isbn_normalized = %s, 
+                publication_year = %s, description = %s
             WHERE book_id = %s
             """,
-            (title, author, genre, isbn, publication_year, 
-             total_copies, new_available, description, book_id)
+            (title, author, genre_id, isbn, isbn_key, publication_year, 
+             description, book_id)
         )
         
         connection.commit()
+        search_index.invalidate_index()
         return True, "Book updated successfully"
     except mysql.connector.Error as err:
         return False, f"Database Error: {err}"
@@ -217,10 +328,12 @@ def delete_book(book_id):
         if cursor.fetchone()[0] > 0:
             return False, "Cannot delete book: it is currently borrowed by users"
         
-        # Delete the book
+        # Delete the book and its copies
+        cursor.execute("DELETE FROM BookCopies WHERE book_id = %s", (book_id,))
         cursor.execute("DELETE FROM Books WHERE book_id = %s", (book_id,))
         
         connection.commit()
+        search_index.invalidate_index()
         return True, "Book deleted successfully"
     except mysql.connector.Error as err:
         return False, f"Database Error: {err}"
@@ -230,41 +343,54 @@ def delete_book(book_id):
             connection.close()
 
 # ------------------- User Management Functions -------------------
-def get_users(search_term=""):
-    """Get all users with optional search"""
+# Columns the users table may be sorted by on the server
+USER_SORT_COLUMNS = {
+    "user_id": "user_id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+    "role": "role",
+    "registration_date": "registration_date"
+}
+
+def user_search_filter(search_term):
+    """Build the WHERE clause and parameters for a user search"""
+    if search_term:
+        search_param = f"%{search_term}%"
+        return (
+            "WHERE first_name LIKE %s OR last_name LIKE %s OR email LIKE %s",
+            (search_param, search_param, search_param)
+        )
+    return "", ()
+
+def get_users_page(search_term="", offset=0, limit=None, sort_column="registration_date", descending=True):
+    """Get one window of users, sorted on the server"""
     connection = connect_db()
     if not connection:
         return []
     
+    where, params = user_search_filter(search_term)
+    order = USER_SORT_COLUMNS.get(sort_column, "registration_date")
+    direction = "DESC" if descending else "ASC"
+    
     try:
         cursor = connection.cursor(dictionary=True)
         
-        if search_term:
-            query = """
-                SELECT 
-                    user_id, first_name, last_name, email, role, 
-                    registration_date
-                FROM 
-                    Users
-                WHERE 
-                    first_name LIKE %s OR last_name LIKE %s OR email LIKE %s
-                ORDER BY 
-                    registration_date DESC
-            """
-            search_param = f"%{search_term}%"
-            cursor.execute(query, (search_param, search_param, search_param))
-        else:
-            query = """
-                SELECT 
-                    user_id, first_name, last_name, email, role, 
-                    registration_date
-                FROM 
-                    Users
-                ORDER BY 
-                    registration_date DESC
-            """
-            cursor.execute(query)
+        query = f"""
+            SELECT 
+                user_id, first_name, last_name, email, role, 
+                registration_date
+            FROM 
+                Users
+            {where}
+            ORDER BY 
+                {order} {direction}, user_id {direction}
+        """
+        if limit is not None:
+            query += " LIMIT %s OFFSET %s"
+            params = params + (limit, offset)
         
+        cursor.execute(query, params)
         return cursor.fetchall()
     except mysql.connector.Error as err:
         messagebox.showerror("Database Error", str(err))
@@ -274,6 +400,57 @@ def get_users(search_term=""):
             cursor.close()
             connection.close()
 
+def get_users(search_term=""):
+    """Get all users with optional search"""
+    return get_users_page(search_term)
+
+def count_users(search_term=""):
+    """Count the users matching a search"""
+    connection = connect_db()
+    if not connection:
+        return 0
+    
+    where, params = user_search_filter(search_term)
+    
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM Users {where}", params)
+        return cursor.fetchone()[0]
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Error", str(err))
+        return 0
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_user(user_id):
+    """Get a single user by id"""
+    connection = connect_db()
+    if not connection:
+        return None
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        
+        cursor.execute("""
+            SELECT 
+                user_id, first_name, last_name, email, role, 
+                registration_date
+            FROM 
+                Users
+            WHERE 
+                user_id = %s
+        """, (user_id,))
+        return cursor.fetchone()
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Error", str(err))
+        return None
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
 def create_user(first_name, last_name, email, password, role="member"):
     """Create a new user"""
     connection = connect_db()
@@ -407,7 +584,7 @@ def get_dashboard_stats():
         cursor = connection.cursor()
         
         # Total Books Count
-        cursor.execute("SELECT SUM(total_copies) FROM Books")
+        cursor.execute("SELECT COUNT(*) FROM BookCopies WHERE status <> 'withdrawn'")
         total_books = cursor.fetchone()[0] or 0
         
         # Borrowed Books Count
@@ -424,11 +601,17 @@ def get_dashboard_stats():
         
         # Books by Genre
         cursor.execute("""
-            SELECT genre, COUNT(*) as count 
-            FROM Books 
-            GROUP BY genre 
-            ORDER BY count DESC 
-            LIMIT 5
+            SELECT g.name, c.count 
+            FROM (
+                SELECT genre_id, COUNT(*) as count 
+                FROM Books 
+                WHERE genre_id IS NOT NULL 
+                GROUP BY genre_id 
+                ORDER BY count DESC 
+                LIMIT 5
+            ) c
+            JOIN Genres g ON g.genre_id = c.genre_id
+            ORDER BY c.count DESC
         """)
         genres = cursor.fetchall()
         
@@ -470,6 +653,9 @@ def get_dashboard_stats():
 class LibraryAdminApp:
     def __init__(self, root):
         self.root = root
+        theme.use_root(root)
+        ui_metrics.install(root, "admin")
+        profiling.install(self, "admin")
         self.root.title("Library Management System - Admin Dashboard")
         self.root.geometry("1200x700")
         
@@ -477,8 +663,9 @@ class LibraryAdminApp:
         ctk.set_appearance_mode("light")
         ctk.set_default_color_theme("green")
         
-        # Check admin session
+        # Check admin session; once it expires the login screen comes back
         self.admin = load_session()
+        sessions.watch(self.root, SESSION_KIND, self.logout)
         if not self.admin:
             self.show_login()
             return
@@ -486,8 +673,8 @@ class LibraryAdminApp:
         # Set up UI once admin is authenticated
         self.setup_ui()
         
-        # Load dashboard by default
-        self.show_dashboard()
+        # Load dashboard by default, once the shell is on screen
+        fast_start.after_first_paint(self.root, self.show_dashboard)
         
     def setup_ui(self):
         """Set up the main UI once admin is authenticated"""
@@ -515,7 +702,7 @@ class LibraryAdminApp:
         library_label = ctk.CTkLabel(
             self.sidebar, 
             text="📚 Library Admin", 
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=theme.font(size=20, weight="bold"),
             text_color="white"
         )
         library_label.pack(anchor="w", padx=20, pady=(20, 5))
@@ -524,7 +711,7 @@ class LibraryAdminApp:
         admin_welcome = ctk.CTkLabel(
             self.sidebar,
             text=f"Welcome,\n{self.admin['first_name']} {self.admin['last_name']}",
-            font=ctk.CTkFont(size=12, weight="bold"),
+            font=theme.font(size=12, weight="bold"),
             text_color="white"
         )
         admin_welcome.pack(anchor="w", padx=20, pady=(0, 20))
@@ -548,7 +735,7 @@ class LibraryAdminApp:
                 self.sidebar,
                 text=text,
                 anchor="w",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="transparent",
                 text_color="white",
                 hover_color="#0d4f29",
@@ -566,7 +753,7 @@ class LibraryAdminApp:
             self.sidebar,
             text="🚪 Logout",
             anchor="w",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="transparent",
             text_color="white",
             hover_color="#0d4f29",
@@ -596,7 +783,7 @@ class LibraryAdminApp:
         title_label = ctk.CTkLabel(
             login_frame,
             text="Library Admin Login",
-            font=ctk.CTkFont(size=24, weight="bold")
+            font=theme.font(size=24, weight="bold")
         )
         title_label.pack(pady=(100, 30))
         
@@ -608,7 +795,7 @@ class LibraryAdminApp:
         email_label = ctk.CTkLabel(
             input_frame,
             text="Email:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             width=100,
             anchor="e"
         )
@@ -626,7 +813,7 @@ class LibraryAdminApp:
         password_label = ctk.CTkLabel(
             input_frame,
             text="Password:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             width=100,
             anchor="e"
         )
@@ -645,7 +832,7 @@ class LibraryAdminApp:
         error_label = ctk.CTkLabel(
             login_frame,
             text="",
-            font=ctk.CTkFont(size=12),
+            font=theme.font(size=12),
             text_color="#d32f2f"
         )
         error_label.pack()
@@ -674,7 +861,7 @@ class LibraryAdminApp:
         login_button = ctk.CTkButton(
             login_frame,
             text="Login",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             fg_color="#116636",
             hover_color="#0d4f29",
             width=200,
@@ -686,6 +873,7 @@ class LibraryAdminApp:
         # Bind Enter key to login
         password_entry.bind("<Return>", lambda event: handle_login())
     
+    @ui_metrics.timed()
     def show_dashboard(self):
         """Show the dashboard page"""
         self.highlight_active_menu("📊 Dashboard")
@@ -698,7 +886,7 @@ class LibraryAdminApp:
         title = ctk.CTkLabel(
             self.content, 
             text="Book Management",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         title.pack(anchor="w", padx=30, pady=(20, 10))
@@ -754,62 +942,30 @@ class LibraryAdminApp:
         
         # Create scrollable table
         # Style for treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
-        
-        # Table columns
-        self.books_columns = ("ID", "Title", "Author", "Genre", "ISBN", "Year", "Available", "Total", "Actions")
-        
-        # Create treeview
-        self.books_tree = ttk.Treeview(
-            table_frame, 
-            columns=self.books_columns, 
-            show="headings", 
-            height=20,
-            selectmode="browse"
-        )
-        self.books_tree.pack(side="left", fill="both", expand=True)
-        
-        # Add a scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.books_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.books_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Configure column widths and headings
-        column_widths = {
-            "ID": 50,
-            "Title": 250,
-            "Author": 150,
-            "Genre": 100,
-            "ISBN": 100,
-            "Year": 60,
-            "Available": 70,
-            "Total": 60,
-            "Actions": 120
-        }
-        
-        for col in self.books_columns:
-            self.books_tree.heading(col, text=col)
-            self.books_tree.column(col, width=column_widths.get(col, 100), anchor="w" if col != "Actions" else "center")
-        
-        # Initial load of books
-        self.populate_books_table()
-    
-    def populate_books_table(self, search_term=""):
-        """Populate the books table with data"""
-        # Clear existing data
-        for item in self.books_tree.get_children():
-            self.books_tree.delete(item)
-        
-        # Get books data
-        books = get_books(search_term)
-        
-        # Insert books into table
-        for book in books:
-            item_id = self.books_tree.insert("", "end", values=(
+        theme.apply_treeview_style()
+        
+        # Table columns: (heading, width, server-side sort key)
+        book_columns = [
+            ("ID", 50, "book_id"),
+            ("Title", 250, "title"),
+            ("Author", 150, "author"),
+            ("Genre", 100, "genre"),
+            ("ISBN", 100, "isbn"),
+            ("Year", 60, "publication_year"),
+            ("Available", 70, "available_copies"),
+            ("Total", 60, "total_copies"),
+            ("Actions", 120, None)
+        ]
+        self.books_columns = tuple(heading for heading, _, _ in book_columns)
+        
+        # Virtual table: rows are fetched in windows as the user scrolls
+        self.books_search = ""
+        self.books_table = VirtualTable(
+            table_frame,
+            book_columns,
+            fetch_rows=lambda offset, limit, key, desc: get_books_page(self.books_search, offset, limit, key, desc),
+            count_rows=lambda: count_books(self.books_search),
+            format_row=lambda book: (
                 book['book_id'],
                 book['title'],
                 book['author'],
@@ -818,54 +974,33 @@ class LibraryAdminApp:
                 book['publication_year'],
                 book['available_copies'],
                 book['total_copies'],
-                ""  # Actions column will be filled with buttons
-            ))
-            
-        # Add buttons to the Actions column
-        self.add_book_action_buttons()
+                ""  # Actions column is filled in by the action layer
+            ),
+            sort_key="title"
+        )
+        self.books_tree = self.books_table.tree
+        
+        # Row actions: click the label, right-click menu, or keyboard shortcut
+        self.book_actions = TableActions(self.books_tree, "Actions", [
+            RowAction("✎ Edit", lambda item: self.show_book_form(self.books_table.row_for_item(item)['book_id']), "<Return>",
+                      enabled=self.books_table.row_for_item),
+            RowAction("🗑 Delete", lambda item: self.confirm_delete_book(self.books_table.row_for_item(item)['book_id']), "<Delete>",
+                      enabled=self.books_table.row_for_item)
+        ])
+        self.books_table.on_render = self.book_actions.refresh_labels
+        
+        # Initial load of books
+        self.populate_books_table("")
     
-    def add_book_action_buttons(self):
-        """Add edit and delete buttons to the books table"""
-        for item in self.books_tree.get_children():
-            # Get the book ID
-            book_id = self.books_tree.item(item, 'values')[0]
-            
-            # Get bounding box for action column
-            col_idx = self.books_columns.index("Actions")
-            bbox = self.books_tree.bbox(item, column=col_idx)
-            
-            if bbox:  # If visible
-                # Create a frame for the buttons
-                button_frame = ctk.CTkFrame(self.books_tree, fg_color="transparent")
-                button_frame.place(x=bbox[0], y=bbox[1], width=120, height=bbox[3])
-                
-                # Edit button
-                edit_button = ctk.CTkButton(
-                    button_frame, 
-                    text="Edit",
-                    width=50,
-                    height=20,
-                    fg_color="#FFA500",
-                    hover_color="#FF8C00",
-                    corner_radius=4,
-                    font=ctk.CTkFont(size=10),
-                    command=lambda b_id=book_id: self.show_book_form(b_id)
-                )
-                edit_button.pack(side="left", padx=(0, 5))
-                
-                # Delete button
-                delete_button = ctk.CTkButton(
-                    button_frame, 
-                    text="Delete",
-                    width=50,
-                    height=20,
-                    fg_color="#FF5252",
-                    hover_color="#D32F2F",
-                    corner_radius=4,
-                    font=ctk.CTkFont(size=10),
-                    command=lambda b_id=book_id: self.confirm_delete_book(b_id)
-                )
-                delete_button.pack(side="left")
+    @ui_metrics.timed()
+    def populate_books_table(self, search_term=None):
+        """Populate the books table with data"""
+        if search_term is None:
+            # Refresh after an edit, keeping the current search and position
+            self.books_table.refresh()
+        else:
+            self.books_search = search_term
+            self.books_table.reload()
     
     def show_book_form(self, book_id=None):
         """Show form to add or edit a book"""
@@ -885,11 +1020,7 @@ class LibraryAdminApp:
         book_data = {}
         if book_id:
             # Fetch book data for editing
-            books = get_books()
-            for book in books:
-                if str(book['book_id']) == str(book_id):
-                    book_data = book
-                    break
+            book_data = get_book(book_id) or {}
         
         # Form frame
         form_frame = ctk.CTkFrame(dialog)
@@ -899,7 +1030,7 @@ class LibraryAdminApp:
         form_title = ctk.CTkLabel(
             form_frame,
             text="Add New Book" if book_id is None else "Edit Book",
-            font=ctk.CTkFont(size=20, weight="bold")
+            font=theme.font(size=20, weight="bold")
         )
         form_title.pack(pady=(0, 20))
         
@@ -963,7 +1094,7 @@ class LibraryAdminApp:
         error_label = ctk.CTkLabel(
             form_frame,
             text="",
-            font=ctk.CTkFont(size=12),
+            font=theme.font(size=12),
             text_color="#d32f2f"
         )
         error_label.pack(pady=(10, 0))
@@ -976,7 +1107,7 @@ class LibraryAdminApp:
         cancel_button = ctk.CTkButton(
             button_frame,
             text="Cancel",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#f0f0f0",
             text_color="#333333",
             hover_color="#e0e0e0",
@@ -1036,7 +1167,7 @@ class LibraryAdminApp:
         save_button = ctk.CTkButton(
             button_frame,
             text="Save" if book_id is None else "Update",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#116636",
             hover_color="#0d4f29",
             width=100,
@@ -1080,7 +1211,7 @@ class LibraryAdminApp:
         title = ctk.CTkLabel(
             self.content, 
             text="User Management",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         title.pack(anchor="w", padx=30, pady=(20, 10))
@@ -1135,118 +1266,69 @@ class LibraryAdminApp:
         table_frame.pack(fill="both", expand=True, padx=30, pady=(0, 20))
         
         # Style for treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
-        
-        # Table columns
-        self.users_columns = ("ID", "First Name", "Last Name", "Email", "Role", "Registration Date", "Actions")
-        
-        # Create treeview
-        self.users_tree = ttk.Treeview(
-            table_frame, 
-            columns=self.users_columns, 
-            show="headings", 
-            height=20,
-            selectmode="browse"
+        theme.apply_treeview_style()
+        
+        # Table columns: (heading, width, server-side sort key)
+        user_columns = [
+            ("ID", 50, "user_id"),
+            ("First Name", 120, "first_name"),
+            ("Last Name", 120, "last_name"),
+            ("Email", 200, "email"),
+            ("Role", 100, "role"),
+            ("Registration Date", 120, "registration_date"),
+            ("Actions", 120, None)
+        ]
+        self.users_columns = tuple(heading for heading, _, _ in user_columns)
+        
+        # Virtual table: rows are fetched in windows as the user scrolls
+        self.users_search = ""
+        self.users_table = VirtualTable(
+            table_frame,
+            user_columns,
+            fetch_rows=lambda offset, limit, key, desc: get_users_page(self.users_search, offset, limit, key, desc),
+            count_rows=lambda: count_users(self.users_search),
+            format_row=self.format_user_row,
+            sort_key="registration_date",
+            descending=True
         )
-        self.users_tree.pack(side="left", fill="both", expand=True)
-        
-        # Add a scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.users_tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.users_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Configure column widths and headings
-        column_widths = {
-            "ID": 50,
-            "First Name": 120,
-            "Last Name": 120,
-            "Email": 200,
-            "Role": 100,
-            "Registration Date": 120,
-            "Actions": 120
-        }
+        self.users_tree = self.users_table.tree
         
-        for col in self.users_columns:
-            self.users_tree.heading(col, text=col)
-            self.users_tree.column(col, width=column_widths.get(col, 100), anchor="w" if col != "Actions" else "center")
+        # Row actions: click the label, right-click menu, or keyboard shortcut
+        self.user_actions = TableActions(self.users_tree, "Actions", [
+            RowAction("✎ Edit", lambda item: self.show_user_form(self.users_table.row_for_item(item)['user_id']), "<Return>",
+                      enabled=self.users_table.row_for_item),
+            RowAction("🗑 Delete", lambda item: self.confirm_delete_user(self.users_table.row_for_item(item)['user_id']), "<Delete>",
+                      enabled=self.users_table.row_for_item)
+        ])
+        self.users_table.on_render = self.user_actions.refresh_labels
         
         # Initial load of users
-        self.populate_users_table()
+        self.populate_users_table("")
     
-    def populate_users_table(self, search_term=""):
+    def populate_users_table(self, search_term=None):
         """Populate the users table with data"""
-        # Clear existing data
-        for item in self.users_tree.get_children():
-            self.users_tree.delete(item)
-        
-        # Get users data
-        users = get_users(search_term)
-        
-        # Insert users into table
-        for user in users:
-            reg_date = user['registration_date']
-            if isinstance(reg_date, datetime):
-                reg_date = reg_date.strftime('%Y-%m-%d')
-            
-            item_id = self.users_tree.insert("", "end", values=(
-                user['user_id'],
-                user['first_name'],
-                user['last_name'],
-                user['email'],
-                user['role'],
-                reg_date,
-                ""  # Actions column will be filled with buttons
-            ))
-            
-        # Add buttons to the Actions column
-        self.add_user_action_buttons()
+        if search_term is None:
+            # Refresh after an edit, keeping the current search and position
+            self.users_table.refresh()
+        else:
+            self.users_search = search_term
+            self.users_table.reload()
     
-    def add_user_action_buttons(self):
-        """Add edit and delete buttons to the users table"""
-        for item in self.users_tree.get_children():
-            # Get the user ID
-            user_id = self.users_tree.item(item, 'values')[0]
-            
-            # Get bounding box for action column
-            col_idx = self.users_columns.index("Actions")
-            bbox = self.users_tree.bbox(item, column=col_idx)
-            
-            if bbox:  # If visible
-                # Create a frame for the buttons
-                button_frame = ctk.CTkFrame(self.users_tree, fg_color="transparent")
-                button_frame.place(x=bbox[0], y=bbox[1], width=120, height=bbox[3])
-                
-                # Edit button
-                edit_button = ctk.CTkButton(
-                    button_frame, 
-                    text="Edit",
-                    width=50,
-                    height=20,
-                    fg_color="#FFA500",
-                    hover_color="#FF8C00",
-                    corner_radius=4,
-                    font=ctk.CTkFont(size=10),
-                    command=lambda u_id=user_id: self.show_user_form(u_id)
-                )
-                edit_button.pack(side="left", padx=(0, 5))
-                
-                # Delete button
-                delete_button = ctk.CTkButton(
-                    button_frame, 
-                    text="Delete",
-                    width=50,
-                    height=20,
-                    fg_color="#FF5252",
-                    hover_color="#D32F2F",
-                    corner_radius=4,
-                    font=ctk.CTkFont(size=10),
-                    command=lambda u_id=user_id: self.confirm_delete_user(u_id)
-                )
-                delete_button.pack(side="left")
+    def format_user_row(self, user):
+        """Values shown for a user in the users table"""
+        reg_date = user['registration_date']
+        if isinstance(reg_date, datetime):
+            reg_date = reg_date.strftime('%Y-%m-%d')
+        
+        return (
+            user['user_id'],
+            user['first_name'],
+            user['last_name'],
+            user['email'],
+            user['role'],
+            reg_date,
+            ""  # Actions column is filled in by the action layer
+        )
     
     def show_user_form(self, user_id=None):
         """Show form to add or edit a user"""
@@ -1266,11 +1348,7 @@ class LibraryAdminApp:
         user_data = {}
         if user_id:
             # Fetch user data for editing
-            users = get_users()
-            for user in users:
-                if str(user['user_id']) == str(user_id):
-                    user_data = user
-                    break
+            user_data = get_user(user_id) or {}
         
         # Form frame
         form_frame = ctk.CTkFrame(dialog)
@@ -1280,7 +1358,7 @@ class LibraryAdminApp:
         form_title = ctk.CTkLabel(
             form_frame,
             text="Add New User" if user_id is None else "Edit User",
-            font=ctk.CTkFont(size=20, weight="bold")
+            font=theme.font(size=20, weight="bold")
         )
         form_title.pack(pady=(0, 20))
         
@@ -1347,7 +1425,7 @@ class LibraryAdminApp:
         pass_note_label = ctk.CTkLabel(
             input_frame, 
             text=pass_note, 
-            font=ctk.CTkFont(size=10), 
+            font=theme.font(size=10), 
             text_color="gray"
         )
         pass_note_label.grid(row=5, column=1, padx=(0, 20), pady=(0, 10), sticky="w")
@@ -1356,7 +1434,7 @@ class LibraryAdminApp:
         error_label = ctk.CTkLabel(
             form_frame,
             text="",
-            font=ctk.CTkFont(size=12),
+            font=theme.font(size=12),
             text_color="#d32f2f"
         )
         error_label.pack(pady=(10, 0))
@@ -1369,7 +1447,7 @@ class LibraryAdminApp:
         cancel_button = ctk.CTkButton(
             button_frame,
             text="Cancel",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#f0f0f0",
             text_color="#333333",
             hover_color="#e0e0e0",
@@ -1398,7 +1476,7 @@ class LibraryAdminApp:
         title = ctk.CTkLabel(
             self.content, 
             text="Admin Dashboard",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         title.pack(anchor="w", padx=30, pady=(20, 20))
@@ -1434,7 +1512,7 @@ class LibraryAdminApp:
             icon_label = ctk.CTkLabel(
                 header_frame,
                 text=icon,
-                font=ctk.CTkFont(size=20),
+                font=theme.font(size=20),
                 text_color="#116636"
             )
             icon_label.pack(side="left", padx=(0, 5))
@@ -1442,7 +1520,7 @@ class LibraryAdminApp:
             title_label = ctk.CTkLabel(
                 header_frame,
                 text=title,
-                font=ctk.CTkFont(size=14, weight="bold"),
+                font=theme.font(size=14, weight="bold"),
                 text_color="#116636"
             )
             title_label.pack(side="left")
@@ -1451,7 +1529,7 @@ class LibraryAdminApp:
             value_label = ctk.CTkLabel(
                 card,
                 text=value,
-                font=ctk.CTkFont(size=24, weight="bold"),
+                font=theme.font(size=24, weight="bold"),
                 text_color="#333333"
             )
             value_label.pack(anchor="w", padx=15, pady=(5, 15))
@@ -1469,7 +1547,7 @@ class LibraryAdminApp:
         recent_title = ctk.CTkLabel(
             recent_loans_frame,
             text="Recent Loans",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         recent_title.pack(anchor="w", padx=15, pady=(15, 10))
@@ -1480,11 +1558,7 @@ class LibraryAdminApp:
         loans_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
         
         # Style for treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
         
         # Create treeview
         loans_tree = ttk.Treeview(loans_frame, columns=loans_columns, show="headings", height=8)
@@ -1511,7 +1585,7 @@ class LibraryAdminApp:
         genres_title = ctk.CTkLabel(
             genres_frame,
             text="Books by Genre",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         genres_title.pack(anchor="w", padx=15, pady=(15, 10))
@@ -1593,7 +1667,7 @@ class LibraryAdminApp:
         save_button = ctk.CTkButton(
             button_frame,
             text="Save" if user_id is None else "Update",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#116636",
             hover_color="#0d4f29",
             width=100,
@@ -1637,7 +1711,7 @@ class LibraryAdminApp:
         title = ctk.CTkLabel(
             self.content, 
             text="Fines Management",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         title.pack(anchor="w", padx=30, pady=(20, 20))
@@ -1656,7 +1730,7 @@ class LibraryAdminApp:
         stats_label = ctk.CTkLabel(
             stats_frame,
             text="Outstanding Fines:",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         stats_label.pack(side="left", padx=20, pady=20)
@@ -1664,77 +1738,57 @@ class LibraryAdminApp:
         amount_label = ctk.CTkLabel(
             stats_frame,
             text=f"${pending_fines:.2f}",
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=theme.font(size=20, weight="bold"),
             text_color="#d32f2f",
             anchor="e"
         )
         amount_label.pack(side="right", padx=20, pady=20)
         
-        # Functions to get fine data from database
-        def get_all_fines():
-            """Get all fines information"""
-            connection = connect_db()
-            if not connection:
-                return []
-            
-            try:
-                cursor = connection.cursor(dictionary=True)
-                
-                cursor.execute("""
-                    SELECT 
-                        f.fine_id,
-                        f.loan_id,
-                        f.amount,
-                        f.description,
-                        f.paid,
-                        f.payment_date,
-                        b.title,
-                        u.first_name,
-                        u.last_name,
-                        u.email,
-                        l.due_date,
-                        l.return_date
-                    FROM 
-                        Fines f
-                    JOIN 
-                        Loans l ON f.loan_id = l.loan_id
-                    JOIN 
-                        Books b ON l.book_id = b.book_id
-                    JOIN 
-                        Users u ON l.user_id = u.user_id
-                    ORDER BY 
-                        f.paid, f.fine_id DESC
-                """)
-                
-                return cursor.fetchall()
-            except mysql.connector.Error as err:
-                messagebox.showerror("Database Error", str(err))
-                return []
-            finally:
-                if connection.is_connected():
-                    cursor.close()
-                    connection.close()
-        
-        # Create tabs for different views
-        tabview = ctk.CTkTabview(self.content, height=500)
-        tabview.pack(fill="both", expand=True, padx=30, pady=(0, 20))
+        # One dataset backs every tab; each tab is a filtered view of it
+        dataset = FinesDataset()
+        active_filter = FinesFilter()
+        
+        # Filter bar
+        filter_frame = ctk.CTkFrame(self.content, fg_color="transparent")
+        filter_frame.pack(fill="x", padx=30, pady=(0, 10))
+        
+        user_entry = ctk.CTkEntry(filter_frame, placeholder_text="User name or email", width=220, height=35)
+        user_entry.pack(side="left", padx=(0, 10))
         
-        # Add tabs
-        all_tab = tabview.add("All Fines")
-        pending_tab = tabview.add("Pending Fines")
-        paid_tab = tabview.add("Paid Fines")
+        from_entry = ctk.CTkEntry(filter_frame, placeholder_text="From (YYYY-MM-DD)", width=150, height=35)
+        from_entry.pack(side="left", padx=(0, 10))
+        
+        to_entry = ctk.CTkEntry(filter_frame, placeholder_text="To (YYYY-MM-DD)", width=150, height=35)
+        to_entry.pack(side="left", padx=(0, 10))
+        
+        status_label = ctk.CTkLabel(filter_frame, text="", font=theme.font(size=12), anchor="e")
+        status_label.pack(side="right")
+        
+        # Loading progress
+        progress_frame = ctk.CTkFrame(self.content, fg_color="transparent")
+        progress_frame.pack(fill="x", padx=30, pady=(0, 10))
+        
+        progress_bar = ctk.CTkProgressBar(progress_frame, progress_color="#116636")
+        progress_bar.pack(side="left", fill="x", expand=True)
+        progress_bar.set(0)
+        
+        progress_label = ctk.CTkLabel(progress_frame, text="", font=theme.font(size=12), width=180, anchor="e")
+        progress_label.pack(side="right", padx=(10, 0))
+        
+        # Create tabs for different views; their tables are built on first open
+        tab_views = {"All Fines": "all", "Pending Fines": "pending", "Paid Fines": "paid"}
+        tabview = ctk.CTkTabview(self.content, height=500, command=lambda: show_view(current_view()))
+        tabview.pack(fill="both", expand=True, padx=30, pady=(0, 20))
         
-        # Configure tabs to expand
-        for tab in [all_tab, pending_tab, paid_tab]:
+        tabs = {}
+        for tab_title, view_name in tab_views.items():
+            tab = tabview.add(tab_title)
             tab.grid_columnconfigure(0, weight=1)
             tab.grid_rowconfigure(0, weight=1)
+            tabs[view_name] = tab
         
         # Style for treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
         
         # Table columns
         fines_columns = ("ID", "Book", "User", "Email", "Amount", "Description", "Status", "Date")
@@ -1749,15 +1803,18 @@ class LibraryAdminApp:
             "Date": 120
         }
         
-        # Create tables for each tab
-        tables = {}
+        tables = {}          # view name -> TableSync, for tabs opened so far
+        rendered = {}        # view name -> dataset version it shows
+        streaming = {"view": None, "fresh": False}
         
-        for tab_name, tab in [("all", all_tab), ("pending", pending_tab), ("paid", paid_tab)]:
-            # Create frame for table
-            table_frame = ctk.CTkFrame(tab, fg_color="transparent")
+        def current_view():
+            return tab_views.get(tabview.get(), "all")
+        
+        def build_table(view_name):
+            """Create the Treeview of a tab the first time it is shown"""
+            table_frame = ctk.CTkFrame(tabs[view_name], fg_color="transparent")
             table_frame.grid(row=0, column=0, sticky="nsew", padx=0, pady=0)
             
-            # Create treeview
             tree = ttk.Treeview(
                 table_frame, 
                 columns=fines_columns, 
@@ -1767,30 +1824,24 @@ class LibraryAdminApp:
             )
             tree.pack(side="left", fill="both", expand=True)
             
-            # Add a scrollbar
             scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
             scrollbar.pack(side="right", fill="y")
             tree.configure(yscrollcommand=scrollbar.set)
             
-            # Configure column widths and headings
             for col in fines_columns:
                 tree.heading(col, text=col)
                 tree.column(col, width=column_widths.get(col, 100), anchor="w")
             
-            # Store in dictionary
-            tables[tab_name] = tree
-        
-        # Function to populate tables
-        def populate_fines_tables():
-            # Clear existing data
-            for tree in tables.values():
-                for item in tree.get_children():
-                    tree.delete(item)
-            
-            # Get fines data
-            fines = get_all_fines()
+            tree.tag_configure("paid", background="#E8F5E9")
+            tree.tag_configure("pending", background="#FFEBEE")
             
-            # Process each fine
+            # Rows are keyed by fine_id so a refresh only touches the fines that changed
+            tables[view_name] = TableSync(tree)
+            return tables[view_name]
+        
+        def fine_rows(fines):
+            """Turn fine records into (key, values, tags) rows"""
+            rows = []
             for fine in fines:
                 status = "Paid" if fine['paid'] else "Pending"
                 date = fine['payment_date'] if fine['paid'] else fine['due_date']
@@ -1798,7 +1849,6 @@ class LibraryAdminApp:
                 if isinstance(date, datetime):
                     date = date.strftime('%Y-%m-%d')
                 
-                # Create row data
                 row_data = (
                     fine['fine_id'],
                     fine['title'],
@@ -1809,34 +1859,200 @@ class LibraryAdminApp:
                     status,
                     date
                 )
-                
-                # Insert into all fines table
-                tables["all"].insert("", "end", values=row_data, tags=(status.lower(),))
-                
-                # Insert into appropriate status table
-                if fine['paid']:
-                    tables["paid"].insert("", "end", values=row_data, tags=("paid",))
-                else:
-                    tables["pending"].insert("", "end", values=row_data, tags=("pending",))
+                rows.append((fine['fine_id'], row_data, (status.lower(),)))
+            return rows
+        
+        def stream_into(view_name):
+            """Make a tab receive the chunks of the running load"""
+            table = tables.get(view_name) or build_table(view_name)
+            table.begin()
+            table.apply(fine_rows(dataset.view(view_name, active_filter)))
+            streaming["view"] = view_name
+        
+        def stop_streaming():
+            view_name = streaming["view"]
+            if view_name:
+                tables[view_name].finish()
+                rendered[view_name] = dataset.version
+                streaming["view"] = None
+        
+        def show_view(view_name):
+            """Render a tab when it is opened, if its rows are out of date"""
+            if self.fines_loader and self.fines_loader.running:
+                if streaming["view"] != view_name:
+                    stop_streaming()
+                    stream_into(view_name)
+                return
+            
+            if rendered.get(view_name) == dataset.version:
+                return
+            table = tables.get(view_name) or build_table(view_name)
+            table.sync(fine_rows(dataset.view(view_name, active_filter)))
+            rendered[view_name] = dataset.version
+        
+        def update_status():
+            text = f"{len(dataset.order):,} fines loaded"
+            if not dataset.complete:
+                text += " (more available)"
+            status_label.configure(text=text)
+            if dataset.complete:
+                more_btn.pack_forget()
+            elif not more_btn.winfo_ismapped():
+                more_btn.pack(side="right", padx=(0, 10))
+        
+        def add_fines(fines):
+            """Keep one chunk of fines and show it in the open tab"""
+            dataset.add(fines)
+            view_name = streaming["view"]
+            if view_name:
+                tables[view_name].apply(fine_rows(dataset.view(view_name, active_filter, rows=fines)))
+        
+        def show_progress(loaded, total):
+            if total:
+                total = min(total, FINES_PAGE_SIZE)
+                progress_bar.set(min(loaded / total, 1))
+                progress_label.configure(text=f"Loaded {loaded:,} of {total:,} fines")
+            else:
+                progress_label.configure(text=f"Loaded {loaded:,} fines")
+        
+        def finish_fines(loaded):
+            total = self.fines_loader.total
+            dataset.complete = total is None or total <= loaded
+            # Another page can only add rows; other tabs catch up when opened
+            stop_streaming()
+            progress_frame.pack_forget()
+            update_status()
+        
+        def load_page(fresh):
+            """Fetch one page of fines matching the active filter
+            
+            A fresh load replaces the dataset; otherwise the next (older)
+            page is appended to it.
+            """
+            # Restart if a load is still running
+            if self.fines_loader:
+                self.fines_loader.abort()
+                stop_streaming()
+            
+            if fresh:
+                dataset.clear(FinesFilter(active_filter.user, active_filter.date_from, active_filter.date_to))
+                after = None
+            else:
+                after = dataset.last_key
+            query, count_query, params = fines_page_query(dataset.server_filter, after)
+            
+            progress_bar.set(0)
+            progress_label.configure(text="Loading fines...")
+            if not progress_frame.winfo_ismapped():
+                progress_frame.pack(fill="x", padx=30, pady=(0, 10), before=tabview)
             
-            # Configure tag colors
-            for tree in tables.values():
-                tree.tag_configure("paid", background="#E8F5E9")
-                tree.tag_configure("pending", background="#FFEBEE")
+            view_name = current_view()
+            table = tables.get(view_name) or build_table(view_name)
+            
+            # Rows are inserted in time-sliced chunks so the window stays
+            # responsive; leaving the page destroys the table and aborts the load
+            self.fines_loader = ChunkedLoader(
+                self.root,
+                connect_db,
+                query,
+                params,
+                count_query=count_query,
+                on_rows=add_fines,
+                on_progress=show_progress,
+                on_done=finish_fines,
+                on_error=lambda err: messagebox.showerror("Database Error", str(err)),
+                owner=table.tree
+            )
+            if not self.fines_loader.start():
+                progress_frame.pack_forget()
+                return
+            
+            # Only the open tab follows the load; appending a page keeps the rows it already shows
+            if fresh or rendered.get(view_name) != dataset.version:
+                stream_into(view_name)
+            else:
+                table.resume()
+                streaming["view"] = view_name
+        
+        def apply_filters():
+            """Filter in memory when the loaded rows cover the filter, else on the server"""
+            nonlocal active_filter
+            try:
+                new_filter = FinesFilter(user_entry.get(), parse_date(from_entry.get()), parse_date(to_entry.get()))
+            except ValueError:
+                messagebox.showerror("Invalid Date", "Dates must be in YYYY-MM-DD format")
+                return
+            
+            if new_filter == active_filter:
+                return
+            active_filter = new_filter
+            
+            if dataset.can_filter(new_filter):
+                rendered.clear()
+                show_view(current_view())
+                return
+            load_page(fresh=True)
+        
+        def clear_filters():
+            for entry in (user_entry, from_entry, to_entry):
+                entry.delete(0, "end")
+            apply_filters()
+        
+        def refresh_fines():
+            load_page(fresh=True)
+        
+        filter_btn = ctk.CTkButton(
+            filter_frame,
+            text="Filter",
+            font=theme.font(size=14),
+            fg_color="#116636",
+            hover_color="#0d4f29",
+            width=90,
+            height=35,
+            command=apply_filters
+        )
+        filter_btn.pack(side="left", padx=(0, 10))
+        
+        clear_btn = ctk.CTkButton(
+            filter_frame,
+            text="Clear",
+            font=theme.font(size=14),
+            fg_color="#757575",
+            hover_color="#616161",
+            width=80,
+            height=35,
+            command=clear_filters
+        )
+        clear_btn.pack(side="left")
+        
+        more_btn = ctk.CTkButton(
+            filter_frame,
+            text="Load Older Fines",
+            font=theme.font(size=14),
+            fg_color="#116636",
+            hover_color="#0d4f29",
+            width=140,
+            height=35,
+            command=lambda: load_page(fresh=False)
+        )
+        
+        for entry in (user_entry, from_entry, to_entry):
+            entry.bind("<Return>", lambda event: apply_filters())
         
-        # Initial population of tables
-        populate_fines_tables()
+        # Initial population of the open tab
+        self.fines_loader = None
+        load_page(fresh=True)
         
         # Refresh button
         refresh_btn = ctk.CTkButton(
             self.content,
             text="Refresh Data",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#116636",
             hover_color="#0d4f29",
             width=120,
             height=35,
-            command=populate_fines_tables
+            command=refresh_fines
         )
         refresh_btn.place(relx=0.95, rely=0.07, anchor="e")
     
@@ -1861,7 +2077,7 @@ if __name__ == "__main__":
         title = ctk.CTkLabel(
             self.content, 
             text="Admin Dashboard",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         title.pack(anchor="w", padx=30, pady=(20, 20))
@@ -1897,7 +2113,7 @@ if __name__ == "__main__":
             icon_label = ctk.CTkLabel(
                 header_frame,
                 text=icon,
-                font=ctk.CTkFont(size=20),
+                font=theme.font(size=20),
                 text_color="#116636"
             )
             icon_label.pack(side="left", padx=(0, 5))
@@ -1905,7 +2121,7 @@ if __name__ == "__main__":
             title_label = ctk.CTkLabel(
                 header_frame,
                 text=title,
-                font=ctk.CTkFont(size=14, weight="bold"),
+                font=theme.font(size=14, weight="bold"),
                 text_color="#116636"
             )
             title_label.pack(side="left")
@@ -1914,7 +2130,7 @@ if __name__ == "__main__":
             value_label = ctk.CTkLabel(
                 card,
                 text=value,
-                font=ctk.CTkFont(size=24, weight="bold"),
+                font=theme.font(size=24, weight="bold"),
                 text_color="#333333"
             )
             value_label.pack(anchor="w", padx=15, pady=(5, 15))
@@ -1932,7 +2148,7 @@ if __name__ == "__main__":
         recent_title = ctk.CTkLabel(
             recent_loans_frame,
             text="Recent Loans",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         recent_title.pack(anchor="w", padx=15, pady=(15, 10))
@@ -1943,11 +2159,7 @@ if __name__ == "__main__":
         loans_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
         
         # Style for treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
         
         # Create treeview
         loans_tree = ttk.Treeview(loans_frame, columns=loans_columns, show="headings", height=8)
@@ -1974,7 +2186,7 @@ if __name__ == "__main__":
         genres_title = ctk.CTkLabel(
             genres_frame,
             text="Books by Genre",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         genres_title.pack(anchor="w", padx=15, pady=(15, 10))
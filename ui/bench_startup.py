@@ -0,0 +1,163 @@
+"""Cold-start benchmark for every entry point
+
+For each script it measures:
+
+- import time: `python -X importtime -c "import <module>"`, with the
+  slowest imports listed. login and signup build their window at import,
+  so they are not import-timed.
+- first paint: from launching `python <script>.py` until its window is
+  mapped
+- ready: until the first data load deferred by fast start has run
+
+Each script runs in fast-start mode and, with --modes fast,eager, with
+LIBRARY_FAST_START=0 as well. Results are written as JSON; with --baseline
+the run fails (exit 1) when a timing regresses past the tolerance.
+
+    python bench_startup.py --output bench_startup.json
+    python bench_startup.py --modes fast,eager --baseline bench_startup.json
+
+The scripts run as they are, against the configured database and the
+session in the environment. To benchmark the member screens, run this
+from a shell where LIBRARY_USER_SESSION holds a session token and
+LIBRARY_SESSION_SECRET holds the key it was signed with; the token does
+not verify without both.
+Without a DISPLAY the harness re-runs itself under xvfb-run.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+# ------------------- Constants -------------------
+ENTRY_POINTS = ("main", "login", "signup", "home", "browse", "borrow", "fine", "admin")
+BUILDS_AT_IMPORT = ("login", "signup")
+MODES = {"fast": "1", "eager": "0"}
+
+REPEAT = 3
+TIMEOUT = 60
+TOLERANCE = 0.20        # allowed slowdown against the baseline
+NOISE_FLOOR_MS = 20.0   # differences below this are never regressions
+SLOWEST_IMPORTS = 8
+
+UI_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# ------------------- Measurements -------------------
+def import_time(module, mode):
+    """Cumulative import time of module in ms, and its slowest imports by self time"""
+    env = dict(os.environ, LIBRARY_FAST_START=MODES[mode])
+    run = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=UI_DIR, env=env, timeout=TIMEOUT
+    )
+    if run.returncode != 0:
+        raise RuntimeError(run.stderr.strip().splitlines()[-1] if run.stderr.strip() else "import failed")
+
+    total = 0.0
+    imports = []
+    for line in run.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        imports.append((int(self_us) / 1000, name))
+        if name == module and len(indent) == 1:
+            total = int(cumulative_us) / 1000
+    slowest = sorted(imports, reverse=True)[:SLOWEST_IMPORTS]
+    return total, [{"module": name, "self_ms": round(ms, 2)} for ms, name in slowest]
+
+def launch(script, mode):
+    """Run a script until its first window is ready; returns its STARTUP marks"""
+    env = dict(
+        os.environ,
+        LIBRARY_FAST_START=MODES[mode],
+        LIBRARY_STARTUP_BENCH="1",
+        LIBRARY_STARTUP_T0=repr(time.time()),
+    )
+    run = subprocess.run(
+        [sys.executable, script + ".py"],
+        capture_output=True, text=True, cwd=UI_DIR, env=env, timeout=TIMEOUT
+    )
+    for line in run.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    error = run.stderr.strip().splitlines()
+    raise RuntimeError(error[-1] if error else f"{script}.py exited without opening a window")
+
+def measure(script, mode, repeat):
+    result = {}
+    if script not in BUILDS_AT_IMPORT:
+        runs = [import_time(script, mode) for _ in range(repeat)]
+        result["import_ms"] = round(statistics.median(total for total, _ in runs), 2)
+        result["slowest_imports"] = runs[-1][1]
+
+    marks = [launch(script, mode) for _ in range(repeat)]
+    result["first_paint_ms"] = round(statistics.median(mark["first_paint_ms"] for mark in marks), 2)
+    result["ready_ms"] = round(statistics.median(mark["ready_ms"] for mark in marks), 2)
+    return result
+
+# ------------------- Regression Check -------------------
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of results against baseline"""
+    regressions = []
+    for script, modes in results.items():
+        for mode, metrics in modes.items():
+            previous = baseline.get(script, {}).get(mode, {})
+            for metric, value in metrics.items():
+                before = previous.get(metric)
+                if not isinstance(value, (int, float)) or before is None:
+                    continue
+                if value > before * (1 + tolerance) and value - before > NOISE_FLOOR_MS:
+                    regressions.append(f"{script} [{mode}] {metric}: {before:.1f} ms -> {value:.1f} ms")
+    return regressions
+
+# ------------------- Main Execution -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start of every entry point")
+    parser.add_argument("--scripts", default=",".join(ENTRY_POINTS), help="comma-separated entry points")
+    parser.add_argument("--modes", default="fast", help="comma-separated: fast, eager")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="fail if results regress against this JSON")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    if not os.environ.get("DISPLAY") and shutil.which("xvfb-run"):
+        os.execvp("xvfb-run", ["xvfb-run", "-a", sys.executable] + sys.argv)
+
+    results = {}
+    failed = False
+    for script in args.scripts.split(","):
+        results[script] = {}
+        for mode in args.modes.split(","):
+            print(f"  {script} [{mode}]", file=sys.stderr)
+            try:
+                results[script][mode] = measure(script, mode, args.repeat)
+            except (RuntimeError, subprocess.TimeoutExpired) as err:
+                results[script][mode] = {"error": str(err)}
+                failed = True
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Startup regressions:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
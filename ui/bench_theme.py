@@ -0,0 +1,107 @@
+"""Compare per-widget fonts and styles with the shared theme registry
+
+Builds the browse card grid and the admin tables twice, once creating
+fonts and ttk styles the old way and once through theme.py, and prints
+build time and the number of Tk fonts created. Needs a display (use
+xvfb-run on a headless machine).
+
+    python bench_theme.py [--cards 60] [--tables 20] [--repeat 3]
+"""
+import argparse
+import json
+import time
+import tkinter as tk
+from tkinter import ttk
+import customtkinter as ctk
+import theme
+
+CARD_FONTS = [
+    {"size": 16, "weight": "bold"},
+    {"size": 14},
+    {"size": 14},
+    {"size": 14},
+    {"size": 14},
+    {"size": 14, "weight": "bold"},
+    {"size": 12},
+    {"size": 14},
+    {"size": 14},
+]
+
+# ------------------- Builders -------------------
+def build_cards(parent, count, make_font):
+    """Build a grid of cards shaped like browse.py's create_book_card"""
+    for i in range(count):
+        card = ctk.CTkFrame(parent, width=350, height=200, fg_color="white", corner_radius=10)
+        card.grid(row=i // 3, column=i % 3, padx=10, pady=10)
+        for position, spec in enumerate(CARD_FONTS):
+            label = ctk.CTkLabel(card, text=f"Field {position}", font=make_font(**spec))
+            label.place(x=15, y=15 + position * 20)
+
+def build_tables(parent, count, style_tables):
+    """Build Treeviews the way the admin pages do, styling each screen"""
+    for _ in range(count):
+        style_tables()
+        tree = ttk.Treeview(parent, columns=("ID", "Title", "Author"), show="headings", height=5)
+        tree.pack()
+
+def old_font(**spec):
+    return ctk.CTkFont(**spec)
+
+def old_style():
+    style = ttk.Style()
+    style.theme_use("clam")
+    style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
+    style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
+    style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+
+# ------------------- Measurement -------------------
+def measure(root, build):
+    """Build into a fresh frame; returns (seconds, fonts created)"""
+    frame = tk.Frame(root)
+    frame.pack()
+    fonts_before = len(root.tk.call("font", "names"))
+    start = time.perf_counter()
+    build(frame)
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    fonts_after = len(root.tk.call("font", "names"))
+    frame.destroy()
+    return elapsed, fonts_after - fonts_before
+
+def run(cards, tables, repeat):
+    root = ctk.CTk()
+    theme.use_root(root)
+    root.withdraw()
+
+    cases = {
+        "browse_grid_per_widget": lambda f: build_cards(f, cards, old_font),
+        "browse_grid_shared": lambda f: build_cards(f, cards, theme.font),
+        "admin_tables_per_screen": lambda f: build_tables(f, tables, old_style),
+        "admin_tables_shared": lambda f: build_tables(f, tables, theme.apply_treeview_style),
+    }
+
+    results = {}
+    for name, build in cases.items():
+        timings = []
+        fonts = 0
+        for _ in range(repeat):
+            elapsed, created = measure(root, build)
+            timings.append(elapsed)
+            fonts += created
+        results[name] = {
+            "best_ms": round(min(timings) * 1000, 2),
+            "fonts_created": fonts,
+        }
+
+    root.destroy()
+    return results
+
+# ------------------- Main Execution -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=60)
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.cards, args.tables, args.repeat), indent=2))
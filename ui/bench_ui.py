@@ -0,0 +1,228 @@
+"""Headless benchmark of screen build, page-turn and refresh times
+
+Each app is driven programmatically against a benchmark database
+generated by datagen.py (one per catalogue size) in its own worker process, so the first build
+is a true cold start. Results are written as JSON; with --baseline the
+run fails (exit 1) when a timing regresses past the tolerance.
+
+    python bench_ui.py --sizes 1000,100000,1000000 --output bench_ui.json
+    python bench_ui.py --baseline bench_ui.json
+
+Without a DISPLAY the harness re-runs itself under xvfb-run.
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+# ------------------- Constants -------------------
+DEFAULT_SIZES = (1000, 100000, 1000000)
+REPEAT = 5
+TOLERANCE = 0.20        # allowed slowdown against the baseline
+NOISE_FLOOR_MS = 5.0    # differences below this are never regressions
+SEED_BATCH = 5000
+
+SEED = 42
+
+# The most active generated member, so the borrow and fines screens have history
+BENCH_MEMBER_EMAIL = "member0000000@example.com"
+
+def database_name(size):
+    return f"library_bench_{size}"
+
+# ------------------- Scenarios -------------------
+def next_page(app):
+    if app.current_page < app.total_pages - 1:
+        app.next_page()
+    else:
+        app.previous_page()
+
+def scroll_page(table):
+    offset = table.offset + table.visible_rows
+    table.scroll_to(offset if offset < table.total else 0)
+
+# module, class, session role, page turn, refresh
+APPS = {
+    "LibraryApp": ("home", "LibraryApp", "member", None, lambda app: app.show_dashboard()),
+    "LibraryBrowseApp": ("browse", "LibraryBrowseApp", "member", next_page, lambda app: app.refresh_page()),
+    "BorrowedBooksApp": ("borrow", "BorrowedBooksApp", "member", None, lambda app: app.load_data()),
+    "FinesPaymentApp": ("fine", "FinesPaymentApp", "member",
+                        lambda app: scroll_page(app.history_table), lambda app: app.load_data()),
+    "LibraryAdminApp": ("admin", "LibraryAdminApp", "admin",
+                        lambda app: scroll_page(app.books_table), lambda app: app.populate_books_table()),
+}
+
+# ------------------- Seeding -------------------
+def seed_database(size):
+    """Generate the benchmark database for a catalogue size if it is not there yet"""
+    import datagen
+
+    name = database_name(size)
+    if datagen.is_seeded(name, size):
+        return
+    datagen.generate(
+        name,
+        books=size,
+        users=max(100, size // 5),
+        loans=size * 2,
+        fines=size // 2,
+        seed=SEED
+    )
+
+def session_for(role, size):
+    """Session data the app would normally read from its session file"""
+    import mysql.connector
+    import main
+
+    email = "admin@library.com" if role == "admin" else BENCH_MEMBER_EMAIL
+    connection = mysql.connector.connect(database=database_name(size), **main.DB_CONFIG)
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT user_id, first_name, last_name, email, role FROM Users WHERE email = %s", (email,))
+    user = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return user
+
+# ------------------- Worker -------------------
+def timed_ms(action, root):
+    import fast_start
+
+    start = time.perf_counter()
+    action()
+    root.update()   # include layout and paint
+    while fast_start.pending():
+        root.update()   # and the first data load deferred until after the paint
+    return (time.perf_counter() - start) * 1000
+
+def run_worker(app_name, size, repeat):
+    """Measure one app against one catalogue size; prints a JSON result"""
+    from tkinter import messagebox
+    import customtkinter as ctk
+
+    module_name, class_name, role, page_turn, refresh = APPS[app_name]
+    session = session_for(role, size)
+
+    # Dialogs would block a headless run; report them instead
+    for name in ("showerror", "showinfo", "showwarning"):
+        setattr(messagebox, name, lambda title, message, *args, **kwargs: print(f"{title}: {message}", file=sys.stderr))
+    messagebox.askyesno = lambda *args, **kwargs: False
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    module.DB_CONFIG["database"] = database_name(size)
+    module.load_session = lambda: dict(session)
+    app_class = getattr(module, class_name)
+
+    builds = []
+    for _ in range(repeat + 1):
+        root = ctk.CTk()
+        builds.append(timed_ms(lambda: setattr(root, "bench_app", app_class(root)), root))
+        app = root.bench_app
+
+        if len(builds) == repeat + 1:
+            # Keep the last window for the page-turn and refresh runs
+            break
+        root.destroy()
+
+    result = {
+        "import_ms": round(import_ms, 2),
+        "cold_build_ms": round(builds[0], 2),
+        "warm_build_ms": round(statistics.median(builds[1:]), 2),
+    }
+    if page_turn:
+        result["page_turn_ms"] = round(statistics.median(timed_ms(lambda: page_turn(app), root) for _ in range(repeat)), 2)
+    result["refresh_ms"] = round(statistics.median(timed_ms(lambda: refresh(app), root) for _ in range(repeat)), 2)
+
+    root.destroy()
+    print(json.dumps(result))
+
+# ------------------- Regression Check -------------------
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of results against baseline"""
+    regressions = []
+    for size, apps in results.items():
+        for app_name, metrics in apps.items():
+            previous = baseline.get(size, {}).get(app_name, {})
+            for metric, value in metrics.items():
+                before = previous.get(metric)
+                if before is None or metric == "import_ms":
+                    continue
+                if value > before * (1 + tolerance) and value - before > NOISE_FLOOR_MS:
+                    regressions.append(f"{size} {app_name} {metric}: {before:.1f} ms -> {value:.1f} ms")
+    return regressions
+
+# ------------------- Main Execution -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark screen build, page-turn and refresh times")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated catalogue sizes")
+    parser.add_argument("--apps", default=",".join(APPS), help="comma-separated app classes")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="fail if results regress against this JSON")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--skip-seed", action="store_true", help="use the benchmark databases as they are")
+    parser.add_argument("--worker", nargs=2, metavar=("APP", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], int(args.worker[1]), args.repeat)
+        return 0
+
+    if not os.environ.get("DISPLAY") and shutil.which("xvfb-run"):
+        os.execvp("xvfb-run", ["xvfb-run", "-a", sys.executable] + sys.argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    apps = args.apps.split(",")
+
+    results = {}
+    for size in sizes:
+        if not args.skip_seed:
+            print(f"Seeding {database_name(size)}...", file=sys.stderr)
+            seed_database(size)
+
+        results[str(size)] = {}
+        for app_name in apps:
+            print(f"  {app_name} @ {size:,} books", file=sys.stderr)
+            worker = subprocess.run(
+                [sys.executable, __file__, "--worker", app_name, str(size), "--repeat", str(args.repeat)],
+                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            if worker.returncode != 0:
+                sys.stderr.write(worker.stderr)
+                results[str(size)][app_name] = {"error": worker.stderr.strip().splitlines()[-1:]}
+                continue
+            results[str(size)][app_name] = json.loads(worker.stdout.strip().splitlines()[-1])
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(
+            {size: {app: m for app, m in apps.items() if "error" not in m} for size, apps in results.items()},
+            baseline, args.tolerance
+        )
+        if regressions:
+            print("Performance regressions:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+
+    if any("error" in metrics for apps in results.values() for metrics in apps.values()):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
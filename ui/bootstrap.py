@@ -0,0 +1,212 @@
+"""Launch readiness: one database probe per process, shared with every screen
+
+check() opens a single connection and answers three questions:
+
+- do the library tables exist
+- what schema version is recorded in SchemaInfo
+- is there an admin account
+
+The result is cached for the process. It is also copied into the
+LIBRARY_BOOTSTRAP environment variable, so screens opened from this one
+with os.system() reuse it instead of probing again. ensure_ready() is
+main.py's stage: it creates or upgrades the database only when the probe
+says so.
+
+Every phase is timed; report() prints the breakdown.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import fast_start
+import query_log
+mysql = fast_start.lazy_import("mysql.connector")
+
+# ------------------- Constants -------------------
+# Bump when main.upgrade_database() gains a step
+SCHEMA_VERSION = 2
+
+REQUIRED_TABLES = ("Users", "Genres", "Books", "BookCopies", "Loans", "Fines")
+ENV_VAR = "LIBRARY_BOOTSTRAP"
+SHARED_TTL = float(os.environ.get("LIBRARY_BOOTSTRAP_TTL", "900"))   # seconds a handed-down result is trusted
+
+# ------------------- Timing -------------------
+timings = {}
+_started = time.perf_counter()
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to a startup phase"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + (time.perf_counter() - start) * 1000
+
+def report():
+    """Print the startup timing breakdown"""
+    phases = ", ".join(f"{phase} {ms:.1f} ms" for phase, ms in timings.items())
+    total = (time.perf_counter() - _started) * 1000
+    print(f"Startup: {phases} (total {total:.1f} ms since bootstrap import)")
+
+# ------------------- Readiness -------------------
+class Readiness:
+    """What the launch probe found"""
+
+    def __init__(self, database, host, tables=(), schema_version=0, admin_present=False, error=None,
+                 checked_at=None, created=False, upgraded=False):
+        self.database = database
+        self.host = host
+        self.tables = set(tables)
+        self.schema_version = schema_version
+        self.admin_present = admin_present
+        self.error = error
+        self.checked_at = checked_at or time.time()
+        self.created = created
+        self.upgraded = upgraded
+
+    @property
+    def database_exists(self):
+        return bool(self.tables)
+
+    @property
+    def ready(self):
+        return (
+            self.error is None
+            and all(table.lower() in self.tables for table in REQUIRED_TABLES)
+            and self.schema_version >= SCHEMA_VERSION
+            and self.admin_present
+        )
+
+    def to_json(self):
+        return json.dumps({
+            "database": self.database, "host": self.host, "tables": sorted(self.tables),
+            "schema_version": self.schema_version, "admin_present": self.admin_present,
+            "checked_at": self.checked_at,
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data["database"], data["host"], data["tables"], data["schema_version"],
+                   data["admin_present"], checked_at=data["checked_at"])
+
+_cache = {}
+_lock = threading.Lock()
+
+def probe(config):
+    """Run the readiness queries on one connection"""
+    database = config["database"]
+    server_config = {key: value for key, value in config.items() if key != "database"}
+    try:
+        with timed("connect"):
+            connection = query_log.connect(**server_config)
+    except mysql.connector.Error as err:
+        return Readiness(database, config.get("host"), error=str(err))
+
+    try:
+        with timed("probe"):
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s",
+                (database,)
+            )
+            tables = {row[0].lower() for row in cursor.fetchall()}
+
+            schema_version = 0
+            if "schemainfo" in tables:
+                cursor.execute(f"SELECT MAX(version) FROM `{database}`.SchemaInfo")
+                schema_version = cursor.fetchone()[0] or 0
+
+            admin_present = False
+            if "users" in tables:
+                cursor.execute(f"SELECT EXISTS(SELECT 1 FROM `{database}`.Users WHERE role = 'admin')")
+                admin_present = bool(cursor.fetchone()[0])
+            cursor.close()
+        return Readiness(database, config.get("host"), tables, schema_version, admin_present)
+    except mysql.connector.Error as err:
+        return Readiness(database, config.get("host"), error=str(err))
+    finally:
+        connection.close()
+
+def inherited(config):
+    """A ready result handed down by the screen that launched this one, if it still applies"""
+    text = os.environ.get(ENV_VAR)
+    if not text:
+        return None
+    try:
+        state = Readiness.from_json(text)
+    except (ValueError, KeyError):
+        return None
+    if (state.database != config["database"] or state.host != config.get("host")
+            or time.time() - state.checked_at > SHARED_TTL or not state.ready):
+        return None
+    return state
+
+def remember(config, state):
+    _cache[(config.get("host"), config["database"])] = state
+    if state.ready:
+        os.environ[ENV_VAR] = state.to_json()
+
+def current(config):
+    """The cached result for a database, without probing"""
+    return _cache.get((config.get("host"), config["database"]))
+
+def check(config, force=False):
+    """Readiness of the database in config, probed at most once per process
+
+    Safe to call off the Tk thread: it shows no dialogs.
+    """
+    key = (config.get("host"), config["database"])
+    with _lock:
+        if not force:
+            state = _cache.get(key) or inherited(config)
+            if state is not None:
+                _cache[key] = state
+                return state
+        state = probe(config)
+        remember(config, state)
+        return state
+
+def ensure_ready(config, create, upgrade):
+    """Create or upgrade the database only if the probe finds it necessary
+
+    create() and upgrade() are main.py's setup functions; each returns
+    True on success and records the schema version itself.
+    """
+    state = check(config)
+    if state.error:
+        return state
+
+    created = upgraded = False
+    if not state.database_exists:
+        print("Setting up database...")
+        with timed("create"):
+            if not create():
+                return state
+        created = True
+    else:
+        if state.schema_version < SCHEMA_VERSION:
+            with timed("upgrade"):
+                if not upgrade():
+                    return state
+            upgraded = True
+        if not state.admin_present:
+            # create() only adds what is missing, here the default admin
+            with timed("create"):
+                if not create():
+                    return state
+            created = True
+
+    if created or upgraded:
+        state = check(config, force=True)
+        state.created, state.upgraded = created, upgraded
+    return state
+
+def record_version(cursor):
+    """Mark the database behind cursor as being at SCHEMA_VERSION"""
+    cursor.execute("CREATE TABLE IF NOT EXISTS SchemaInfo (version INT NOT NULL)")
+    cursor.execute("DELETE FROM SchemaInfo")
+    cursor.execute("INSERT INTO SchemaInfo (version) VALUES (%s)", (SCHEMA_VERSION,))
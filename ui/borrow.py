@@ -1,14 +1,24 @@
+import profiling
 import tkinter as tk
 from tkinter import ttk, messagebox
 import customtkinter as ctk
-import mysql.connector
-import json
+import theme
+import ui_metrics
+import metrics
+import tracing
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import sessions
 import os
 from datetime import datetime
 import hashlib
+from inventory import checkin_loan, clean_barcode, find_open_loan_by_barcode, looks_like_barcode
+from table_actions import RowAction, TableActions
+from table_sync import TableSync
 
 # ------------------- Constants -------------------
-SESSION_FILE = 'user_session.json'
+SESSION_KIND = "user"
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -19,27 +29,19 @@ DB_CONFIG = {
 # ------------------- Database Connection -------------------
 def connect_db():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return query_log.connect(**DB_CONFIG)
     except mysql.connector.Error as err:
         messagebox.showerror("Database Connection Error", f"Failed to connect to database: {err}")
         return None
 
 # ------------------- Session Management -------------------
 def load_session():
-    """Load user data from session file"""
-    try:
-        if os.path.exists(SESSION_FILE):
-            with open(SESSION_FILE, 'r') as f:
-                return json.load(f)
-        return None
-    except Exception as e:
-        messagebox.showerror("Session Error", f"Failed to load session: {e}")
-        return None
+    """Load user data from the active session"""
+    return sessions.current(SESSION_KIND)
 
 def clear_session():
-    """Delete the session file"""
-    if os.path.exists(SESSION_FILE):
-        os.remove(SESSION_FILE)
+    """End the active session"""
+    sessions.end(SESSION_KIND)
 
 # ------------------- Loan Functions -------------------
 def get_active_loans(user_id):
@@ -126,6 +128,7 @@ def get_loan_history(user_id):
             cursor.close()
             connection.close()
 
+@metrics.counted(metrics.RETURNS)
 def return_book(loan_id, user_id):
     """Return a borrowed book"""
     connection = connect_db()
@@ -142,17 +145,18 @@ def return_book(loan_id, user_id):
         if loan_data:
             book_id, due_date = loan_data
             
-            # Update loan return date
+            # Update loan return date; only the user's own open loan
             cursor.execute(
-                "UPDATE Loans SET return_date = CURDATE() WHERE loan_id = %s AND user_id = %s", 
+                "UPDATE Loans SET return_date = CURDATE() WHERE loan_id = %s AND user_id = %s AND return_date IS NULL", 
                 (loan_id, user_id)
             )
             
-            # Increment available copies
-            cursor.execute(
-                "UPDATE Books SET available_copies = available_copies + 1 WHERE book_id = %s", 
-                (book_id,)
-            )
+            # Someone else's loan, or already returned
+            if cursor.rowcount == 0:
+                return False
+            
+            # Put the copy back on the shelf
+            checkin_loan(cursor, loan_id)
             
             # Check if book is overdue and create fine if needed
             if due_date < datetime.now().date():
@@ -176,6 +180,29 @@ def return_book(loan_id, user_id):
             cursor.close()
             connection.close()
 
+def find_loan_by_barcode(barcode, user_id):
+    """Return the loan_id of the user's open loan of a scanned copy, or None"""
+    connection = connect_db()
+    if not connection:
+        return None
+    
+    try:
+        cursor = connection.cursor()
+        
+        # Unique barcode index, then the copy's open loan
+        loan = find_open_loan_by_barcode(cursor, barcode)
+        if loan and loan[1] == user_id:
+            return loan[0]
+        return None
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Error", str(err))
+        return None
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+@metrics.counted(metrics.FINE_PAYMENTS)
 def pay_fine(loan_id, user_id):
     """Pay fine for an overdue book"""
     connection = connect_db()
@@ -233,6 +260,9 @@ def format_currency(amount):
 class BorrowedBooksApp:
     def __init__(self, root):
         self.root = root
+        theme.use_root(root)
+        ui_metrics.install(root, "borrow")
+        profiling.install(self, "borrow")
         self.root.title("Library Management System - Borrowed Books")
         self.root.geometry("1100x700")
         
@@ -246,12 +276,13 @@ class BorrowedBooksApp:
             messagebox.showerror("Session Error", "No active user session found.")
             self.logout()
             return
+        sessions.watch(self.root, SESSION_KIND, self.logout)
         
         # Initialize UI
         self.setup_ui()
         
-        # Load borrowed books and history
-        self.load_data()
+        # Load borrowed books and history once the shell is on screen
+        fast_start.after_first_paint(self.root, self.load_data)
     
     def setup_ui(self):
         """Set up the user interface"""
@@ -272,14 +303,14 @@ class BorrowedBooksApp:
         sidebar.grid_propagate(False)  # Prevent the frame from shrinking
 
         # Sidebar Title
-        title_label = ctk.CTkLabel(sidebar, text="📑 Library System", font=ctk.CTkFont(size=16, weight="bold"), 
+        title_label = ctk.CTkLabel(sidebar, text="📑 Library System", font=theme.font(size=16, weight="bold"), 
                                   text_color="white", anchor="w", padx=10, pady=10)
         title_label.pack(fill="x", pady=(20, 10))
         
         # User welcome message
         user_welcome = ctk.CTkLabel(sidebar, 
                                  text=f"Welcome,\n{self.user['first_name']} {self.user['last_name']}", 
-                                 font=ctk.CTkFont(size=12, weight="bold"), 
+                                 font=theme.font(size=12, weight="bold"), 
                                  text_color="white", anchor="w", padx=10, pady=10)
         user_welcome.pack(fill="x", pady=(0, 20))
         
@@ -299,12 +330,12 @@ class BorrowedBooksApp:
 
         for text, command in menu_items:
             if command:  # Regular button
-                button = ctk.CTkButton(sidebar, text=text, font=ctk.CTkFont(size=12), 
+                button = ctk.CTkButton(sidebar, text=text, font=theme.font(size=12), 
                                      fg_color="transparent", text_color="white", anchor="w",
                                      hover_color="#0d4f29", corner_radius=0, height=40,
                                      command=command)
             else:  # Current page (highlight)
-                button = ctk.CTkButton(sidebar, text=text, font=ctk.CTkFont(size=12), 
+                button = ctk.CTkButton(sidebar, text=text, font=theme.font(size=12), 
                                      fg_color="#0d4f29", text_color="white", anchor="w",
                                      hover_color="#0d4f29", corner_radius=0, height=40)
             button.pack(fill="x", pady=2)
@@ -320,7 +351,7 @@ class BorrowedBooksApp:
         title_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
         
         title = ctk.CTkLabel(title_frame, text="My Borrowed Books", 
-                          font=ctk.CTkFont(size=20, weight="bold"))
+                          font=theme.font(size=20, weight="bold"))
         title.pack(pady=10)
         
         # Separator line
@@ -331,22 +362,26 @@ class BorrowedBooksApp:
         self.current_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
         self.current_frame.grid(row=2, column=0, sticky="ew", pady=15)
         
-        # Current Loans Label
-        current_label = ctk.CTkLabel(self.current_frame, text="📚 Current Loans", 
-                                  font=ctk.CTkFont(size=16, weight="bold"), 
+        # Current Loans header with a scanner box for returns
+        current_header = ctk.CTkFrame(self.current_frame, fg_color="transparent")
+        current_header.pack(fill="x", pady=(0, 10))
+        
+        current_label = ctk.CTkLabel(current_header, text="📚 Current Loans", 
+                                  font=theme.font(size=16, weight="bold"), 
                                   anchor="w")
-        current_label.pack(anchor="w", pady=(0, 10))
+        current_label.pack(side="left")
+        
+        self.return_scan_entry = ctk.CTkEntry(current_header, width=260,
+                                           placeholder_text="Scan a copy barcode to return it")
+        self.return_scan_entry.pack(side="right")
+        self.return_scan_entry.bind("<Return>", lambda event: self.return_by_barcode())
         
         # Create frame for treeview
         loans_tree_frame = ctk.CTkFrame(self.current_frame, fg_color="transparent")
         loans_tree_frame.pack(fill="x")
         
         # Set up treeview style
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
         
         # Create treeview for current loans
         columns = ("Title", "Author", "Borrowed Date", "Due Date", "Fine", "Action")
@@ -370,6 +405,14 @@ class BorrowedBooksApp:
         for col in columns:
             self.current_tree.heading(col, text=col)
         
+        # One delegated handler for the Action column (click, right-click, shortcuts)
+        return_action = RowAction("↩ Return", self.return_book_action, "<Return>",
+                                  enabled=lambda item: item in self.loan_ids)
+        self.loan_actions = TableActions(self.current_tree, "Action", [
+            RowAction("💳 Pay Fine", self.pay_fine_action, enabled=self.has_fine),
+            return_action
+        ], default_action=return_action)
+        
         # Add separator
         mid_separator = ctk.CTkFrame(self.main_frame, height=1, fg_color="#d1d1d1")
         mid_separator.grid(row=3, column=0, sticky="ew", pady=15)
@@ -380,7 +423,7 @@ class BorrowedBooksApp:
         
         # Loan History Label
         history_label = ctk.CTkLabel(self.history_frame, text="🔄 Borrowing History", 
-                                   font=ctk.CTkFont(size=16, weight="bold"), 
+                                   font=theme.font(size=16, weight="bold"), 
                                    anchor="w")
         history_label.pack(anchor="w", pady=(0, 10))
         
@@ -408,126 +451,93 @@ class BorrowedBooksApp:
         # Configure history column headings
         for col in history_columns:
             self.history_tree.heading(col, text=col)
+        
+        # Keyed updates: refreshes only touch rows that changed
+        self.current_sync = TableSync(self.current_tree)
+        self.history_sync = TableSync(self.history_tree)
     
+    @ui_metrics.timed()
     def load_data(self):
         """Load borrowed books and history data"""
-        # Clear existing data
-        for item in self.current_tree.get_children():
-            self.current_tree.delete(item)
-        
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-        
         # Load active loans
         loans = get_active_loans(self.user['user_id'])
         self.loan_ids = {}
+        current_rows = []
         
         for loan in loans:
             loan_date = format_date(loan['loan_date'])
             due_date = format_date(loan['due_date'])
             fine = format_currency(loan['fine_amount'])
             
-            item_id = self.current_tree.insert("", "end", values=(
+            current_rows.append((loan['loan_id'], (
                 loan['title'],
                 loan['author'],
                 loan_date,
                 due_date,
                 fine,
-                ""  # Action column will be filled with buttons
-            ))
+                ""  # Action column is filled in by the action layer
+            ), ()))
             
-            # Store loan_id for button actions
-            self.loan_ids[item_id] = loan['loan_id']
+            # Store loan_id for button actions (rows are keyed by loan_id)
+            self.loan_ids[str(loan['loan_id'])] = loan['loan_id']
         
         # No active loans message
         if not loans:
-            self.current_tree.insert("", "end", values=(
+            current_rows.append(("empty", (
                 "No active loans found",
                 "",
                 "",
                 "",
                 "",
                 ""
-            ))
+            ), ()))
         
         # Load loan history
         history = get_loan_history(self.user['user_id'])
+        history_rows = []
         
         for record in history:
             loan_date = format_date(record['loan_date'])
             return_date = format_date(record['return_date'])
             fine_paid = format_currency(record['fine_paid'])
             
-            self.history_tree.insert("", "end", values=(
+            history_rows.append((record['loan_id'], (
                 record['title'],
                 record['author'],
                 loan_date,
                 return_date,
                 fine_paid
-            ))
+            ), ()))
         
         # No history message
         if not history:
-            self.history_tree.insert("", "end", values=(
+            history_rows.append(("empty", (
                 "No borrowing history found",
                 "",
                 "",
                 "",
                 ""
-            ))
+            ), ()))
+        
+        # Apply only the inserts, updates and deletions
+        changed = self.current_sync.sync(current_rows)
+        self.history_sync.sync(history_rows)
         
-        # Add buttons to active loans
-        self.add_action_buttons()
+        # Action labels for active loans that changed
+        self.loan_actions.refresh_labels(changed)
     
-    def add_action_buttons(self):
-        """Add action buttons to the active loans table"""
-        for item in self.current_tree.get_children():
-            values = self.current_tree.item(item, 'values')
-            if values[0] == "No active loans found":
-                continue
-                
-            fine_amount = values[4]
-            has_fine = False
-            try:
-                fine_value = float(fine_amount.replace('$', ''))
-                has_fine = fine_value > 0
-            except:
-                pass
-            
-            bbox = self.current_tree.bbox(item, column="Action")
-            if bbox:
-                button_frame = ctk.CTkFrame(self.current_tree, fg_color="transparent", width=140, height=30)
-                button_frame.place(x=bbox[0] + 5, y=bbox[1])
-                
-                if has_fine:
-                    # Pay fine button
-                    pay_button = ctk.CTkButton(
-                        button_frame,
-                        text="Pay Fine",
-                        font=ctk.CTkFont(size=10),
-                        fg_color="#d9534f",
-                        hover_color="#c9302c",
-                        width=70,
-                        height=25,
-                        corner_radius=3,
-                        command=lambda i=item: self.pay_fine_action(i)
-                    )
-                    pay_button.pack(side="left", padx=(0, 5))
-                
-                # Return button
-                return_button = ctk.CTkButton(
-                    button_frame,
-                    text="Return",
-                    font=ctk.CTkFont(size=10),
-                    fg_color="#116636",
-                    hover_color="#0d4f29",
-                    width=70,
-                    height=25,
-                    corner_radius=3,
-                    command=lambda i=item: self.return_book_action(i)
-                )
-                return_button.pack(side="left")
+    def has_fine(self, tree_item):
+        """Check if an active loan row has a fine to pay"""
+        if tree_item not in self.loan_ids:
+            return False
+        
+        fine_amount = self.current_tree.item(tree_item, 'values')[4]
+        try:
+            return float(fine_amount.replace('$', '')) > 0
+        except ValueError:
+            return False
     
+    @tracing.traced()
     def return_book_action(self, tree_item):
         """Handle return book action"""
         loan_id = self.loan_ids.get(tree_item)
@@ -543,6 +553,27 @@ class BorrowedBooksApp:
             else:
                 messagebox.showerror("Error", "Failed to return book.")
     
+    @tracing.traced("return_book_action")
+    def return_by_barcode(self):
+        """Return the scanned copy; scanning it is the confirmation"""
+        barcode = self.return_scan_entry.get()
+        self.return_scan_entry.delete(0, "end")
+        if not looks_like_barcode(barcode):
+            messagebox.showwarning("Invalid Barcode", "Please scan a copy barcode.")
+            return
+        
+        loan_id = find_loan_by_barcode(clean_barcode(barcode), self.user['user_id'])
+        if not loan_id:
+            messagebox.showerror("Not Found", "You have no open loan for this copy.")
+            return
+        
+        if return_book(loan_id, self.user['user_id']):
+            messagebox.showinfo("Success", "Book returned successfully!")
+            self.load_data()  # Refresh data
+        else:
+            messagebox.showerror("Error", "Failed to return book.")
+    
+    @tracing.traced("pay_fine")
     def pay_fine_action(self, tree_item):
         """Handle pay fine action"""
         loan_id = self.loan_ids.get(tree_item)
@@ -1,14 +1,29 @@
+import profiling
 import tkinter as tk
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import mysql.connector
-import json
+import theme
+import ui_metrics
+import metrics
+import tracing
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import sessions
 import os
 from datetime import datetime
 import math
+import time
+import search_index
+from isbn import looks_like_isbn, looks_like_isbn_fragment, normalize_isbn
+from genres import get_genres
+from inventory import (
+    AVAILABLE_COPIES_SQL, HAS_AVAILABLE_COPY_SQL, TOTAL_COPIES_SQL,
+    checkout_book, checkout_by_barcode, clean_barcode, looks_like_barcode
+)
+from covers import CoverCache
 
 # ------------------- Constants -------------------
-SESSION_FILE = 'user_session.json'
+SESSION_KIND = "user"
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -16,29 +31,107 @@ DB_CONFIG = {
     "database": "library_system"
 }
 
+# Sort orders offered in the search bar
+SORT_OPTIONS = {
+    "Sort: Relevance": "relevance",
+    "Sort: Title": "title"
+}
+
 # ------------------- Database Connection -------------------
 def connect_db():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return query_log.connect(**DB_CONFIG)
     except mysql.connector.Error as err:
         print(f"Failed to connect to database: {err}")
         return None
 
 # ------------------- Session Management -------------------
 def load_session():
-    """Load user data from session file"""
-    try:
-        if os.path.exists(SESSION_FILE):
-            with open(SESSION_FILE, 'r') as f:
-                return json.load(f)
-        return None
-    except Exception as e:
-        print(f"Failed to load session: {e}")
-        return None
+    """Load user data from the active session"""
+    return sessions.current(SESSION_KIND)
+
+def clear_session():
+    """End the active session"""
+    sessions.end(SESSION_KIND)
 
 # ------------------- Book Functions -------------------
-def get_books(search_term="", category=""):
-    """Get books from database with optional search and category filters"""
+def search_filter(search_term, order_by="title", genre_id=None, decade=None):
+    """Build the WHERE fragment that matches a search term
+
+    Returns (clause, params, scored), where scored holds the unordered
+    (book_id, score) pairs when the BM25 index did the matching, already
+    within genre_id and decade, and None otherwise. Returns None when the
+    index found no matches at all.
+    """
+    isbn_key = normalize_isbn(search_term) if looks_like_isbn(search_term) else None
+    
+    if isbn_key:
+        # Scanner fast path: single point lookup on the unique index
+        return " AND b.isbn_normalized = %s", [isbn_key], None
+    
+    if looks_like_barcode(search_term):
+        # Copy barcode: resolve the book through the unique barcode index
+        clause = " AND b.book_id = (SELECT book_id FROM BookCopies WHERE barcode = %s)"
+        return clause, [clean_barcode(search_term)], None
+    
+    # Partial ISBNs are not in the index; the LIKE filter below matches them
+    if order_by == "relevance" and search_term.strip() and not looks_like_isbn_fragment(search_term):
+        scored = search_index.scored_books(connect_db, search_term, genre_id, decade)
+        return ("", [], scored) if scored else None
+    
+    if search_term:
+        clause = """ AND (
+            b.title LIKE %s OR 
+            b.author LIKE %s OR 
+            g.name LIKE %s OR
+            b.isbn LIKE %s
+        )"""
+        search_param = f"%{search_term}%"
+        return clause, [search_param, search_param, search_param, search_param], None
+    
+    return "", [], None
+
+BOOKS_SELECT = f"""
+    SELECT 
+        b.book_id, 
+        b.title, 
+        b.author, 
+        b.genre_id,
+        g.name AS genre,
+        b.publication_year,
+        {AVAILABLE_COPIES_SQL} AS available_copies,
+        {TOTAL_COPIES_SQL} AS total_copies,
+        b.isbn,
+        b.description
+    FROM 
+        Books b
+    LEFT JOIN 
+        Genres g ON g.genre_id = b.genre_id
+    WHERE 1=1
+"""
+ID_BATCH_SIZE = 1000   # ids bound per statement when checking ranked matches in SQL
+
+def get_books(search_term="", genre_id=None, order_by="title", decade=None, available_only=False):
+    """Get books from database with optional search, genre, decade and availability filters
+
+    order_by is "title" or "relevance"; relevance ranks matches with the
+    BM25 search index and falls back to title order without a search term.
+    Ranked matches come back as search_index.RankedResults, which loads
+    one page of books per slice. A valid ISBN-10 or ISBN-13 (as scanned at
+    the desk) is looked up directly on the normalized ISBN index instead.
+    """
+    search = search_filter(search_term, order_by, genre_id, decade)
+    if search is None:
+        return []
+    clause, params, scored = search
+    
+    if scored is not None:
+        # The index already applied the genre and decade; availability changes too often to index
+        if available_only:
+            available = available_book_ids([book_id for book_id, _ in scored])
+            scored = [pair for pair in scored if pair[0] in available]
+        return search_index.RankedResults(scored, get_books_by_id)
+    
     connection = connect_db()
     if not connection:
         return []
@@ -46,37 +139,18 @@ def get_books(search_term="", category=""):
     try:
         cursor = connection.cursor(dictionary=True)
         
-        query = """
-            SELECT 
-                b.book_id, 
-                b.title, 
-                b.author, 
-                b.genre,
-                b.publication_year,
-                b.available_copies,
-                b.total_copies,
-                b.isbn,
-                b.description
-            FROM 
-                Books b
-            WHERE 1=1
-        """
-        
-        params = []
-        
-        if search_term:
-            query += """ AND (
-                b.title LIKE %s OR 
-                b.author LIKE %s OR 
-                b.genre LIKE %s OR
-                b.isbn LIKE %s
-            )"""
-            search_param = f"%{search_term}%"
-            params.extend([search_param, search_param, search_param, search_param])
-        
-        if category:
-            query += " AND b.genre = %s"
-            params.append(category)
+        query = BOOKS_SELECT + clause
+        
+        if genre_id is not None:
+            query += " AND b.genre_id = %s"
+            params.append(genre_id)
+        
+        if decade is not None:
+            query += " AND b.publication_year >= %s AND b.publication_year < %s"
+            params.extend([decade, decade + 10])
+        
+        if available_only:
+            query += " AND " + HAS_AVAILABLE_COPY_SQL
         
         query += " ORDER BY b.title"
         
@@ -90,29 +164,198 @@ def get_books(search_term="", category=""):
             cursor.close()
             connection.close()
 
-def get_book_categories():
-    """Get all unique book categories/genres"""
+def get_books_by_id(book_ids):
+    """Load one page of ranked books, in any order"""
     connection = connect_db()
     if not connection:
         return []
     
+    try:
+        cursor = connection.cursor(dictionary=True)
+        placeholders = ", ".join(["%s"] * len(book_ids))
+        cursor.execute(BOOKS_SELECT + f" AND b.book_id IN ({placeholders})", list(book_ids))
+        return cursor.fetchall()
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
+        return []
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def available_book_ids(book_ids):
+    """The subset of book_ids with a copy on the shelf, checked ID_BATCH_SIZE ids at a time"""
+    available = set()
+    connection = connect_db()
+    if not connection:
+        return available
+    
+    try:
+        cursor = connection.cursor()
+        for start in range(0, len(book_ids), ID_BATCH_SIZE):
+            batch = book_ids[start:start + ID_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"SELECT b.book_id FROM Books b WHERE b.book_id IN ({placeholders}) AND {HAS_AVAILABLE_COPY_SQL}",
+                batch
+            )
+            available.update(row[0] for row in cursor.fetchall())
+        return available
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
+        return available
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Facet Functions -------------------
+FACET_CACHE_SIZE = 32
+FACET_CACHE_TTL = 30     # seconds; availability moves as other desks lend and return
+_facet_cache = {}        # search key -> (time cached, facets)
+
+def empty_facets():
+    return {
+        "total": 0,
+        "genre": {},
+        "genre_names": {},
+        "decade": {},
+        "availability": {"available": 0, "unavailable": 0}
+    }
+
+def get_search_facets(search_term="", order_by="title"):
+    """Count the current search's matches by genre, decade and availability
+
+    Title searches count with one grouped query. Relevance searches take
+    the genre and decade counts from the search index and check
+    availability in batches. Either way every match is counted, so each
+    genre's count is what clicking it lists. Results are cached per search
+    for FACET_CACHE_TTL seconds, so switching filters does not go back to
+    the database.
+    """
+    key = (search_term.strip().lower(), order_by)
+    cached = _facet_cache.get(key)
+    if cached and time.monotonic() - cached[0] < FACET_CACHE_TTL:
+        return cached[1]
+    
+    search = search_filter(search_term, order_by)
+    if search is None:
+        return cache_facets(key, empty_facets())
+    clause, params, scored = search
+    if scored is not None:
+        return cache_facets(key, index_facets([book_id for book_id, _ in scored]))
+    
+    facets = empty_facets()
+    
+    connection = connect_db()
+    if not connection:
+        return facets
+    
     try:
         cursor = connection.cursor()
         
-        cursor.execute("SELECT DISTINCT genre FROM Books ORDER BY genre")
-        
-        # Extract first element from each tuple in result
-        return [category[0] for category in cursor.fetchall()]
+        # Group on the integer genre key; names are joined onto the small
+        # grouped result rather than onto every matching book
+        cursor.execute("""
+            SELECT 
+                f.genre_id,
+                g.name,
+                f.decade,
+                f.available,
+                f.book_count
+            FROM (
+                SELECT 
+                    b.genre_id,
+                    FLOOR(b.publication_year / 10) * 10 AS decade,
+                    """ + HAS_AVAILABLE_COPY_SQL + """ AS available,
+                    COUNT(*) AS book_count
+                FROM 
+                    Books b
+                LEFT JOIN 
+                    Genres g ON g.genre_id = b.genre_id
+                WHERE 1=1
+        """ + clause + """
+                GROUP BY 
+                    b.genre_id, decade, available
+            ) f
+            LEFT JOIN 
+                Genres g ON g.genre_id = f.genre_id
+        """, params)
+        
+        for genre_id, genre_name, decade, available, count in cursor.fetchall():
+            facets["total"] += count
+            if genre_id is not None:
+                facets["genre"][genre_id] = facets["genre"].get(genre_id, 0) + count
+                facets["genre_names"][genre_id] = genre_name
+            if decade is not None:
+                facets["decade"][int(decade)] = facets["decade"].get(int(decade), 0) + count
+            facets["availability"]["available" if available else "unavailable"] += count
+        
+        return cache_facets(key, facets)
     except mysql.connector.Error as err:
         print(f"Database Error: {err}")
-        return []
+        return facets
     finally:
         if connection.is_connected():
             cursor.close()
             connection.close()
 
-def borrow_book(book_id, user_id):
-    """Borrow a book"""
+def index_facets(book_ids):
+    """Facets of a relevance search's matches, without binding them all in one statement"""
+    facets = empty_facets()
+    facets["total"] = len(book_ids)
+    genres, decades = search_index.facet_counts(connect_db, book_ids)
+    facets["genre"] = dict(genres)
+    facets["decade"] = dict(decades)
+    
+    available = len(available_book_ids(book_ids))
+    facets["availability"] = {"available": available, "unavailable": len(book_ids) - available}
+    
+    connection = connect_db()
+    if not connection:
+        return facets
+    
+    try:
+        facets["genre_names"] = {
+            genre_id: name for genre_id, name in get_genres(connection) if genre_id in genres
+        }
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
+    finally:
+        if connection.is_connected():
+            connection.close()
+    return facets
+
+def cache_facets(key, facets):
+    # Bounded cache: drop the oldest search once full
+    _facet_cache.pop(key, None)
+    if len(_facet_cache) >= FACET_CACHE_SIZE:
+        del _facet_cache[next(iter(_facet_cache))]
+    _facet_cache[key] = (time.monotonic(), facets)
+    return facets
+
+def clear_facet_cache():
+    """Forget cached facet counts (availability changes after a borrow)"""
+    _facet_cache.clear()
+
+def get_book_categories():
+    """Get all book categories/genres as (genre_id, name) pairs"""
+    connection = connect_db()
+    if not connection:
+        return []
+    
+    try:
+        return get_genres(connection)
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
+        return []
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+@metrics.counted(metrics.BORROWS)
+def borrow_book(book_id, user_id, barcode=None):
+    """Borrow a book; with a scanned barcode, that copy is the one lent"""
     connection = connect_db()
     if not connection:
         return False, "Database connection failed"
@@ -128,23 +371,14 @@ def borrow_book(book_id, user_id):
         if cursor.fetchone()[0] > 0:
             return False, "You already have this book borrowed"
         
-        # Check if book has available copies
-        cursor.execute("SELECT available_copies FROM Books WHERE book_id = %s", (book_id,))
-        result = cursor.fetchone()
+        # Lend the scanned copy, or claim any available one (due 14 days from now)
+        if barcode:
+            loan_id, message = checkout_by_barcode(cursor, barcode, user_id, book_id)
+            if loan_id:
+                connection.commit()
+            return loan_id is not None, message
         
-        if result and result[0] > 0:
-            # Create loan record with due date 14 days from now
-            cursor.execute(
-                "INSERT INTO Loans (user_id, book_id, loan_date, due_date) VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 14 DAY))", 
-                (user_id, book_id)
-            )
-            
-            # Decrement available copies
-            cursor.execute(
-                "UPDATE Books SET available_copies = available_copies - 1 WHERE book_id = %s", 
-                (book_id,)
-            )
-            
+        if checkout_book(cursor, book_id, user_id):
             connection.commit()
             return True, "Book borrowed successfully"
         else:
@@ -183,6 +417,9 @@ def is_book_borrowed_by_user(book_id, user_id):
 class LibraryBrowseApp:
     def __init__(self, root):
         self.root = root
+        theme.use_root(root)
+        ui_metrics.install(root, "browse")
+        profiling.install(self, "browse")
         self.root.title("Library Management System - Browse Books")
         self.root.geometry("1300x700")
         
@@ -196,18 +433,31 @@ class LibraryBrowseApp:
             print("No active user session found.")
             self.logout()
             return
+        sessions.watch(self.root, SESSION_KIND, self.logout)
+        
+        # Cover thumbnails load in the background; cards show a placeholder until then
+        self.covers = CoverCache(self.root)
         
         # Initialize variables
         self.current_page = 0
         self.books_per_page = 6
         self.current_search = ""
-        self.current_category = ""
+        self.current_category = None  # genre_id, None for all
+        self.current_category_name = ""
+        self.current_order = "relevance"
+        self.current_decade = None
+        self.available_only = False
         self.all_books = []
         
         # Create main frame layout
         self.create_layout()
         
-        # Load initial books
+        # Facets and books load once the shell is on screen
+        fast_start.after_first_paint(self.root, self.load_start)
+    
+    def load_start(self):
+        """Fill in the facets and the first page of books"""
+        self.create_category_buttons()
         self.load_books()
     
     def create_layout(self):
@@ -236,7 +486,7 @@ class LibraryBrowseApp:
         library_label = ctk.CTkLabel(
             self.sidebar, 
             text="📚 Library System", 
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=theme.font(size=20, weight="bold"),
             text_color="white"
         )
         library_label.pack(anchor="w", padx=20, pady=(20, 5))
@@ -245,7 +495,7 @@ class LibraryBrowseApp:
         user_welcome = ctk.CTkLabel(
             self.sidebar,
             text=f"Welcome,\n{self.user['first_name']} {self.user['last_name']}",
-            font=ctk.CTkFont(size=12, weight="bold"),
+            font=theme.font(size=12, weight="bold"),
             text_color="white"
         )
         user_welcome.pack(anchor="w", padx=20, pady=(0, 20))
@@ -270,7 +520,7 @@ class LibraryBrowseApp:
                     self.sidebar,
                     text=text,
                     anchor="w",
-                    font=ctk.CTkFont(size=14),
+                    font=theme.font(size=14),
                     fg_color="#0d4f29",  # Highlight color
                     text_color="white",
                     hover_color="#0d4f29",
@@ -281,7 +531,7 @@ class LibraryBrowseApp:
                     self.sidebar,
                     text=text,
                     anchor="w",
-                    font=ctk.CTkFont(size=14),
+                    font=theme.font(size=14),
                     fg_color="transparent",
                     text_color="white",
                     hover_color="#0d4f29",
@@ -298,7 +548,7 @@ class LibraryBrowseApp:
             self.sidebar,
             text="🚪 Logout",
             anchor="w",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="transparent",
             text_color="white",
             hover_color="#0d4f29",
@@ -312,7 +562,7 @@ class LibraryBrowseApp:
         self.title_label = ctk.CTkLabel(
             self.content, 
             text="Browse Books",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         self.title_label.pack(anchor="w", padx=30, pady=(20, 20))
@@ -327,7 +577,7 @@ class LibraryBrowseApp:
             width=600,
             height=40,
             placeholder_text="Search by title, author, genre, or ISBN",
-            font=ctk.CTkFont(size=14)
+            font=theme.font(size=14)
         )
         self.search_entry.pack(side="left")
         
@@ -337,7 +587,7 @@ class LibraryBrowseApp:
         search_button = ctk.CTkButton(
             search_frame,
             text="🔍 Search",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#116636",
             hover_color="#0d4f29",
             width=120,
@@ -346,21 +596,37 @@ class LibraryBrowseApp:
         )
         search_button.pack(side="left", padx=(10, 0))
         
+        # Result ordering
+        self.sort_menu = ctk.CTkOptionMenu(
+            search_frame,
+            values=list(SORT_OPTIONS),
+            font=theme.font(size=14),
+            fg_color="#116636",
+            button_color="#0d4f29",
+            button_hover_color="#0d4f29",
+            width=160,
+            height=40,
+            command=self.change_order
+        )
+        self.sort_menu.set("Sort: Relevance")
+        self.sort_menu.pack(side="left", padx=(10, 0))
+        
         # Categories Label
         categories_label = ctk.CTkLabel(
             self.content,
             text="Categories:",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         categories_label.pack(anchor="w", padx=30, pady=(10, 5))
         
         # Categories Buttons Frame
         self.categories_frame = ctk.CTkFrame(self.content, fg_color="transparent")
-        self.categories_frame.pack(fill="x", padx=30, pady=(0, 20))
+        self.categories_frame.pack(fill="x", padx=30, pady=(0, 10))
         
-        # Create category buttons
-        self.create_category_buttons()
+        # Decade and availability facets
+        self.facets_frame = ctk.CTkFrame(self.content, fg_color="transparent")
+        self.facets_frame.pack(fill="x", padx=30, pady=(0, 20))
         
         # Frame for result info and pagination
         self.results_frame = ctk.CTkFrame(self.content, fg_color="transparent")
@@ -370,7 +636,7 @@ class LibraryBrowseApp:
         self.results_info = ctk.CTkLabel(
             self.results_frame,
             text="Showing all books",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             anchor="w"
         )
         self.results_info.pack(side="left")
@@ -384,43 +650,100 @@ class LibraryBrowseApp:
         self.books_frame.pack(fill="both", expand=True, padx=30, pady=(0, 20))
     
     def create_category_buttons(self):
-        """Create category filter buttons"""
+        """Create category filter buttons and facet selectors with match counts"""
         # Clear existing buttons
         for widget in self.categories_frame.winfo_children():
             widget.destroy()
+        for widget in self.facets_frame.winfo_children():
+            widget.destroy()
+        
+        # Counts for the current search (cached per search term)
+        facets = get_search_facets(self.current_search, self.current_order)
         
         # Add "All" category button
         all_btn = ctk.CTkButton(
             self.categories_frame,
-            text="All",
-            font=ctk.CTkFont(size=12),
-            fg_color="#116636" if self.current_category == "" else "#C5E1A5",
-            text_color="white" if self.current_category == "" else "#333333",
-            hover_color="#0d4f29" if self.current_category == "" else "#A5D6A7",
+            text=f"All ({facets['total']:,})",
+            font=theme.font(size=12),
+            fg_color="#116636" if self.current_category is None else "#C5E1A5",
+            text_color="white" if self.current_category is None else "#333333",
+            hover_color="#0d4f29" if self.current_category is None else "#A5D6A7",
             width=100,
             height=30,
             corner_radius=15,
-            command=lambda: self.filter_by_category("")
+            command=lambda: self.filter_by_category(None)
         )
         all_btn.pack(side="left", padx=(0, 5))
         
-        # Get categories from database
-        categories = get_book_categories()
+        # Genres present in the current search, keeping the active one visible
+        genre_counts = dict(facets["genre"])
+        genre_names = dict(facets["genre_names"])
+        if self.current_category is not None:
+            genre_counts.setdefault(self.current_category, 0)
+            genre_names.setdefault(self.current_category, self.current_category_name)
         
-        for category in categories:
+        for category in sorted(genre_counts, key=lambda g: genre_names[g]):
             cat_button = ctk.CTkButton(
                 self.categories_frame,
-                text=category,
-                font=ctk.CTkFont(size=12),
+                text=f"{genre_names[category]} ({genre_counts[category]:,})",
+                font=theme.font(size=12),
                 fg_color="#116636" if self.current_category == category else "#C5E1A5",
                 text_color="white" if self.current_category == category else "#333333",
                 hover_color="#0d4f29" if self.current_category == category else "#A5D6A7",
                 width=100,
                 height=30,
                 corner_radius=15,
-                command=lambda cat=category: self.filter_by_category(cat)
+                command=lambda cat=category, name=genre_names[category]: self.filter_by_category(cat, name)
             )
             cat_button.pack(side="left", padx=(0, 5))
+        
+        # Decade facet
+        decade_label = ctk.CTkLabel(
+            self.facets_frame,
+            text="Decade:",
+            font=theme.font(size=14, weight="bold")
+        )
+        decade_label.pack(side="left", padx=(0, 5))
+        
+        self.decade_choices = {"Any decade": None}
+        for decade in sorted(facets["decade"], reverse=True):
+            self.decade_choices[f"{decade}s ({facets['decade'][decade]:,})"] = decade
+        
+        decade_menu = ctk.CTkOptionMenu(
+            self.facets_frame,
+            values=list(self.decade_choices),
+            font=theme.font(size=12),
+            fg_color="#116636",
+            button_color="#0d4f29",
+            button_hover_color="#0d4f29",
+            width=150,
+            height=30,
+            command=self.filter_by_decade
+        )
+        for label, decade in self.decade_choices.items():
+            if decade == self.current_decade:
+                decade_menu.set(label)
+                break
+        decade_menu.pack(side="left", padx=(0, 20))
+        
+        # Availability facet
+        availability = facets["availability"]
+        self.availability_choices = {
+            f"Any status ({facets['total']:,})": False,
+            f"Available now ({availability['available']:,})": True
+        }
+        
+        availability_toggle = ctk.CTkSegmentedButton(
+            self.facets_frame,
+            values=list(self.availability_choices),
+            font=theme.font(size=12),
+            selected_color="#116636",
+            selected_hover_color="#0d4f29",
+            height=30,
+            command=self.filter_by_availability
+        )
+        availability_toggle.set(list(self.availability_choices)[1 if self.available_only else 0])
+        availability_toggle.pack(side="left")
     
     def create_pagination(self):
         """Create pagination controls"""
@@ -438,7 +761,7 @@ class LibraryBrowseApp:
             prev_btn = ctk.CTkButton(
                 self.pagination_frame,
                 text="< Prev",
-                font=ctk.CTkFont(size=12),
+                font=theme.font(size=12),
                 fg_color="#116636" if self.current_page > 0 else "#cccccc",
                 text_color="white" if self.current_page > 0 else "#777777",
                 hover_color="#0d4f29" if self.current_page > 0 else "#cccccc",
@@ -454,7 +777,7 @@ class LibraryBrowseApp:
             page_label = ctk.CTkLabel(
                 self.pagination_frame,
                 text=f"Page {self.current_page + 1} of {total_pages}",
-                font=ctk.CTkFont(size=12),
+                font=theme.font(size=12),
                 width=120,
                 anchor="center"
             )
@@ -464,7 +787,7 @@ class LibraryBrowseApp:
             next_btn = ctk.CTkButton(
                 self.pagination_frame,
                 text="Next >",
-                font=ctk.CTkFont(size=12),
+                font=theme.font(size=12),
                 fg_color="#116636" if self.current_page < total_pages - 1 else "#cccccc",
                 text_color="white" if self.current_page < total_pages - 1 else "#777777",
                 hover_color="#0d4f29" if self.current_page < total_pages - 1 else "#cccccc",
@@ -479,7 +802,13 @@ class LibraryBrowseApp:
     def load_books(self):
         """Load books from database with current filters"""
         # Get books with current search and category
-        self.all_books = get_books(self.current_search, self.current_category)
+        self.all_books = get_books(
+            self.current_search,
+            self.current_category,
+            self.current_order,
+            decade=self.current_decade,
+            available_only=self.available_only
+        )
         
         # Update results info
         self.update_results_info()
@@ -490,6 +819,7 @@ class LibraryBrowseApp:
         # Display current page of books
         self.display_books()
     
+    @ui_metrics.timed()
     def display_books(self):
         """Display the current page of books"""
         # Clear current book display
@@ -538,17 +868,22 @@ class LibraryBrowseApp:
         title_label = ctk.CTkLabel(
             book_card,
             text=book["title"],
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w",
             text_color="#000000"
         )
         title_label.place(x=15, y=15)
         
+        # Cover thumbnail
+        cover_label = tk.Label(book_card, bg="white", borderwidth=0)
+        cover_label.place(x=275, y=15)
+        self.covers.show(cover_label, book["isbn"])
+        
         # Author
         author_label = ctk.CTkLabel(
             book_card,
             text=f"Author: {book['author']}",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             anchor="w",
             text_color="#444444"
         )
@@ -558,7 +893,7 @@ class LibraryBrowseApp:
         genre_label = ctk.CTkLabel(
             book_card,
             text=f"Genre: {book['genre']}",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             anchor="w",
             text_color="#444444"
         )
@@ -568,7 +903,7 @@ class LibraryBrowseApp:
         year_label = ctk.CTkLabel(
             book_card,
             text=f"Year: {book['publication_year']}",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             anchor="w",
             text_color="#444444"
         )
@@ -579,7 +914,7 @@ class LibraryBrowseApp:
         status_label = ctk.CTkLabel(
             book_card,
             text=status_text,
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             anchor="w",
             text_color="#444444"
         )
@@ -602,7 +937,7 @@ class LibraryBrowseApp:
         status_indicator = ctk.CTkLabel(
             book_card,
             text=status,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             text_color=status_color
         )
         status_indicator.place(x=70, y=135)
@@ -612,7 +947,7 @@ class LibraryBrowseApp:
         copies_label = ctk.CTkLabel(
             book_card,
             text=copies_text,
-            font=ctk.CTkFont(size=12),
+            font=theme.font(size=12),
             text_color="#777777"
         )
         copies_label.place(x=200, y=135)
@@ -623,7 +958,7 @@ class LibraryBrowseApp:
             action_button = ctk.CTkButton(
                 book_card,
                 text="✓ Borrowed",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#8bc34a",  # Light green
                 text_color="white",
                 hover_color="#7cb342",
@@ -637,7 +972,7 @@ class LibraryBrowseApp:
             action_button = ctk.CTkButton(
                 book_card,
                 text="Borrow Book",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#116636",
                 hover_color="#0d4f29",
                 width=120,
@@ -650,7 +985,7 @@ class LibraryBrowseApp:
             action_button = ctk.CTkButton(
                 book_card,
                 text="Unavailable",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#cccccc",
                 text_color="#777777",
                 hover_color="#bbbbbb",
@@ -666,7 +1001,7 @@ class LibraryBrowseApp:
         details_button = ctk.CTkButton(
             book_card,
             text="View Details",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#f0f0f0",
             text_color="#116636",
             hover_color="#e0e0e0",
@@ -681,31 +1016,57 @@ class LibraryBrowseApp:
         """Update the results info text"""
         total_books = len(self.all_books)
         
-        if self.current_search and self.current_category:
-            self.results_info.configure(text=f"Found {total_books} books matching '{self.current_search}' in category '{self.current_category}'")
+        if self.current_search and self.current_category is not None:
+            self.results_info.configure(text=f"Found {total_books} books matching '{self.current_search}' in category '{self.current_category_name}'")
         elif self.current_search:
             self.results_info.configure(text=f"Found {total_books} books matching '{self.current_search}'")
-        elif self.current_category:
-            self.results_info.configure(text=f"Showing {total_books} books in category '{self.current_category}'")
+        elif self.current_category is not None:
+            self.results_info.configure(text=f"Showing {total_books} books in category '{self.current_category_name}'")
         else:
             self.results_info.configure(text=f"Showing all {total_books} books")
     
     # ------------------- Action Functions -------------------
+    @tracing.traced("perform_search")
     def search_books(self):
         """Search for books with the current search term"""
         self.current_page = 0  # Reset to first page
         self.current_search = self.search_entry.get()
         self.load_books()
+        if self.current_search.strip():
+            metrics.SEARCHES.inc("ok" if self.all_books else "empty")
+        
+        # Facet counts follow the search
+        self.create_category_buttons()
+    
+    def change_order(self, choice):
+        """Re-run the current search with a different result ordering"""
+        self.current_page = 0  # Reset to first page
+        self.current_order = SORT_OPTIONS[choice]
+        self.load_books()
+        self.create_category_buttons()
     
-    def filter_by_category(self, category):
+    def filter_by_category(self, genre_id, name=""):
         """Filter books by category"""
         self.current_page = 0  # Reset to first page
-        self.current_category = category
+        self.current_category = genre_id
+        self.current_category_name = name
         self.load_books()
         
         # Refresh category buttons to show the active one
         self.create_category_buttons()
     
+    def filter_by_decade(self, choice):
+        """Filter books by publication decade"""
+        self.current_page = 0  # Reset to first page
+        self.current_decade = self.decade_choices.get(choice)
+        self.load_books()
+    
+    def filter_by_availability(self, choice):
+        """Show only books with copies on the shelf, or all books"""
+        self.current_page = 0  # Reset to first page
+        self.available_only = self.availability_choices.get(choice, False)
+        self.load_books()
+    
     def next_page(self):
         """Go to next page of books"""
         total_pages = math.ceil(len(self.all_books) / self.books_per_page)
@@ -721,9 +1082,12 @@ class LibraryBrowseApp:
             self.create_pagination()
             self.display_books()
     
+    @tracing.traced()
     def borrow_book_action(self, book_id):
         """Handle the borrow book action"""
-        success, message = borrow_book(book_id, self.user["user_id"])
+        # A search by copy barcode lends that copy
+        barcode = clean_barcode(self.current_search) if looks_like_barcode(self.current_search) else None
+        success, message = borrow_book(book_id, self.user["user_id"], barcode)
         
         if success:
             # Show success message
@@ -745,14 +1109,14 @@ class LibraryBrowseApp:
             label = ctk.CTkLabel(
                 frame, 
                 text=message,
-                font=ctk.CTkFont(size=14)
+                font=theme.font(size=14)
             )
             label.pack(pady=(10, 20))
             
             ok_button = ctk.CTkButton(
                 frame,
                 text="OK",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#116636",
                 hover_color="#0d4f29",
                 command=lambda: [messagebox.destroy(), self.refresh_page()]
@@ -782,7 +1146,7 @@ class LibraryBrowseApp:
             label = ctk.CTkLabel(
                 frame, 
                 text=message,
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 text_color="#d9534f"
             )
             label.pack(pady=(10, 20))
@@ -790,7 +1154,7 @@ class LibraryBrowseApp:
             ok_button = ctk.CTkButton(
                 frame,
                 text="OK",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#116636",
                 hover_color="#0d4f29",
                 command=messagebox.destroy
@@ -823,7 +1187,7 @@ class LibraryBrowseApp:
         title_label = ctk.CTkLabel(
             details_frame,
             text=book["title"],
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=theme.font(size=20, weight="bold"),
             anchor="w"
         )
         title_label.pack(anchor="w", pady=(0, 10))
@@ -845,7 +1209,7 @@ class LibraryBrowseApp:
             label = ctk.CTkLabel(
                 info_frame,
                 text=label_text,
-                font=ctk.CTkFont(size=14, weight="bold"),
+                font=theme.font(size=14, weight="bold"),
                 width=150,
                 anchor="e"
             )
@@ -854,7 +1218,7 @@ class LibraryBrowseApp:
             value_label = ctk.CTkLabel(
                 info_frame,
                 text=value,
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 anchor="w"
             )
             value_label.grid(row=i, column=1, sticky="w", padx=10, pady=5)
@@ -863,7 +1227,7 @@ class LibraryBrowseApp:
         desc_label = ctk.CTkLabel(
             details_frame,
             text="Description:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             anchor="w"
         )
         desc_label.pack(anchor="w", pady=(10, 5))
@@ -874,7 +1238,7 @@ class LibraryBrowseApp:
         
         desc_text = ctk.CTkTextbox(
             details_frame,
-            font=ctk.CTkFont(size=12),
+            font=theme.font(size=12),
             width=560,
             height=120,
             fg_color="#f5f5f5",
@@ -897,7 +1261,7 @@ class LibraryBrowseApp:
         close_button = ctk.CTkButton(
             button_frame,
             text="Close",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#f0f0f0",
             text_color="#333333",
             hover_color="#e0e0e0",
@@ -913,7 +1277,7 @@ class LibraryBrowseApp:
             status_button = ctk.CTkButton(
                 button_frame,
                 text="✓ Already Borrowed",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#8bc34a",
                 text_color="white",
                 hover_color="#8bc34a",
@@ -926,7 +1290,7 @@ class LibraryBrowseApp:
             status_button = ctk.CTkButton(
                 button_frame,
                 text="Borrow This Book",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#116636",
                 hover_color="#0d4f29",
                 width=150,
@@ -938,7 +1302,7 @@ class LibraryBrowseApp:
             status_button = ctk.CTkButton(
                 button_frame,
                 text="Unavailable",
-                font=ctk.CTkFont(size=14),
+                font=theme.font(size=14),
                 fg_color="#cccccc",
                 text_color="#777777",
                 hover_color="#cccccc",
@@ -952,7 +1316,10 @@ class LibraryBrowseApp:
     
     def refresh_page(self):
         """Refresh the current page"""
+        # A borrow may have changed availability counts
+        clear_facet_cache()
         self.load_books()
+        self.create_category_buttons()
     
     def open_dashboard(self):
         """Open the dashboard page"""
@@ -980,9 +1347,8 @@ class LibraryBrowseApp:
     def logout(self):
         """Logout and return to login page"""
         try:
-            # Clear the session if it exists
-            if os.path.exists(SESSION_FILE):
-                os.remove(SESSION_FILE)
+            # Clear the session
+            clear_session()
             
             # Close current window
             self.root.destroy()
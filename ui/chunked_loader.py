@@ -0,0 +1,145 @@
+import time
+
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+
+# ------------------- Constants -------------------
+CHUNK_SIZE = 200        # rows per fetchmany() call
+TIME_SLICE_MS = 15      # work per tick before yielding to the event loop
+
+# ------------------- Chunked Loader -------------------
+class ChunkedLoader:
+    """Stream a query's rows into the UI without blocking the event loop
+
+    Rows are read from an unbuffered (server-side) cursor with fetchmany()
+    and handed to on_rows in chunks. Each tick of work is limited to a time
+    slice, after which the loader reschedules itself with root.after so the
+    window keeps repainting and handling input. The load is aborted when
+    abort() is called or when the owner widget is destroyed (for example when
+    the user navigates to another page).
+
+    on_rows(rows) receives each chunk, on_progress(loaded, total) is called
+    after each tick (total is None without a count query), and on_done(loaded)
+    once every row has been delivered. on_error(err) receives database errors.
+    """
+
+    def __init__(self, root, connect, query, params=(), count_query=None,
+                 on_rows=None, on_progress=None, on_done=None, on_error=None,
+                 owner=None, chunk_size=CHUNK_SIZE, time_slice_ms=TIME_SLICE_MS):
+        self.root = root
+        self.connect = connect
+        self.query = query
+        self.params = params
+        self.count_query = count_query
+        self.on_rows = on_rows
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.owner = owner
+        self.chunk_size = chunk_size
+        self.time_slice = time_slice_ms / 1000
+
+        self.connection = None
+        self.cursor = None
+        self.after_id = None
+        self.loaded = 0
+        self.total = None
+        self.running = False
+
+        if owner is not None:
+            owner.bind("<Destroy>", lambda event: self.abort() if event.widget is owner else None, add="+")
+
+    def start(self):
+        """Open the cursor and schedule the first chunk"""
+        self.connection = self.connect()
+        if not self.connection:
+            return False
+
+        try:
+            if self.count_query:
+                count_cursor = self.connection.cursor()
+                count_cursor.execute(self.count_query, self.params)
+                self.total = count_cursor.fetchone()[0]
+                count_cursor.close()
+
+            # Unbuffered: rows stay on the server until fetchmany() asks for them
+            self.cursor = self.connection.cursor(dictionary=True, buffered=False)
+            self.cursor.execute(self.query, self.params)
+        except mysql.connector.Error as err:
+            self.close()
+            if self.on_error:
+                self.on_error(err)
+            return False
+
+        self.running = True
+        self.after_id = self.root.after(0, self.tick)
+        return True
+
+    def tick(self):
+        """Deliver chunks until the time slice is used up, then yield"""
+        self.after_id = None
+        if not self.running:
+            return
+        if self.owner is not None and not self.owner.winfo_exists():
+            self.abort()
+            return
+
+        deadline = time.perf_counter() + self.time_slice
+        try:
+            while True:
+                rows = self.cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    self.finish()
+                    return
+
+                self.loaded += len(rows)
+                if self.on_rows:
+                    self.on_rows(rows)
+
+                if time.perf_counter() >= deadline:
+                    break
+        except mysql.connector.Error as err:
+            self.abort()
+            if self.on_error:
+                self.on_error(err)
+            return
+
+        if self.on_progress:
+            self.on_progress(self.loaded, self.total)
+        self.after_id = self.root.after(1, self.tick)
+
+    def finish(self):
+        self.running = False
+        self.close(complete=True)
+        if self.on_progress:
+            self.on_progress(self.loaded, self.loaded)
+        if self.on_done:
+            self.on_done(self.loaded)
+
+    def abort(self):
+        """Stop loading and release the connection"""
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception:
+                pass
+            self.after_id = None
+        self.running = False
+        self.close()
+
+    def close(self, complete=False):
+        if self.connection is None:
+            return
+        try:
+            if complete:
+                self.cursor.close()
+                self.connection.close()
+            else:
+                # An unbuffered cursor with unread rows cannot be closed
+                # normally; drop the socket instead of draining the rows
+                getattr(self.connection, "shutdown", self.connection.close)()
+        except Exception:
+            pass
+        finally:
+            self.cursor = None
+            self.connection = None
@@ -0,0 +1,339 @@
+import io
+import os
+import queue
+import threading
+import urllib.request
+from collections import OrderedDict
+
+import fast_start
+from isbn import clean_isbn, normalize_isbn
+
+Image = fast_start.lazy_module("PIL.Image")
+ImageDraw = fast_start.lazy_module("PIL.ImageDraw")
+ImageTk = fast_start.lazy_module("PIL.ImageTk")
+
+# ------------------- Constants -------------------
+COVERS_DIR = os.environ.get("LIBRARY_COVERS_DIR", "covers")          # original cover images, named by ISBN
+CACHE_DIR = os.environ.get("LIBRARY_COVER_CACHE", ".cover_cache")    # resized thumbnails
+COVER_URL = os.environ.get("LIBRARY_COVER_URL", "")                  # e.g. https://covers.openlibrary.org/b/isbn/{isbn}-M.jpg
+
+COVER_EXTENSIONS = (".jpg", ".jpeg", ".png")
+THUMBNAIL_SIZE = (60, 90)
+MEMORY_BUDGET = 16 * 1024 * 1024   # bytes of decoded thumbnails kept in memory
+DISK_BUDGET = int(os.environ.get("LIBRARY_COVER_CACHE_BYTES", str(64 * 1024 * 1024)))   # bytes of thumbnails on disk
+PRUNE_EVERY = 50                   # thumbnails written between disk cache checks
+WORKERS = 4
+POLL_MS = 30
+FETCH_TIMEOUT = 5
+
+PLACEHOLDER_COLOR = "#e6f4e6"
+PLACEHOLDER_BORDER = "#116636"
+
+# ------------------- Disk Cache -------------------
+def cover_key(isbn):
+    """Cache key for a book: its ISBN-13, or the cleaned ISBN as entered"""
+    if not isbn:
+        return None
+    return normalize_isbn(isbn) or clean_isbn(isbn) or None
+
+def thumbnail_path(key, size):
+    return os.path.join(CACHE_DIR, f"{key}_{size[0]}x{size[1]}.png")
+
+_written = 0
+_prune_lock = threading.Lock()
+
+def touch(path):
+    """Mark a cached thumbnail as recently used; the mtime orders the disk LRU"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def cached_thumbnail(path):
+    """A thumbnail from the disk cache, or None if it is not there"""
+    try:
+        with Image.open(path) as image:
+            image.load()
+    except FileNotFoundError:
+        return None
+    touch(path)
+    return image
+
+def save_thumbnail(image, path):
+    """Write a thumbnail to the disk cache, pruning it every PRUNE_EVERY writes"""
+    global _written
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temporary name first so a half-written file is never read
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    image.save(temp_path, "PNG")
+    os.replace(temp_path, path)
+    with _prune_lock:
+        _written += 1
+        due = _written % PRUNE_EVERY == 0
+    if due:
+        prune_disk_cache()
+
+def prune_disk_cache(budget=DISK_BUDGET):
+    """Delete the least recently used thumbnails until the disk cache fits the budget"""
+    with _prune_lock:
+        try:
+            entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(".png")]
+        except OSError:
+            return
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue   # removed by another screen
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        used = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if used <= budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            used -= size
+
+def find_source(key, isbn):
+    """Path of the original cover image in COVERS_DIR, or None"""
+    for name in {key, clean_isbn(isbn)}:
+        for ext in COVER_EXTENSIONS:
+            path = os.path.join(COVERS_DIR, name + ext)
+            if os.path.exists(path):
+                return path
+    return None
+
+def fetch_source(key):
+    """Download the original cover when LIBRARY_COVER_URL is set; returns a path or None"""
+    if not COVER_URL:
+        return None
+    os.makedirs(COVERS_DIR, exist_ok=True)
+    path = os.path.join(COVERS_DIR, key + ".jpg")
+    try:
+        with urllib.request.urlopen(COVER_URL.format(isbn=key), timeout=FETCH_TIMEOUT) as response:
+            data = response.read()
+    except Exception:
+        return None
+    if not data or not is_image(data):
+        return None   # an error page or a truncated body is never cached
+    
+    # Write to a temporary name first so a half-written file is never read
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return path
+
+def is_image(data):
+    """Check that downloaded bytes are a complete image PIL can read"""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+
+def make_thumbnail(source, size):
+    """Decode an image and shrink it to fit size"""
+    with Image.open(source) as image:
+        image.draft("RGB", size)   # lets JPEG decode at a reduced scale
+        image = image.convert("RGB")
+        image.thumbnail(size, Image.LANCZOS)
+    return image
+
+def load_thumbnail(key, isbn, size):
+    """Return the thumbnail for a cover, building and caching it on disk if needed
+
+    Runs on a worker thread. Returns None when the book has no cover.
+    """
+    path = thumbnail_path(key, size)
+    image = cached_thumbnail(path)
+    if image is not None:
+        return image
+
+    source = find_source(key, isbn) or fetch_source(key)
+    if not source:
+        return None
+
+    try:
+        image = make_thumbnail(source, size)
+    except OSError:
+        return None
+
+    save_thumbnail(image, path)
+    return image
+
+def load_resized(path, size):
+    """Return a resized copy of a local image, reusing a cached resize from disk"""
+    stat = os.stat(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(CACHE_DIR, f"{name}_{int(stat.st_mtime)}_{size[0]}x{size[1]}.png")
+
+    image = cached_thumbnail(cached)
+    if image is not None:
+        return image
+
+    with Image.open(path) as image:
+        image = image.resize(size)
+    try:
+        save_thumbnail(image, cached)
+    except OSError:
+        pass
+    return image
+
+# ------------------- Cover Cache -------------------
+class CoverCache:
+    """Thumbnails for book cards, loaded off the UI thread
+
+    get() answers immediately: with the cached PhotoImage when there is one,
+    otherwise with a placeholder while a worker decodes (or reads from the
+    disk cache) the cover. PhotoImages are created on the Tk thread when the
+    worker is done, and kept in an LRU bounded by MEMORY_BUDGET bytes. The
+    thumbnails on disk form a second LRU, ordered by mtime and pruned to
+    DISK_BUDGET bytes.
+
+    Workers are daemon threads, so a slow download never holds up exit, and
+    the cache closes itself when its window is destroyed.
+    """
+
+    def __init__(self, root, size=THUMBNAIL_SIZE, budget=MEMORY_BUDGET, workers=WORKERS):
+        self.root = root
+        self.size = size
+        self.budget = budget
+        self.workers = workers
+        self.jobs = queue.Queue()
+        self.done = queue.Queue()
+        self.closed = False
+        for number in range(workers):
+            threading.Thread(target=self.work, name=f"covers-{number}", daemon=True).start()
+        # Thumbnails left by earlier runs count against the disk budget too
+        threading.Thread(target=prune_disk_cache, name="covers-prune", daemon=True).start()
+        root.bind("<Destroy>", self.on_destroy, add="+")
+
+        self.images = OrderedDict()   # key -> PhotoImage
+        self.sizes = {}               # key -> decoded size in bytes
+        self.used = 0
+        self.missing = set()          # keys known to have no cover
+        self.waiting = {}             # key -> callbacks for a cover being loaded
+        self.polling = False
+        self._placeholder = None
+
+    @property
+    def placeholder(self):
+        """Created on first use, so building the cache does not load PIL"""
+        if self._placeholder is None:
+            self._placeholder = ImageTk.PhotoImage(self.make_placeholder(), master=self.root)
+        return self._placeholder
+
+    def make_placeholder(self):
+        width, height = self.size
+        image = Image.new("RGB", self.size, PLACEHOLDER_COLOR)
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, 0, width - 1, height - 1), outline=PLACEHOLDER_BORDER)
+        # A simple closed-book outline
+        draw.rectangle((width // 4, height // 4, width * 3 // 4, height * 3 // 4), outline=PLACEHOLDER_BORDER)
+        draw.line((width // 4 + 4, height // 4, width // 4 + 4, height * 3 // 4), fill=PLACEHOLDER_BORDER)
+        return image
+
+    def get(self, isbn, on_ready=None):
+        """Return the cover PhotoImage for an ISBN, or the placeholder
+
+        When the placeholder is returned for a cover that is still loading,
+        on_ready(photo) is called on the Tk thread once it is available.
+        """
+        key = cover_key(isbn)
+        if key is None or key in self.missing or self.closed:
+            return self.placeholder
+
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+
+        if key in self.waiting:
+            if on_ready:
+                self.waiting[key].append(on_ready)
+        else:
+            self.waiting[key] = [on_ready] if on_ready else []
+            self.jobs.put((key, isbn))
+            self.start_polling()
+
+        return self.placeholder
+
+    def show(self, label, isbn):
+        """Show a cover in a label, swapping in the image when it has loaded"""
+        def update(photo):
+            if label.winfo_exists():
+                label.configure(image=photo)
+                label.image = photo
+
+        photo = self.get(isbn, update)
+        label.configure(image=photo)
+        label.image = photo  # Keep a reference to avoid garbage collection
+
+    # ------------------- Workers -------------------
+    def work(self):
+        """Load queued covers until the cache is closed"""
+        while True:
+            job = self.jobs.get()
+            if job is None or self.closed:
+                return
+            key, isbn = job
+            try:
+                image = load_thumbnail(key, isbn, self.size)
+            except Exception:
+                image = None
+            self.done.put((key, image))
+
+    # ------------------- Tk Thread -------------------
+    def start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self.poll)
+
+    def poll(self):
+        """Turn finished thumbnails into PhotoImages and notify waiting widgets"""
+        while True:
+            try:
+                key, image = self.done.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self.waiting.pop(key, [])
+
+            if image is None:
+                self.missing.add(key)
+                continue
+
+            photo = ImageTk.PhotoImage(image, master=self.root)
+            self.remember(key, photo, image.width * image.height * 4)
+            for callback in callbacks:
+                callback(photo)
+
+        if self.waiting and not self.closed:
+            self.root.after(POLL_MS, self.poll)
+        else:
+            self.polling = False
+
+    def remember(self, key, photo, size):
+        """Add a PhotoImage to the LRU and evict the oldest past the byte budget"""
+        self.images[key] = photo
+        self.sizes[key] = size
+        self.used += size
+        while self.used > self.budget and len(self.images) > 1:
+            old_key, _ = self.images.popitem(last=False)
+            self.used -= self.sizes.pop(old_key)
+
+    def close(self):
+        """Stop the workers; queued covers are dropped"""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in range(self.workers):
+            self.jobs.put(None)
+
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self.close()
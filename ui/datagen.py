@@ -0,0 +1,356 @@
+"""Generate a production-scale library dataset
+
+Fills a database with books, copies, users, loans and fines. The same
+--seed always produces the same data, so performance work can be
+measured on an identical dataset. The skew is realistic:
+
+- book popularity and user activity follow a Zipf distribution
+- genres are weighted
+- a configurable share of loans is returned late and fined
+
+Rows are loaded with batched multi-row INSERTs. With --method infile they
+are streamed through LOAD DATA LOCAL INFILE instead, which needs
+local_infile=ON on the server.
+
+    python datagen.py --database library_perf --books 1000000 --users 200000 \\
+        --loans 20000000 --fines 5000000 --seed 42
+"""
+import argparse
+import bisect
+import csv
+import hashlib
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+
+import main
+from genres import get_or_create_genre_id
+from inventory import BARCODE_FORMAT, LOAN_DAYS
+from isbn import isbn13_check_digit
+
+# ------------------- Constants -------------------
+BATCH_SIZE = 5000
+FINE_PER_DAY = 0.50
+MEMBER_PASSWORD = hashlib.sha256("password".encode()).hexdigest()
+
+# Genre shares of the catalogue
+GENRE_WEIGHTS = {
+    "Fiction": 24, "Mystery": 12, "Fantasy": 10, "Romance": 10, "Science Fiction": 8,
+    "Biography": 7, "History": 7, "Non-Fiction": 6, "Dystopian": 4, "Satire": 2,
+    "Poetry": 3, "Children": 5, "Self-Help": 2,
+}
+
+TITLE_WORDS = (
+    "Shadow", "River", "Garden", "Winter", "Empire", "Secret", "Light", "Stone", "House", "Journey",
+    "Silent", "Golden", "Night", "Ocean", "Fire", "Lost", "Last", "Hidden", "Broken", "Crown",
+    "Storm", "Memory", "Island", "Forest", "City", "Letter", "Mirror", "Song", "Road", "Star",
+)
+FIRST_NAMES = (
+    "Ava", "Liam", "Noah", "Emma", "Olivia", "Elijah", "Mia", "Lucas", "Amelia", "Mateo",
+    "Sofia", "Aarav", "Priya", "Chen", "Yuki", "Fatima", "Omar", "Zara", "Ivan", "Nia",
+)
+LAST_NAMES = (
+    "Smith", "Garcia", "Kumar", "Chen", "Okafor", "Müller", "Rossi", "Silva", "Kim", "Nguyen",
+    "Brown", "Khan", "Novak", "Sato", "Haddad", "Jones", "Martin", "Lopez", "Patel", "Walker",
+)
+
+def user_email(index):
+    """Email of the generated user with a given index (0 is the most active in a fresh dataset)"""
+    return f"member{index:07d}@example.com"
+
+def author_name(index):
+    """A stable author name for an author index"""
+    name = f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]}"
+    generation = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    return f"{name} {generation + 1}" if generation else name
+
+def generated_isbn(index):
+    """A unique, valid ISBN-13 in the 979 range, clear of real sample data"""
+    first_twelve = f"979{index:09d}"
+    return first_twelve + isbn13_check_digit(first_twelve)
+
+# ------------------- Sampling -------------------
+class ZipfSampler:
+    """Draw ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** s"""
+
+    def __init__(self, rng, n, s):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1.0 / (rank + 1) ** s for rank in range(n)))
+        self.total = self.cumulative[-1]
+
+    def sample(self):
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.total)
+
+class WeightedChoice:
+    def __init__(self, rng, weights):
+        self.rng = rng
+        self.values = list(weights)
+        self.cumulative = list(itertools.accumulate(weights.values()))
+
+    def sample(self):
+        return self.values[bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])]
+
+# ------------------- Loading -------------------
+class BatchWriter:
+    """Buffer rows for one table and load them in batches"""
+
+    def __init__(self, connection, table, columns, method="insert", batch_size=BATCH_SIZE):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.table = table
+        self.columns = columns
+        self.method = method
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+
+        placeholders = ", ".join(["%s"] * len(columns))
+        self.insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.method == "infile":
+            self.load_infile()
+        else:
+            # mysql.connector rewrites executemany INSERTs into one multi-row statement
+            self.cursor.executemany(self.insert_sql, self.rows)
+        self.connection.commit()
+        self.written += len(self.rows)
+        self.rows = []
+
+    def load_infile(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n", quoting=csv.QUOTE_NONE, escapechar="\\")
+            for row in self.rows:
+                writer.writerow([r"\N" if value is None else value for value in row])
+            path = f.name
+        try:
+            self.cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.table} "
+                f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ({', '.join(self.columns)})",
+                (path,)
+            )
+        finally:
+            os.remove(path)
+
+    def close(self):
+        self.flush()
+        self.cursor.close()
+
+def next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+def next_generated_index(cursor, table, column, pattern, digits):
+    """One past the highest generated index already in a column, so a re-run never repeats a key"""
+    cursor.execute(f"SELECT MAX({column}) FROM {table} WHERE {column} REGEXP %s", (pattern,))
+    value = cursor.fetchone()[0]
+    return int(value[digits]) + 1 if value else 0
+
+def progress(label, done, total):
+    print(f"\r  {label}: {done:,}/{total:,}", end="", file=sys.stderr, flush=True)
+
+# ------------------- Generation -------------------
+def generate(database, books, users, loans, fines, seed=42, method="insert",
+             book_skew=1.1, user_skew=0.8, overdue_rate=0.12, paid_rate=0.7, years=3, as_of=None):
+    """Create the schema in database if needed and add the generated rows
+
+    Dates are laid out backwards from as_of (default today); pass the same
+    as_of to reproduce a dataset exactly on a later day. Generated ISBNs and
+    emails continue after the highest ones already present, so re-running
+    after an interrupted or smaller seed adds rows instead of duplicates.
+    """
+    rng = random.Random(seed)
+    today = as_of or date.today()
+
+    main.DB_NAME = database
+    if not main.create_database():
+        raise SystemExit(f"Could not create database {database}")
+
+    connection = mysql.connector.connect(database=database, allow_local_infile=(method == "infile"), **main.DB_CONFIG)
+    cursor = connection.cursor()
+    # Unique checks stay on: they guard the Users and Books natural keys
+    cursor.execute("SET foreign_key_checks = 0")
+
+    started = time.perf_counter()
+
+    # Genres
+    genre_ids = {name: get_or_create_genre_id(connection, name) for name in GENRE_WEIGHTS}
+    connection.commit()
+    genre_choice = WeightedChoice(rng, {genre_ids[name]: weight for name, weight in GENRE_WEIGHTS.items()})
+
+    # Books and copies. Popular books (by a shuffled Zipf rank) get more copies.
+    first_book = next_id(cursor, "Books", "book_id")
+    first_copy = next_id(cursor, "BookCopies", "copy_id")
+    first_isbn = next_generated_index(cursor, "Books", "isbn", "^979[0-9]{10}$", slice(3, 12))
+    popularity = list(range(books))
+    rng.shuffle(popularity)       # popularity[rank] = book index
+
+    copy_start = [0] * books       # book index -> first copy_id
+    copy_count = [0] * books
+    rank_of = [0] * books
+    for rank, index in enumerate(popularity):
+        rank_of[index] = rank
+
+    book_writer = BatchWriter(connection, "Books",
+                              ("book_id", "title", "author", "isbn", "isbn_normalized", "publication_year", "genre_id", "description"),
+                              method)
+    copy_writer = BatchWriter(connection, "BookCopies", ("copy_id", "book_id", "barcode", "status", "copy_condition"), method)
+    # A few prolific authors and a long tail
+    author_sampler = ZipfSampler(rng, max(1, min(books // 8, 200000)), 1.0)
+    copy_id = first_copy
+
+    for index in range(books):
+        book_id = first_book + index
+        title = " ".join(rng.sample(TITLE_WORDS, rng.randint(2, 4)))
+        author = author_name(author_sampler.sample())
+        isbn = generated_isbn(first_isbn + index)
+        year = max(1800, min(today.year, int(rng.gauss(1995, 20))))
+        book_writer.add((book_id, f"{title} {first_isbn + index}", author, isbn, isbn, year, genre_choice.sample(),
+                         f"Generated book {first_isbn + index}"))
+
+        rank = rank_of[index]
+        copies = 1 + (rank < books * 0.01) * 3 + (rank < books * 0.1) + (rng.random() < 0.2)
+        copy_start[index] = copy_id
+        copy_count[index] = copies
+        for _ in range(copies):
+            copy_writer.add((copy_id, book_id, BARCODE_FORMAT.format(copy_id), "available",
+                             rng.choice(("new", "good", "good", "good", "worn"))))
+            copy_id += 1
+
+        if index % 50000 == 0:
+            progress("books", index, books)
+    book_writer.close()
+    copy_writer.close()
+    progress("books", books, books)
+    print(file=sys.stderr)
+
+    # Users; user index 0 is the most active borrower
+    first_user = next_id(cursor, "Users", "user_id")
+    first_email = next_generated_index(cursor, "Users", "email", r"^member[0-9]{7}@example\.com$", slice(6, 13))
+    user_writer = BatchWriter(connection, "Users",
+                              ("user_id", "first_name", "last_name", "email", "password", "role", "registration_date"),
+                              method)
+    for index in range(users):
+        registered = today - timedelta(days=rng.randint(0, years * 365 + 365))
+        user_writer.add((first_user + index, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                         user_email(first_email + index), MEMBER_PASSWORD, "member", registered.isoformat()))
+    user_writer.close()
+
+    # Loans and fines
+    book_sampler = ZipfSampler(rng, books, book_skew)
+    user_sampler = ZipfSampler(rng, users, user_skew)
+    fine_rate = min(1.0, fines / max(1, loans * overdue_rate))
+
+    first_loan = next_id(cursor, "Loans", "loan_id")
+    loan_writer = BatchWriter(connection, "Loans",
+                              ("loan_id", "user_id", "book_id", "copy_id", "loan_date", "due_date", "return_date"),
+                              method)
+    fine_writer = BatchWriter(connection, "Fines", ("loan_id", "amount", "description", "paid", "payment_date"), method)
+    on_loan = set()
+    fines_written = 0
+    history_days = years * 365
+
+    for n in range(loans):
+        index = popularity[book_sampler.sample()]
+        copy = copy_start[index] + rng.randrange(copy_count[index])
+        loan_date = today - timedelta(days=rng.randint(0, history_days))
+        due_date = loan_date + timedelta(days=LOAN_DAYS)
+        late = rng.random() < overdue_rate
+
+        # Recent loans may still be out; one open loan per copy
+        open_loan = (today - loan_date).days < LOAN_DAYS * 2 and copy not in on_loan and rng.random() < 0.5
+        if open_loan:
+            on_loan.add(copy)
+            return_date = None
+        elif late:
+            return_date = due_date + timedelta(days=rng.randint(1, 60))
+        else:
+            return_date = loan_date + timedelta(days=rng.randint(1, LOAN_DAYS))
+        if return_date and return_date > today:
+            return_date = today
+
+        loan_id = first_loan + n
+        loan_writer.add((loan_id, first_user + user_sampler.sample(), first_book + index, copy,
+                         loan_date.isoformat(), due_date.isoformat(), return_date.isoformat() if return_date else None))
+
+        days_late = ((return_date or today) - due_date).days
+        if days_late > 0 and fines_written < fines and rng.random() < fine_rate:
+            paid = return_date is not None and rng.random() < paid_rate
+            payment_date = min(today, return_date + timedelta(days=rng.randint(0, 10))) if paid else None
+            fine_writer.add((loan_id, round(days_late * FINE_PER_DAY, 2), f"Late return: {days_late} days overdue",
+                             int(paid), payment_date.isoformat() if paid else None))
+            fines_written += 1
+
+        if n % 100000 == 0:
+            progress("loans", n, loans)
+    loan_writer.close()
+    fine_writer.close()
+    progress("loans", loans, loans)
+    print(file=sys.stderr)
+
+    # Copies out on loan
+    cursor.execute("""
+        UPDATE BookCopies c
+        JOIN Loans l ON l.copy_id = c.copy_id AND l.return_date IS NULL
+        SET c.status = 'on_loan'
+    """)
+    connection.commit()
+
+    cursor.execute("SET foreign_key_checks = 1")
+    cursor.close()
+    connection.close()
+
+    summary = {
+        "books": books, "copies": copy_id - first_copy, "users": users,
+        "loans": loans, "fines": fines_written, "seconds": round(time.perf_counter() - started, 1),
+    }
+    print(f"Generated {summary}", file=sys.stderr)
+    return summary
+
+def is_seeded(database, books):
+    """Check if a database already holds at least books generated books"""
+    try:
+        connection = mysql.connector.connect(database=database, **main.DB_CONFIG)
+    except mysql.connector.Error:
+        return False
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM Books WHERE isbn LIKE '979%'")
+        return cursor.fetchone()[0] >= books
+    except mysql.connector.Error:
+        return False
+    finally:
+        cursor.close()
+        connection.close()
+
+# ------------------- Main Execution -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a production-scale library dataset")
+    parser.add_argument("--database", default="library_perf")
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--loans", type=int, default=2000000)
+    parser.add_argument("--fines", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--method", choices=("insert", "infile"), default="insert")
+    parser.add_argument("--book-skew", type=float, default=1.1, help="Zipf exponent for book popularity")
+    parser.add_argument("--user-skew", type=float, default=0.8, help="Zipf exponent for user activity")
+    parser.add_argument("--overdue-rate", type=float, default=0.12, help="share of loans returned late")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="date the history ends (YYYY-MM-DD), default today")
+    args = parser.parse_args()
+
+    generate(args.database, args.books, args.users, args.loans, args.fines, seed=args.seed, method=args.method,
+             book_skew=args.book_skew, user_skew=args.user_skew, overdue_rate=args.overdue_rate, as_of=args.as_of)
@@ -0,0 +1,478 @@
+"""Capture EXPLAIN plans for every application statement and catch regressions
+
+The tool collects statements in two ways:
+
+- runtime capture: the data functions of browse, home, borrow, fine and
+  admin run against a seeded database while query_log records one example
+  of each statement
+- static scan: the execute() calls in every screen, including login and
+  signup, whose statements are written out as literals
+
+Each statement is run through EXPLAIN, and through EXPLAIN ANALYZE with
+--analyze. For every table it records the access type, key used and rows
+examined. With --baseline the run fails (exit 1) when a plan gets worse:
+
+- a table's access type drops, e.g. ref to ALL
+- a table stops using an index
+- estimated rows grow past the tolerance
+- a statement new since the baseline scans a table (ALL or index) of
+  FULL_SCAN_ROWS or more
+
+Baseline statements that no longer appear are listed but do not fail.
+
+    python explain_plans.py --output plans.json
+    python explain_plans.py --baseline plans.json
+
+The data functions commit their writes, so run this against a scratch
+database. It is generated with datagen.py when it is not there yet.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+
+# ------------------- Constants -------------------
+DEFAULT_DATABASE = "library_explain"
+DEFAULT_BOOKS = 100000
+SEED = 42
+
+APP_MODULES = ("browse", "home", "borrow", "fine", "admin", "login", "signup")
+
+# Best first; a move to the right is a regression
+ACCESS_TYPES = (
+    "system", "const", "eq_ref", "ref", "fulltext", "ref_or_null", "index_merge",
+    "unique_subquery", "index_subquery", "range", "index", "ALL",
+)
+ROWS_TOLERANCE = 10.0     # estimated rows may grow this many times over the baseline
+ROWS_NOISE_FLOOR = 1000   # growth below this many rows is never a regression
+FULL_SCAN_ROWS = 1000     # full scans of smaller tables are not worth reporting
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+ANALYZABLE = ("SELECT", "WITH")
+
+SAMPLE_PASSWORD = "password"   # datagen's member password
+ADMIN_EMAIL = "admin@library.com"
+ADMIN_PASSWORD = "admin123"
+SCRATCH_ISBN = "9780000000002"
+SCRATCH_EMAIL = "explain.plans@example.com"
+
+# ------------------- Setup -------------------
+def ensure_seeded(database, books):
+    import datagen
+
+    if datagen.is_seeded(database, books):
+        return
+    print(f"Seeding {database}...", file=sys.stderr)
+    datagen.generate(
+        database,
+        books=books,
+        users=max(100, books // 5),
+        loans=books * 2,
+        fines=books // 2,
+        seed=SEED
+    )
+
+def connect(database):
+    import mysql.connector
+    import main
+
+    return mysql.connector.connect(database=database, **main.DB_CONFIG)
+
+def prepare_modules(database):
+    """Point the importable screens at the database and keep their dialogs quiet"""
+    from tkinter import messagebox
+
+    for name in ("showerror", "showinfo", "showwarning"):
+        setattr(messagebox, name, lambda title, message, *args, **kwargs: print(f"{title}: {message}", file=sys.stderr))
+    messagebox.askyesno = lambda *args, **kwargs: False
+
+    import admin
+    import borrow
+    import browse
+    import fine
+    import home
+    modules = {"admin": admin, "borrow": borrow, "browse": browse, "fine": fine, "home": home}
+    for module in modules.values():
+        module.DB_CONFIG["database"] = database
+    return modules
+
+def sample_values(database):
+    """Ids the scenarios and sample parameters use, taken from the seeded data"""
+    import datagen
+
+    connection = connect(database)
+    cursor = connection.cursor()
+    email = datagen.user_email(0)
+    cursor.execute("SELECT user_id FROM Users WHERE email = %s", (email,))
+    user_id = cursor.fetchone()[0]
+    cursor.execute(
+        """
+        SELECT b.book_id, b.genre_id FROM Books b
+        JOIN BookCopies c ON c.book_id = b.book_id AND c.status = 'available'
+        WHERE NOT EXISTS (
+            SELECT 1 FROM Loans l WHERE l.book_id = b.book_id AND l.user_id = %s AND l.return_date IS NULL
+        )
+        LIMIT 1
+        """,
+        (user_id,)
+    )
+    book_id, genre_id = cursor.fetchone()
+    cursor.close()
+    connection.close()
+
+    return {
+        "user_id": user_id, "email": email, "book_id": book_id, "genre_id": genre_id,
+        "search": "shadow", "password": SAMPLE_PASSWORD,
+    }
+
+def lookup_id(database, query, params):
+    connection = connect(database)
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return row[0] if row else None
+
+# ------------------- Scenarios -------------------
+def run_query(connect_db, query, params=()):
+    """Run a statement the screens hand to ChunkedLoader"""
+    connection = connect_db()
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    cursor.fetchall()
+    cursor.close()
+    connection.close()
+
+def run_scenarios(modules, database, values):
+    """Call the data functions behind every screen, reads first, then balanced writes"""
+    from fines_data import FinesFilter, fines_page_query
+
+    admin, borrow, browse, fine, home = (modules[name] for name in ("admin", "borrow", "browse", "fine", "home"))
+    user_id, book_id, term = values["user_id"], values["book_id"], values["search"]
+
+    # Browse
+    browse.get_books(term)
+    browse.get_books("", genre_id=values["genre_id"])
+    browse.get_books(term, order_by="title", decade=1990, available_only=True)
+    browse.get_books(term, order_by="relevance", decade=1990, available_only=True)[:6]
+    browse.get_search_facets(term)
+    browse.get_search_facets(term, "relevance")
+    # The seeded catalogue has genres; an empty list means the lookup itself broke
+    if not browse.get_book_categories():
+        raise SystemExit("browse.get_book_categories() returned no genres")
+    browse.is_book_borrowed_by_user(book_id, user_id)
+
+    # Home
+    home.verify_database()
+    home.search_books(term)
+    home.get_user_borrowed_books(user_id)
+    home.get_user_fines(user_id)
+    home.get_user_profile(user_id)
+    home.get_user_summary(user_id)
+
+    # Borrowed books and fines
+    borrow.get_active_loans(user_id)
+    borrow.get_loan_history(user_id)
+    fine.get_pending_fines(user_id)
+    fine.get_payment_history(user_id)
+    fine.get_loans_with_no_fines(user_id)
+
+    # Admin
+    admin.admin_login(ADMIN_EMAIL, ADMIN_PASSWORD)
+    admin.get_dashboard_stats()
+    admin.get_books_page(term)
+    admin.count_books(term)
+    admin.get_book(book_id)
+    admin.get_users_page("member")
+    admin.count_users("member")
+    admin.get_user(user_id)
+    for fines_filter in (FinesFilter(), FinesFilter(values["email"], None, None)):
+        query, count_query, params = fines_page_query(fines_filter)
+        run_query(admin.connect_db, count_query, params)
+        run_query(admin.connect_db, query, params)
+
+    # Borrow and return through each screen that offers it
+    for borrow_book, return_book in ((browse.borrow_book, borrow.return_book), (home.borrow_book, home.return_book)):
+        borrow_book(book_id, user_id)
+        loan_id = lookup_id(
+            database,
+            "SELECT loan_id FROM Loans WHERE book_id = %s AND user_id = %s AND return_date IS NULL",
+            (book_id, user_id)
+        )
+        if loan_id:
+            return_book(loan_id, user_id)
+
+    # Scanner path: lend a copy by barcode, then return it by barcode
+    barcode = lookup_id(
+        database, "SELECT barcode FROM BookCopies WHERE book_id = %s AND status = 'available' LIMIT 1", (book_id,)
+    )
+    if barcode:
+        browse.borrow_book(book_id, user_id, barcode)
+        loan_id = borrow.find_loan_by_barcode(barcode, user_id)
+        if loan_id:
+            borrow.return_book(loan_id, user_id)
+
+    # Pay one fine through each screen
+    for pay in (fine.pay_fine, home.pay_fine):
+        pending = fine.get_pending_fines(user_id)
+        if pending:
+            pay(pending[0]["fine_id"], user_id)
+    loan_id = lookup_id(
+        database,
+        "SELECT l.loan_id FROM Loans l JOIN Fines f ON f.loan_id = l.loan_id WHERE l.user_id = %s AND f.paid = 0 LIMIT 1",
+        (user_id,)
+    )
+    if loan_id:
+        borrow.pay_fine(loan_id, user_id)
+
+    # Admin writes on scratch records
+    admin.add_book("Explain Plans", "Plan Author", "Reference", SCRATCH_ISBN, 2000, 1)
+    scratch_book = lookup_id(database, "SELECT book_id FROM Books WHERE isbn = %s", (SCRATCH_ISBN,))
+    if scratch_book:
+        admin.update_book(scratch_book, "Explain Plans", "Plan Author", "Reference", SCRATCH_ISBN, 2001, 2)
+        admin.delete_book(scratch_book)
+
+    admin.create_user("Explain", "Plans", SCRATCH_EMAIL, SAMPLE_PASSWORD)
+    scratch_user = lookup_id(database, "SELECT user_id FROM Users WHERE email = %s", (SCRATCH_EMAIL,))
+    if scratch_user:
+        admin.update_user(scratch_user, "Explain", "Plans", SCRATCH_EMAIL, "member", SAMPLE_PASSWORD)
+        home.update_user_profile(scratch_user, "Explain", "Plans", SCRATCH_EMAIL)
+        admin.delete_user(scratch_user)
+
+def capture_statements(database, values):
+    """Run the scenarios and return {fingerprint: {"statement", "params", "caller"}}"""
+    import query_log
+
+    modules = prepare_modules(database)
+    samples = {}
+    query_log.capture(samples)
+    try:
+        run_scenarios(modules, database, values)
+    finally:
+        query_log.capture(None)
+    return samples
+
+# ------------------- Static Scan -------------------
+class ExecuteCalls(ast.NodeVisitor):
+    """Find cursor.execute() and executemany() calls and the function around each"""
+
+    def __init__(self, module):
+        self.module = module
+        self.functions = []
+        self.sites = []
+
+    def visit_FunctionDef(self, node):
+        self.functions.append(node.name)
+        self.generic_visit(node)
+        self.functions.pop()
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr in ("execute", "executemany") and node.args:
+            statement = node.args[0]
+            literal = statement.value if isinstance(statement, ast.Constant) and isinstance(statement.value, str) else None
+            self.sites.append({
+                "site": f"{self.module}.{self.functions[-1] if self.functions else '<module>'}:{node.lineno}",
+                "function": f"{self.module}.{self.functions[-1] if self.functions else '<module>'}",
+                "statement": literal,
+            })
+        self.generic_visit(node)
+
+def statement_sites(directory):
+    """Every execute() call in the application screens"""
+    sites = []
+    for module in APP_MODULES:
+        with open(os.path.join(directory, module + ".py")) as f:
+            visitor = ExecuteCalls(module)
+            visitor.visit(ast.parse(f.read()))
+        sites.extend(visitor.sites)
+    return sites
+
+_PLACEHOLDER_CONTEXT = re.compile(r"(\w+)\W*(?:=|LIKE|<|>|<=|>=)\s*$", re.I)
+
+def sample_params(statement, values):
+    """Plausible parameters for a literal statement, guessed from the column before each %s"""
+    params = []
+    pieces = statement.split("%s")
+    for before in pieces[:-1]:
+        if re.search(r"\b(LIMIT|OFFSET)\s*$", before, re.I):
+            params.append(1)
+            continue
+        match = _PLACEHOLDER_CONTEXT.search(before)
+        column = match.group(1).lower() if match else ""
+        params.append(values.get(column, str(values.get("search"))))
+    return tuple(params)
+
+# ------------------- Plans -------------------
+def statement_kind(statement):
+    match = re.match(r"\s*(\w+)", statement)
+    return match.group(1).upper() if match else ""
+
+def explain(cursor, statement, params, analyze=False):
+    """Plan rows for one statement, plus the EXPLAIN ANALYZE tree when asked"""
+    cursor.execute("EXPLAIN " + statement, params or ())
+    plan = [
+        {
+            "id": row.get("id"),
+            "select_type": row.get("select_type"),
+            "table": row.get("table"),
+            "type": row.get("type"),
+            "possible_keys": row.get("possible_keys"),
+            "key": row.get("key"),
+            "rows": int(row["rows"]) if row.get("rows") is not None else None,
+            "filtered": float(row["filtered"]) if row.get("filtered") is not None else None,
+            "extra": row.get("Extra"),
+        }
+        for row in cursor.fetchall()
+    ]
+    result = {"plan": plan}
+
+    if analyze and statement_kind(statement) in ANALYZABLE:
+        cursor.execute("EXPLAIN ANALYZE " + statement, params or ())
+        result["analyze"] = "\n".join(row["EXPLAIN"] for row in cursor.fetchall())
+    return result
+
+def collect_plans(database, captured, sites, values, analyze):
+    """EXPLAIN every captured statement and every literal one the scenarios missed"""
+    import mysql.connector
+    from query_log import fingerprint
+
+    statements = dict(captured)
+    for site in sites:
+        if site["statement"] and fingerprint(site["statement"]) not in statements:
+            statements[fingerprint(site["statement"])] = {
+                "statement": site["statement"],
+                "params": sample_params(site["statement"], values),
+                "caller": site["site"],
+            }
+
+    connection = connect(database)
+    cursor = connection.cursor(dictionary=True, buffered=True)
+    plans = {}
+    for key, sample in sorted(statements.items()):
+        statement = sample["statement"]
+        if statement_kind(statement) not in EXPLAINABLE:
+            continue
+        entry = {"caller": sample["caller"], "statement": " ".join(statement.split())}
+        try:
+            entry.update(explain(cursor, statement, sample["params"], analyze))
+        except mysql.connector.Error as err:
+            entry["error"] = str(err)
+        plans[key] = entry
+    cursor.close()
+    connection.close()
+    return plans
+
+def uncovered_sites(sites, plans):
+    """Dynamic execute() calls that no captured statement came from"""
+    callers = {plan["caller"].rsplit(":", 1)[0] for plan in plans.values()}
+    return [site["site"] for site in sites if site["statement"] is None and site["function"] not in callers]
+
+def scanned_tables(entry, access_types=("ALL",)):
+    """Plan rows of one statement that read a whole table or index of FULL_SCAN_ROWS or more"""
+    return [row for row in entry.get("plan", [])
+            if row["type"] in access_types and (row["rows"] or 0) >= FULL_SCAN_ROWS]
+
+def full_scans(plans):
+    scans = []
+    for entry in plans.values():
+        for row in scanned_tables(entry):
+            scans.append(f"{entry['caller']} {row['table']}: {row['rows']:,} rows")
+    return scans
+
+# ------------------- Regression Check -------------------
+def access_rank(access_type):
+    return ACCESS_TYPES.index(access_type) if access_type in ACCESS_TYPES else -1
+
+def compare(plans, baseline, tolerance=ROWS_TOLERANCE):
+    """Return a list of plan regressions of plans against baseline"""
+    regressions = []
+    for key, entry in plans.items():
+        previous = baseline.get(key)
+        if previous is None:
+            # A statement the baseline never saw must not start out scanning
+            for row in scanned_tables(entry, ("ALL", "index")):
+                regressions.append(f"{entry['caller']} {row['table']}: new statement, "
+                                   f"{row['type']} over {row['rows']:,} rows")
+            continue
+        if "plan" not in previous:
+            continue
+        if "error" in entry:
+            regressions.append(f"{entry['caller']}: EXPLAIN failed: {entry['error']}")
+            continue
+
+        rows_now = {(row["id"], row["table"]): row for row in entry["plan"]}
+        for before in previous["plan"]:
+            now = rows_now.get((before["id"], before["table"]))
+            if now is None:
+                continue
+            where = f"{entry['caller']} {before['table']}"
+            if access_rank(now["type"]) > access_rank(before["type"]):
+                regressions.append(f"{where}: {before['type']}({before['key']}) -> {now['type']}({now['key']})")
+            elif before["key"] and not now["key"]:
+                regressions.append(f"{where}: no longer uses {before['key']}")
+            elif (before["rows"] is not None and now["rows"] is not None
+                  and now["rows"] > before["rows"] * tolerance and now["rows"] - before["rows"] > ROWS_NOISE_FLOOR):
+                regressions.append(f"{where}: rows {before['rows']:,} -> {now['rows']:,}")
+    return regressions
+
+def vanished(plans, baseline):
+    """Callers of baseline statements that were not captured this run"""
+    return sorted(entry.get("caller", key) for key, entry in baseline.items() if key not in plans)
+
+# ------------------- Main Execution -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Capture EXPLAIN plans for every application statement")
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="scratch database; it is written to")
+    parser.add_argument("--books", type=int, default=DEFAULT_BOOKS, help="catalogue size to seed")
+    parser.add_argument("--analyze", action="store_true", help="also run EXPLAIN ANALYZE on SELECTs")
+    parser.add_argument("--output", help="write the plans JSON here")
+    parser.add_argument("--baseline", help="fail if plans regress against this JSON")
+    parser.add_argument("--tolerance", type=float, default=ROWS_TOLERANCE)
+    parser.add_argument("--skip-seed", action="store_true", help="use the database as it is")
+    parser.add_argument("--strict", action="store_true", help="also fail on execute() calls no scenario reached")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        ensure_seeded(args.database, args.books)
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    sites = statement_sites(directory)
+    values = sample_values(args.database)
+    captured = capture_statements(args.database, values)
+    plans = collect_plans(args.database, captured, sites, values, args.analyze)
+
+    report = json.dumps(plans, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    print(f"{len(plans)} statements explained from {len(sites)} execute() calls", file=sys.stderr)
+    for scan in full_scans(plans):
+        print(f"  full scan: {scan}", file=sys.stderr)
+    uncovered = uncovered_sites(sites, plans)
+    for site in uncovered:
+        print(f"  not exercised: {site}", file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for caller in vanished(plans, baseline):
+            print(f"  no longer captured: {caller}", file=sys.stderr)
+        regressions = compare(plans, baseline, args.tolerance)
+        if regressions:
+            print("Plan regressions:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            status = 1
+    if args.strict and uncovered:
+        status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Fast start: deferred imports, shell-first painting and background checks
+
+On by default; set LIBRARY_FAST_START=0 for the old behaviour, where every
+import happens up front and each screen loads its data before it is
+drawn.
+
+- lazy_import() and lazy_module() stand in for `import a.b` and
+  `from a import b`. The real import runs on first attribute access, so
+  mysql.connector and PIL load when a screen first needs them, not
+  before the window appears.
+- after_first_paint() runs a screen's first data load once its empty
+  shell is on screen.
+- run_in_background() runs a check off the Tk thread and reports back on
+  it.
+
+bench_startup.py measures the result for every entry point.
+"""
+import importlib
+import json
+import os
+import threading
+import time
+
+# ------------------- Constants -------------------
+ENABLED = os.environ.get("LIBRARY_FAST_START", "1") not in ("", "0")
+
+PAINT_FALLBACK_MS = 250   # run deferred work even if no <Map> event arrives
+POLL_MS = 50
+
+# ------------------- Deferred Imports -------------------
+class LazyModule:
+    """A module proxy whose import runs on first attribute access"""
+
+    def __init__(self, name, bind_top_level):
+        self._name = name
+        self._bind_top_level = bind_top_level
+        self._module = None
+
+    def _load(self):
+        module = importlib.import_module(self._name)
+        if self._bind_top_level:
+            module = importlib.import_module(self._name.partition(".")[0])
+        self._module = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name):
+    """Deferred `import name`: binds the top-level package, like the import statement"""
+    if not ENABLED:
+        importlib.import_module(name)
+        return importlib.import_module(name.partition(".")[0])
+    return LazyModule(name, bind_top_level=True)
+
+def lazy_module(name):
+    """Deferred `from package import module`: binds the module itself"""
+    if not ENABLED:
+        return importlib.import_module(name)
+    return LazyModule(name, bind_top_level=False)
+
+# ------------------- Deferred Work -------------------
+_pending = 0
+
+def pending():
+    """Number of first-paint callbacks that have not run yet"""
+    return _pending
+
+def after_first_paint(root, callback):
+    """Run callback once root has been mapped and drawn; right away without fast start"""
+    global _pending
+    if not ENABLED:
+        callback()
+        return
+
+    _pending += 1
+    state = {"done": False}
+
+    def run():
+        global _pending
+        if state["done"]:
+            return
+        state["done"] = True
+        _pending -= 1
+        root.update_idletasks()
+        callback()
+
+    def on_map(event):
+        if event.widget is root:
+            root.after_idle(run)
+
+    # Later <Map> events (e.g. after un-minimizing) find the work done
+    root.bind("<Map>", on_map, add="+")
+    root.after(PAINT_FALLBACK_MS, run)
+
+def run_in_background(root, work, on_done):
+    """Call work() on a worker thread, then on_done(result) on the Tk thread
+
+    If work() raises, on_done gets the exception instead of a result.
+    """
+    def call():
+        try:
+            return work()
+        except Exception as err:
+            return err
+
+    if not ENABLED:
+        on_done(call())
+        return
+
+    result = {}
+
+    def worker():
+        result["value"] = call()
+
+    thread = threading.Thread(target=worker, name="fast-start", daemon=True)
+    thread.start()
+
+    def poll():
+        if thread.is_alive():
+            try:
+                root.after(POLL_MS, poll)
+            except Exception:
+                pass  # the window is gone
+            return
+        on_done(result.get("value"))
+
+    root.after(POLL_MS, poll)
+
+# ------------------- Startup Benchmark -------------------
+# Set by bench_startup.py: report when the first window is painted and ready, then exit
+BENCH = os.environ.get("LIBRARY_STARTUP_BENCH", "") not in ("", "0")
+
+def _report_startup(root):
+    launched = float(os.environ.get("LIBRARY_STARTUP_T0", time.time()))
+    marks = {}
+
+    def since_launch():
+        return round((time.time() - launched) * 1000, 2)
+
+    def on_map(event):
+        if event.widget is root and "first_paint_ms" not in marks:
+            marks["first_paint_ms"] = since_launch()
+            root.after_idle(wait_until_ready)
+
+    def wait_until_ready():
+        if pending():
+            root.after(10, wait_until_ready)
+            return
+        root.after_idle(finish)
+
+    def finish():
+        marks["ready_ms"] = since_launch()
+        print("STARTUP " + json.dumps(marks), flush=True)
+        os._exit(0)
+
+    root.bind("<Map>", on_map, add="+")
+
+def _watch_first_window():
+    import tkinter
+
+    original = tkinter.Tk.__init__
+
+    def init(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        if not init.seen:
+            init.seen = True
+            _report_startup(self)
+
+    init.seen = False
+    tkinter.Tk.__init__ = init
+
+if BENCH:
+    _watch_first_window()
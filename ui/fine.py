@@ -1,14 +1,23 @@
+import profiling
 import tkinter as tk
+from tkinter import ttk
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import mysql.connector
-import json
+import theme
+import ui_metrics
+import metrics
+import tracing
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import sessions
 import os
 from datetime import datetime
 import hashlib
+from virtual_table import VirtualTable
+from table_actions import RowAction, TableActions
 
 # ------------------- Constants -------------------
-SESSION_FILE = 'user_session.json'
+SESSION_KIND = "user"
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -19,27 +28,19 @@ DB_CONFIG = {
 # ------------------- Database Connection -------------------
 def connect_db():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return query_log.connect(**DB_CONFIG)
     except mysql.connector.Error as err:
         print(f"Failed to connect to database: {err}")
         return None
 
 # ------------------- Session Management -------------------
 def load_session():
-    """Load user data from session file"""
-    try:
-        if os.path.exists(SESSION_FILE):
-            with open(SESSION_FILE, 'r') as f:
-                return json.load(f)
-        return None
-    except Exception as e:
-        print(f"Failed to load session: {e}")
-        return None
+    """Load user data from the active session"""
+    return sessions.current(SESSION_KIND)
 
 def clear_session():
-    """Delete the session file"""
-    if os.path.exists(SESSION_FILE):
-        os.remove(SESSION_FILE)
+    """End the active session"""
+    sessions.end(SESSION_KIND)
 
 # ------------------- Fine Functions -------------------
 def get_pending_fines(user_id):
@@ -162,6 +163,7 @@ def get_loans_with_no_fines(user_id):
             cursor.close()
             connection.close()
 
+@metrics.counted(metrics.FINE_PAYMENTS)
 def pay_fine(fine_id, user_id):
     """Pay a fine"""
     connection = connect_db()
@@ -218,6 +220,9 @@ def format_currency(amount):
 class FinesPaymentApp:
     def __init__(self, root):
         self.root = root
+        theme.use_root(root)
+        ui_metrics.install(root, "fine")
+        profiling.install(self, "fine")
         self.root.title("Library Management System - Fines & Payment")
         self.root.geometry("1100x700")
         
@@ -231,12 +236,13 @@ class FinesPaymentApp:
             print("No active user session found.")
             self.logout()
             return
+        sessions.watch(self.root, SESSION_KIND, self.logout)
         
         # Initialize UI
         self.setup_ui()
         
-        # Load fines and payment history
-        self.load_data()
+        # Load fines and payment history once the shell is on screen
+        fast_start.after_first_paint(self.root, self.load_data)
     
     def setup_ui(self):
         """Set up the user interface"""
@@ -264,7 +270,7 @@ class FinesPaymentApp:
         library_label = ctk.CTkLabel(
             self.sidebar, 
             text="📚 Library System", 
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=theme.font(size=20, weight="bold"),
             text_color="white"
         )
         library_label.pack(anchor="w", padx=20, pady=(20, 5))
@@ -273,7 +279,7 @@ class FinesPaymentApp:
         user_welcome = ctk.CTkLabel(
             self.sidebar,
             text=f"Welcome,\n{self.user['first_name']} {self.user['last_name']}",
-            font=ctk.CTkFont(size=12, weight="bold"),
+            font=theme.font(size=12, weight="bold"),
             text_color="white"
         )
         user_welcome.pack(anchor="w", padx=20, pady=(0, 20))
@@ -298,7 +304,7 @@ class FinesPaymentApp:
                     self.sidebar,
                     text=text,
                     anchor="w",
-                    font=ctk.CTkFont(size=14),
+                    font=theme.font(size=14),
                     fg_color="transparent",
                     text_color="white",
                     hover_color="#0d4f29",
@@ -309,7 +315,7 @@ class FinesPaymentApp:
                     self.sidebar,
                     text=text,
                     anchor="w",
-                    font=ctk.CTkFont(size=14),
+                    font=theme.font(size=14),
                     fg_color="#0d4f29",
                     text_color="white",
                     hover_color="#0d4f29"
@@ -325,7 +331,7 @@ class FinesPaymentApp:
             self.sidebar,
             text="🚪 Logout",
             anchor="w",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="transparent",
             text_color="white",
             hover_color="#0d4f29",
@@ -339,7 +345,7 @@ class FinesPaymentApp:
         title = ctk.CTkLabel(
             self.content, 
             text="Fines & Payment",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=theme.font(size=24, weight="bold"),
             anchor="w"
         )
         title.pack(anchor="w", padx=30, pady=(20, 20))
@@ -351,7 +357,7 @@ class FinesPaymentApp:
         self.summary_label = ctk.CTkLabel(
             self.summary_frame,
             text="Outstanding Fines:",
-            font=ctk.CTkFont(size=16),
+            font=theme.font(size=16),
             anchor="w"
         )
         self.summary_label.pack(side="left", padx=20, pady=15)
@@ -359,7 +365,7 @@ class FinesPaymentApp:
         self.amount_label = ctk.CTkLabel(
             self.summary_frame,
             text="$0.00",
-            font=ctk.CTkFont(size=18, weight="bold"),
+            font=theme.font(size=18, weight="bold"),
             text_color="#d32f2f",
             anchor="e"
         )
@@ -369,119 +375,73 @@ class FinesPaymentApp:
         pending_label = ctk.CTkLabel(
             self.content,
             text="⚠️ Pending Fines",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         pending_label.pack(anchor="w", padx=30, pady=(10, 10))
         
-        # Scrollable frame for pending fines
+        # Style for treeview
+        theme.apply_treeview_style(heading_background="#333333", heading_foreground="white")
+        
+        # Pending fines table; only the visible rows exist as Treeview items
         self.pending_outer_frame = ctk.CTkFrame(self.content, fg_color="transparent")
         self.pending_outer_frame.pack(fill="x", padx=30, pady=(0, 20))
         
-        # Create canvas for scrolling
-        self.pending_canvas = ctk.CTkCanvas(
+        self.pending_fines = []
+        self.pending_table = VirtualTable(
             self.pending_outer_frame,
-            bg="#e6f4e6",
-            highlightthickness=0
-        )
-        self.pending_canvas.pack(side="left", fill="both", expand=True)
-        
-        # Add a scrollbar
-        scrollbar = ctk.CTkScrollbar(
-            self.pending_outer_frame,
-            orientation="vertical",
-            command=self.pending_canvas.yview
-        )
-        scrollbar.pack(side="right", fill="y")
-        
-        # Configure the canvas
-        self.pending_canvas.configure(yscrollcommand=scrollbar.set)
-        self.pending_canvas.bind('<Configure>', 
-            lambda e: self.pending_canvas.configure(scrollregion=self.pending_canvas.bbox("all"))
+            [("Title", 350, None), ("Due Date", 150, None), ("Fine Amount", 150, None), ("Actions", 150, None)],
+            fetch_rows=lambda offset, limit, key, desc: self.pending_fines[offset:offset + limit],
+            count_rows=lambda: len(self.pending_fines),
+            format_row=lambda fine: (
+                fine['title'],
+                format_date(fine['due_date']) if fine.get('fine_id') else "",
+                format_currency(fine['amount']) if fine.get('fine_id') else "",
+                ""
+            ),
+            height=6
         )
         
-        # Create a frame inside the canvas
-        self.pending_frame = ctk.CTkFrame(self.pending_canvas, fg_color="#f0f4f0")
-        self.pending_canvas.create_window((0, 0), window=self.pending_frame, anchor="nw")
-        
-        # Table headers for pending fines
-        self.pending_headers = ["Title", "Due Date", "Fine Amount", "Action"]
-        self.pending_col_widths = [350, 150, 150, 150]
-        
-        for i, header in enumerate(self.pending_headers):
-            header_label = ctk.CTkLabel(
-                self.pending_frame,
-                text=header,
-                fg_color="#333333",
-                corner_radius=0,
-                text_color="white",
-                font=ctk.CTkFont(weight="bold"),
-                width=self.pending_col_widths[i],
-                height=30
+        # One handler serves every row's Pay Now label, the context menu and Enter
+        self.pending_actions = TableActions(self.pending_table.tree, "Actions", [
+            RowAction(
+                "$ Pay Now",
+                lambda item: self.pay_fine(self.pending_table.row_for_item(item)['fine_id']),
+                "<Return>",
+                enabled=lambda item: (self.pending_table.row_for_item(item) or {}).get('fine_id')
             )
-            header_label.grid(row=0, column=i, sticky="ew")
+        ])
+        self.pending_table.on_render = self.pending_actions.refresh_labels
         
         # Payment History Section
         history_label = ctk.CTkLabel(
             self.content,
             text="🔄 Payment History",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=theme.font(size=16, weight="bold"),
             anchor="w"
         )
         history_label.pack(anchor="w", padx=30, pady=(20, 10))
         
-        # Scrollable frame for payment history
+        # Payment history table
         self.history_outer_frame = ctk.CTkFrame(self.content, fg_color="transparent")
         self.history_outer_frame.pack(fill="both", expand=True, padx=30, pady=(0, 20))
         
-        # Create canvas for scrolling
-        self.history_canvas = ctk.CTkCanvas(
+        self.history_data = []
+        self.history_table = VirtualTable(
             self.history_outer_frame,
-            bg="#e6f4e6",
-            highlightthickness=0
+            [("Title", 350, None), ("Paid Amount", 150, None), ("Payment Date", 150, None), ("Status", 150, None)],
+            fetch_rows=lambda offset, limit, key, desc: self.history_data[offset:offset + limit],
+            count_rows=lambda: len(self.history_data),
+            format_row=lambda item: (
+                item['title'],
+                format_currency(item['amount']) if item['status'] else "",
+                format_date(item['date']) if item['status'] else "",
+                item['status']
+            ),
+            height=10
         )
-        self.history_canvas.pack(side="left", fill="both", expand=True)
-        
-        # Add a scrollbar
-        history_scrollbar = ctk.CTkScrollbar(
-            self.history_outer_frame,
-            orientation="vertical",
-            command=self.history_canvas.yview
-        )
-        history_scrollbar.pack(side="right", fill="y")
-        
-        # Configure the canvas
-        self.history_canvas.configure(yscrollcommand=history_scrollbar.set)
-        self.history_canvas.bind('<Configure>', 
-            lambda e: self.history_canvas.configure(scrollregion=self.history_canvas.bbox("all"))
-        )
-        
-        # Create a frame inside the canvas
-        self.history_frame = ctk.CTkFrame(self.history_canvas, fg_color="#f0f4f0")
-        self.history_canvas.create_window((0, 0), window=self.history_frame, anchor="nw")
-        
-        # Table headers for payment history
-        self.history_headers = ["Title", "Paid Amount", "Payment Date", "Status"]
-        self.history_col_widths = [350, 150, 150, 150]
-        
-        for i, header in enumerate(self.history_headers):
-            header_label = ctk.CTkLabel(
-                self.history_frame,
-                text=header,
-                fg_color="#333333",
-                corner_radius=0,
-                text_color="white",
-                font=ctk.CTkFont(weight="bold"),
-                width=self.history_col_widths[i],
-                height=30
-            )
-            header_label.grid(row=0, column=i, sticky="ew")
-        
-        # Configure grid columns to expand properly
-        for frame in [self.pending_frame, self.history_frame]:
-            for i in range(4):
-                frame.grid_columnconfigure(i, weight=1)
     
+    @ui_metrics.timed()
     def load_data(self):
         """Load fines and payment history data"""
         # Get pending fines
@@ -498,65 +458,8 @@ class FinesPaymentApp:
         self.amount_label.configure(text=format_currency(total_outstanding))
         
         # Display pending fines
-        if pending_fines:
-            for idx, fine in enumerate(pending_fines, 1):
-                # Title
-                title_label = ctk.CTkLabel(
-                    self.pending_frame,
-                    text=fine['title'],
-                    anchor="w",
-                    fg_color="#ffffff",
-                    corner_radius=0,
-                    height=30
-                )
-                title_label.grid(row=idx, column=0, sticky="ew", padx=1, pady=1)
-                
-                # Due Date
-                due_date_label = ctk.CTkLabel(
-                    self.pending_frame,
-                    text=format_date(fine['due_date']),
-                    anchor="w",
-                    fg_color="#ffffff",
-                    corner_radius=0,
-                    height=30
-                )
-                due_date_label.grid(row=idx, column=1, sticky="ew", padx=1, pady=1)
-                
-                # Fine Amount
-                amount_label = ctk.CTkLabel(
-                    self.pending_frame,
-                    text=format_currency(fine['amount']),
-                    anchor="w",
-                    fg_color="#ffffff",
-                    corner_radius=0,
-                    height=30
-                )
-                amount_label.grid(row=idx, column=2, sticky="ew", padx=1, pady=1)
-                
-                # Pay Button
-                pay_button = ctk.CTkButton(
-                    self.pending_frame,
-                    text="$ Pay Now",
-                    fg_color="#d32f2f",
-                    text_color="white",
-                    hover_color="#b71c1c",
-                    width=80,
-                    height=25,
-                    font=ctk.CTkFont(size=12),
-                    command=lambda f_id=fine['fine_id']: self.pay_fine(f_id)
-                )
-                pay_button.grid(row=idx, column=3, padx=5, pady=5)
-        else:
-            # No pending fines message
-            no_fines_label = ctk.CTkLabel(
-                self.pending_frame,
-                text="No pending fines",
-                anchor="w",
-                fg_color="#ffffff",
-                corner_radius=0,
-                height=30
-            )
-            no_fines_label.grid(row=1, column=0, columnspan=4, sticky="ew", padx=1, pady=1)
+        self.pending_fines = pending_fines or [{'title': "No pending fines"}]
+        self.pending_table.reload()
         
         # Combine payment history with no-fine loans
         history_data = []
@@ -583,82 +486,8 @@ class FinesPaymentApp:
         history_data.sort(key=lambda x: x['date'] if x['date'] else datetime.min, reverse=True)
         
         # Display payment history
-        if history_data:
-            for idx, item in enumerate(history_data, 1):
-                # Title
-                title_label = ctk.CTkLabel(
-                    self.history_frame,
-                    text=item['title'],
-                    anchor="w",
-                    fg_color="#ffffff",
-                    corner_radius=0,
-                    height=30
-                )
-                title_label.grid(row=idx, column=0, sticky="ew", padx=1, pady=1)
-                
-                # Amount
-                amount_label = ctk.CTkLabel(
-                    self.history_frame,
-                    text=format_currency(item['amount']),
-                    anchor="w",
-                    fg_color="#ffffff",
-                    corner_radius=0,
-                    height=30
-                )
-                amount_label.grid(row=idx, column=1, sticky="ew", padx=1, pady=1)
-                
-                # Date
-                date_label = ctk.CTkLabel(
-                    self.history_frame,
-                    text=format_date(item['date']),
-                    anchor="w",
-                    fg_color="#ffffff",
-                    corner_radius=0,
-                    height=30
-                )
-                date_label.grid(row=idx, column=2, sticky="ew", padx=1, pady=1)
-                
-                # Status
-                if item['status'] == 'Paid':
-                    status_frame = ctk.CTkFrame(self.history_frame, fg_color="#4caf50", corner_radius=10, height=22)
-                    status_label = ctk.CTkLabel(
-                        status_frame, 
-                        text=item['status'],
-                        text_color="white",
-                        font=ctk.CTkFont(size=12),
-                        width=60
-                    )
-                    status_label.pack(padx=5, pady=2)
-                    status_frame.grid(row=idx, column=3, padx=5, pady=5)
-                else:
-                    status_frame = ctk.CTkFrame(self.history_frame, fg_color="#2196f3", corner_radius=10, height=22)
-                    status_label = ctk.CTkLabel(
-                        status_frame, 
-                        text=item['status'],
-                        text_color="white",
-                        font=ctk.CTkFont(size=12),
-                        width=60
-                    )
-                    status_label.pack(padx=5, pady=2)
-                    status_frame.grid(row=idx, column=3, padx=5, pady=5)
-        else:
-            # No history message
-            no_history_label = ctk.CTkLabel(
-                self.history_frame,
-                text="No payment history",
-                anchor="w",
-                fg_color="#ffffff",
-                corner_radius=0,
-                height=30
-            )
-            no_history_label.grid(row=1, column=0, columnspan=4, sticky="ew", padx=1, pady=1)
-        
-        # Update canvas scrollregion
-        self.pending_canvas.update_idletasks()
-        self.pending_canvas.configure(scrollregion=self.pending_canvas.bbox("all"))
-        
-        self.history_canvas.update_idletasks()
-        self.history_canvas.configure(scrollregion=self.history_canvas.bbox("all"))
+        self.history_data = history_data or [{'title': "No payment history", 'status': ""}]
+        self.history_table.reload()
     
     def pay_fine(self, fine_id):
         """Handle pay fine action"""
@@ -681,14 +510,14 @@ class FinesPaymentApp:
         title_label = ctk.CTkLabel(
             frame,
             text="Confirm Payment",
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=theme.font(size=18, weight="bold")
         )
         title_label.pack(pady=(0, 15))
         
         message_label = ctk.CTkLabel(
             frame,
             text="Are you sure you want to pay this fine?",
-            font=ctk.CTkFont(size=14)
+            font=theme.font(size=14)
         )
         message_label.pack(pady=(0, 20))
         
@@ -700,7 +529,7 @@ class FinesPaymentApp:
         cancel_button = ctk.CTkButton(
             button_frame,
             text="Cancel",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#f0f0f0",
             text_color="#333333",
             hover_color="#e0e0e0",
@@ -710,6 +539,7 @@ class FinesPaymentApp:
         cancel_button.pack(side="left", padx=5)
         
         # Confirm button
+        @tracing.traced("pay_fine")
         def confirm_payment():
             dialog.destroy()
             success, message = pay_fine(fine_id, self.user['user_id'])
@@ -722,7 +552,7 @@ class FinesPaymentApp:
         confirm_button = ctk.CTkButton(
             button_frame,
             text="Confirm Payment",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#d32f2f",
             hover_color="#b71c1c",
             width=120,
@@ -749,14 +579,14 @@ class FinesPaymentApp:
         message_label = ctk.CTkLabel(
             frame,
             text=message,
-            font=ctk.CTkFont(size=14)
+            font=theme.font(size=14)
         )
         message_label.pack(pady=(10, 20))
         
         ok_button = ctk.CTkButton(
             frame,
             text="OK",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#116636",
             hover_color="#0d4f29",
             command=dialog.destroy
@@ -782,7 +612,7 @@ class FinesPaymentApp:
         message_label = ctk.CTkLabel(
             frame,
             text=message,
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             text_color="#d32f2f"
         )
         message_label.pack(pady=(10, 20))
@@ -790,7 +620,7 @@ class FinesPaymentApp:
         ok_button = ctk.CTkButton(
             frame,
             text="OK",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             fg_color="#116636",
             hover_color="#0d4f29",
             command=dialog.destroy
@@ -0,0 +1,209 @@
+from datetime import datetime
+
+# ------------------- Constants -------------------
+FINES_PAGE_SIZE = 5000  # fines fetched per page; older fines load on demand
+
+FINES_SELECT = """
+    SELECT
+        f.fine_id,
+        f.loan_id,
+        f.amount,
+        f.description,
+        f.paid,
+        f.payment_date,
+        b.title,
+        u.first_name,
+        u.last_name,
+        u.email,
+        l.due_date,
+        l.return_date
+"""
+
+# Shared by the page and count queries so the progress total matches the rows streamed
+FINES_FROM = """
+    FROM
+        Fines f
+    JOIN
+        Loans l ON f.loan_id = l.loan_id
+    JOIN
+        Books b ON l.book_id = b.book_id
+    JOIN
+        Users u ON l.user_id = u.user_id
+"""
+
+# The date shown for a fine: when it was paid, or when the loan was due
+FINE_DATE_SQL = "DATE(IF(f.paid, f.payment_date, l.due_date))"
+
+# ------------------- Helpers -------------------
+def as_date(value):
+    """Reduce a datetime to its date; other values pass through"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def parse_date(text):
+    """Parse a YYYY-MM-DD filter date; empty text means no bound"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+def fine_date(fine):
+    """The date a fine is listed under"""
+    return as_date(fine['payment_date'] if fine['paid'] else fine['due_date'])
+
+def escape_like(text):
+    """Escape LIKE wildcards so user input matches literally"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# ------------------- Filters -------------------
+class FinesFilter:
+    """User and date range a fines view is restricted to"""
+
+    def __init__(self, user="", date_from=None, date_to=None):
+        self.user = (user or "").strip()
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, FinesFilter)
+            and (self.user.casefold(), self.date_from, self.date_to)
+            == (other.user.casefold(), other.date_from, other.date_to)
+        )
+
+    def __hash__(self):
+        return hash((self.user.casefold(), self.date_from, self.date_to))
+
+    def matches(self, fine):
+        """Check one fine row against the filter in memory"""
+        if self.user:
+            needle = self.user.casefold()
+            name = f"{fine['first_name']} {fine['last_name']}".casefold()
+            if needle not in name and needle not in (fine['email'] or "").casefold():
+                return False
+
+        if self.date_from or self.date_to:
+            when = fine_date(fine)
+            if when is None:
+                return False
+            if self.date_from and when < self.date_from:
+                return False
+            if self.date_to and when > self.date_to:
+                return False
+
+        return True
+
+    def narrows(self, other):
+        """Check if every fine matching this filter also matches other
+
+        When the fines matching other are all in memory, a narrower filter
+        can be answered without going back to the server.
+        """
+        if other.user and other.user.casefold() not in self.user.casefold():
+            return False
+        if other.date_from and (not self.date_from or self.date_from < other.date_from):
+            return False
+        if other.date_to and (not self.date_to or self.date_to > other.date_to):
+            return False
+        return True
+
+    def sql(self):
+        """WHERE conditions and parameters applying the filter on the server"""
+        conditions = []
+        params = []
+
+        if self.user:
+            like = f"%{escape_like(self.user)}%"
+            conditions.append("(CONCAT(u.first_name, ' ', u.last_name) LIKE %s OR u.email LIKE %s)")
+            params.extend([like, like])
+        if self.date_from:
+            conditions.append(f"{FINE_DATE_SQL} >= %s")
+            params.append(self.date_from)
+        if self.date_to:
+            conditions.append(f"{FINE_DATE_SQL} <= %s")
+            params.append(self.date_to)
+
+        return conditions, params
+
+def fines_page_query(fines_filter, after=None, limit=FINES_PAGE_SIZE):
+    """Return (query, count_query, params) for one page of fines, unpaid first, then newest first
+
+    Pages are keyed on (paid, fine_id), the sort order, so fetching the
+    next page does not rescan the pages already loaded. after is the key of
+    the last fine loaded. The count covers every matching fine from there
+    on, so a count above limit means more pages remain.
+    """
+    conditions, params = fines_filter.sql()
+    if after is not None:
+        paid, fine_id = after
+        conditions.append("(f.paid > %s OR (f.paid = %s AND f.fine_id < %s))")
+        params.extend([paid, paid, fine_id])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"{FINES_SELECT} {FINES_FROM} {where} ORDER BY f.paid, f.fine_id DESC LIMIT {int(limit)}"
+    count_query = f"SELECT COUNT(*) {FINES_FROM} {where}"
+
+    return query, count_query, tuple(params)
+
+# ------------------- Dataset -------------------
+class FinesDataset:
+    """The fines loaded for the admin page, held once and viewed through filters
+
+    Every tab (all, pending, paid) is a view over the same rows rather than
+    its own copy. server_filter is the filter the rows were fetched with;
+    complete is True once every fine matching it is in memory.
+    """
+
+    def __init__(self):
+        self.fines = {}    # fine_id -> row
+        self.order = []    # fine ids, unpaid first, then newest first
+        self.server_filter = FinesFilter()
+        self.complete = False
+        self.version = 0   # bumped whenever rows change
+
+    def clear(self, server_filter=None):
+        self.fines.clear()
+        self.order.clear()
+        self.server_filter = server_filter or FinesFilter()
+        self.complete = False
+        self.version += 1
+
+    def add(self, rows):
+        """Add or replace a chunk of rows; pages arrive in display order"""
+        for row in rows:
+            if row['fine_id'] not in self.fines:
+                self.order.append(row['fine_id'])
+            self.fines[row['fine_id']] = row
+        self.version += 1
+
+    @property
+    def last_key(self):
+        """The (paid, fine_id) key of the last fine loaded, where the next page starts"""
+        if not self.order:
+            return None
+        last = self.fines[self.order[-1]]
+        return int(bool(last['paid'])), last['fine_id']
+
+    def can_filter(self, fines_filter):
+        """Check if a filter can be answered from memory alone"""
+        return self.complete and fines_filter.narrows(self.server_filter)
+
+    def view(self, name, fines_filter=None, rows=None):
+        """Rows of a view, optionally restricted to a filter
+
+        rows limits the result to a subset, such as a freshly loaded chunk.
+        """
+        if rows is None:
+            rows = (self.fines[fine_id] for fine_id in self.order)
+        return [
+            fine for fine in rows
+            if in_view(name, fine) and (fines_filter is None or fines_filter.matches(fine))
+        ]
+
+def in_view(name, fine):
+    if name == "pending":
+        return not fine['paid']
+    if name == "paid":
+        return bool(fine['paid'])
+    return True
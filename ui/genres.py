@@ -0,0 +1,42 @@
+# ------------------- Genre Names -------------------
+def normalize_genre_name(name):
+    """Trim a genre name and collapse repeated whitespace"""
+    if name is None:
+        return ""
+    return " ".join(str(name).split())
+
+def genre_key(name):
+    """Key under which case and whitespace variants of a genre are the same genre"""
+    return normalize_genre_name(name).casefold()
+
+# ------------------- Genre Lookups -------------------
+def get_or_create_genre_id(connection, name):
+    """Return the genre_id for a name, adding it to Genres if it is new
+
+    Blank names return None (book without a genre). Genres.name is unique
+    under the case-insensitive collation, so "fantasy" resolves to the
+    existing "Fantasy" row instead of creating a duplicate.
+    """
+    name = normalize_genre_name(name)
+    if not name:
+        return None
+
+    cursor = connection.cursor()
+    try:
+        # LAST_INSERT_ID(genre_id) makes lastrowid the existing id on a duplicate
+        cursor.execute("""
+            INSERT INTO Genres (name) VALUES (%s)
+            ON DUPLICATE KEY UPDATE genre_id = LAST_INSERT_ID(genre_id)
+        """, (name,))
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+
+def get_genres(connection):
+    """Return all (genre_id, name) pairs ordered by name"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT genre_id, name FROM Genres ORDER BY name")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
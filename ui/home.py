@@ -1,16 +1,28 @@
-
+import profiling
 import customtkinter as ctk
+import theme
+import ui_metrics
+import metrics
+import tracing
 from tkinter import ttk, messagebox
 import tkinter as tk
-import mysql.connector
-import json
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import bootstrap
+import sessions
 import os
 from datetime import datetime, timedelta
-from PIL import Image, ImageTk
 import hashlib
+import search_index
+from table_actions import RowAction, TableActions
+from isbn import looks_like_isbn, looks_like_isbn_fragment, normalize_isbn
+from inventory import (
+    AVAILABLE_COPIES_SQL, checkin_loan, checkout_book, checkout_by_barcode, clean_barcode, looks_like_barcode
+)
 
 # ------------------- Constants -------------------
-SESSION_FILE = 'user_session.json'
+SESSION_KIND = "user"
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -18,62 +30,57 @@ DB_CONFIG = {
     "database": "library_system"
 }
 
+# Sort orders offered on the search page
+SORT_OPTIONS = {
+    "Sort: Relevance": "relevance",
+    "Sort: Title": "title"
+}
+SEARCH_RESULTS_SHOWN = 200   # rows put in the search table; the label gives the full count
+
 # ------------------- Database Connection -------------------
 def connect_db():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return query_log.connect(**DB_CONFIG)
     except mysql.connector.Error as err:
         messagebox.showerror("Database Connection Error", f"Failed to connect to database: {err}")
         return None
 
 # ------------------- Database Verification -------------------
+def check_schema():
+    """Check that the database is set up; returns (ok, message)
+
+    Reuses the launch probe when main.py already ran it. Safe to call off
+    the Tk thread: it shows no dialogs.
+    """
+    state = bootstrap.check(DB_CONFIG)
+    if state.error:
+        return False, f"Database verification failed: {state.error}"
+    for table in bootstrap.REQUIRED_TABLES:
+        if table.lower() not in state.tables:
+            return False, f"Table '{table}' not found. Please run main.py first."
+    if not state.ready:
+        return False, "The database setup is incomplete. Please run main.py first."
+    return True, ""
+
 def verify_database():
     """Verify that the database and tables exist"""
-    try:
-        connection = connect_db()
-        if not connection:
-            return False
-        
-        cursor = connection.cursor()
-        
-        # Check if tables exist
-        tables = ["Books", "Users", "Loans", "Fines"]
-        for table in tables:
-            cursor.execute(f"SHOW TABLES LIKE '{table}'")
-            if not cursor.fetchone():
-                messagebox.showerror("Database Error", f"Table '{table}' not found. Please run main.py first.")
-                return False
-        
-        return True
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Database verification failed: {err}")
-        return False
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+    ok, message = check_schema()
+    if not ok:
+        messagebox.showerror("Database Error", message)
+    return ok
 
 # ------------------- Session Management -------------------
 def load_session():
-    """Load user data from session file"""
-    try:
-        if os.path.exists(SESSION_FILE):
-            with open(SESSION_FILE, 'r') as f:
-                return json.load(f)
-        return None
-    except Exception as e:
-        messagebox.showerror("Session Error", f"Failed to load session: {e}")
-        return None
+    """Load user data from the active session"""
+    return sessions.current(SESSION_KIND)
 
 def save_session(user_data):
-    """Save user data to session file"""
-    with open(SESSION_FILE, 'w') as f:
-        json.dump(user_data, f)
+    """Update the active session with changed user data"""
+    sessions.update(SESSION_KIND, user_data)
 
 def clear_session():
-    """Delete the session file"""
-    if os.path.exists(SESSION_FILE):
-        os.remove(SESSION_FILE)
+    """End the active session"""
+    sessions.end(SESSION_KIND)
 
 # ------------------- Utility Functions -------------------
 def format_date(date_str):
@@ -120,8 +127,25 @@ def is_overdue(due_date_str):
         return False
 
 # ------------------- Book Functions -------------------
-def search_books(query=""):
-    """Search for books based on query, or get all books if query is empty"""
+def search_books(query="", order_by="title"):
+    """Search for books based on query, or get all books if query is empty
+
+    order_by is "title" or "relevance"; relevance ranks matches with the
+    BM25 search index instead of sorting alphabetically and returns
+    search_index.RankedResults, which loads one slice of books at a time.
+    A valid ISBN-10 or ISBN-13 is looked up directly on the normalized ISBN
+    index instead.
+    """
+    isbn_key = normalize_isbn(query) if looks_like_isbn(query) else None
+    barcode = clean_barcode(query) if looks_like_barcode(query) else None
+    
+    # Partial ISBNs are not in the index; the LIKE search matches them
+    if (order_by == "relevance" and query and len(query.strip()) > 0 and not isbn_key and not barcode
+            and not looks_like_isbn_fragment(query)):
+        results = search_index.RankedResults(search_index.scored_books(connect_db, query), get_books_by_id)
+        print(f"Search results: {len(results)} books ranked by relevance")
+        return results
+    
     connection = connect_db()
     if not connection:
         print("Database connection failed in search_books")
@@ -130,42 +154,84 @@ def search_books(query=""):
     try:
         cursor = connection.cursor(dictionary=True)
         
-        if query and len(query.strip()) > 0:
+        if isbn_key:
+            # Scanner fast path: single point lookup on the unique index
+            cursor.execute(f"""
+                SELECT 
+                    b.book_id, 
+                    b.title, 
+                    b.author, 
+                    b.isbn,
+                    b.publication_year,
+                    g.name AS genre,
+                    {AVAILABLE_COPIES_SQL} AS available_copies
+                FROM 
+                    Books b
+                LEFT JOIN 
+                    Genres g ON g.genre_id = b.genre_id
+                WHERE 
+                    b.isbn_normalized = %s
+            """, (isbn_key,))
+        elif barcode:
+            # Copy barcode: resolve the book through the unique barcode index
+            cursor.execute(f"""
+                SELECT 
+                    b.book_id, 
+                    b.title, 
+                    b.author, 
+                    b.isbn,
+                    b.publication_year,
+                    g.name AS genre,
+                    {AVAILABLE_COPIES_SQL} AS available_copies
+                FROM 
+                    BookCopies bc
+                JOIN 
+                    Books b ON b.book_id = bc.book_id
+                LEFT JOIN 
+                    Genres g ON g.genre_id = b.genre_id
+                WHERE 
+                    bc.barcode = %s
+            """, (barcode,))
+        elif query and len(query.strip()) > 0:
             # Search with filter
             search_query = f"%{query}%"
             
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT 
                     b.book_id, 
                     b.title, 
                     b.author, 
                     b.isbn,
                     b.publication_year,
-                    b.genre,
-                    b.available_copies
+                    g.name AS genre,
+                    {AVAILABLE_COPIES_SQL} AS available_copies
                 FROM 
                     Books b
+                LEFT JOIN 
+                    Genres g ON g.genre_id = b.genre_id
                 WHERE 
                     b.title LIKE %s OR 
                     b.author LIKE %s OR 
-                    b.genre LIKE %s OR
+                    g.name LIKE %s OR
                     b.isbn LIKE %s
                 ORDER BY 
                     b.title
             """, (search_query, search_query, search_query, search_query))
         else:
             # Get all books
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT 
                     b.book_id, 
                     b.title, 
                     b.author, 
                     b.isbn,
                     b.publication_year,
-                    b.genre,
-                    b.available_copies
+                    g.name AS genre,
+                    {AVAILABLE_COPIES_SQL} AS available_copies
                 FROM 
                     Books b
+                LEFT JOIN 
+                    Genres g ON g.genre_id = b.genre_id
                 ORDER BY 
                     b.title
                 LIMIT 20
@@ -185,6 +251,40 @@ def search_books(query=""):
             cursor.close()
             connection.close()
 
+def get_books_by_id(book_ids):
+    """Load the search rows of a slice of ranked books, in any order"""
+    connection = connect_db()
+    if not connection:
+        return []
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        placeholders = ", ".join(["%s"] * len(book_ids))
+        cursor.execute(f"""
+            SELECT 
+                b.book_id, 
+                b.title, 
+                b.author, 
+                b.isbn,
+                b.publication_year,
+                g.name AS genre,
+                {AVAILABLE_COPIES_SQL} AS available_copies
+            FROM 
+                Books b
+            LEFT JOIN 
+                Genres g ON g.genre_id = b.genre_id
+            WHERE 
+                b.book_id IN ({placeholders})
+        """, list(book_ids))
+        return cursor.fetchall()
+    except mysql.connector.Error as err:
+        print(f"Database Error in get_books_by_id: {err}")
+        return []
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
 def get_user_borrowed_books(user_id):
     """Get all books borrowed by a user"""
     connection = connect_db()
@@ -226,6 +326,7 @@ def get_user_borrowed_books(user_id):
             cursor.close()
             connection.close()
 
+@metrics.counted(metrics.RETURNS)
 def return_book(loan_id, user_id):
     """Return a borrowed book"""
     connection = connect_db()
@@ -247,7 +348,7 @@ def return_book(loan_id, user_id):
         
         # Update loan return date
         cursor.execute(
-            "UPDATE Loans SET return_date = CURDATE() WHERE loan_id = %s AND user_id = %s", 
+            "UPDATE Loans SET return_date = CURDATE() WHERE loan_id = %s AND user_id = %s AND return_date IS NULL", 
             (loan_id, user_id)
         )
         
@@ -256,11 +357,8 @@ def return_book(loan_id, user_id):
             print(f"No rows updated for loan {loan_id}")
             return False
         
-        # Increment available copies
-        cursor.execute(
-            "UPDATE Books SET available_copies = available_copies + 1 WHERE book_id = %s", 
-            (book_id,)
-        )
+        # Put the copy back on the shelf
+        checkin_loan(cursor, loan_id)
         
         # Check if the book is overdue and create fine if needed
         if is_overdue(due_date):
@@ -286,8 +384,9 @@ def return_book(loan_id, user_id):
             cursor.close()
             connection.close()
 
-def borrow_book(book_id, user_id):
-    """Borrow a book"""
+@metrics.counted(metrics.BORROWS)
+def borrow_book(book_id, user_id, barcode=None):
+    """Borrow a book; with a scanned barcode, that copy is the one lent"""
     connection = connect_db()
     if not connection:
         return False
@@ -304,31 +403,16 @@ def borrow_book(book_id, user_id):
             messagebox.showinfo("Already Borrowed", "You already have this book borrowed.")
             return False
         
-        # Check if book has available copies
-        cursor.execute("SELECT available_copies FROM Books WHERE book_id = %s", (book_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            print(f"No book found with ID {book_id}")
-            return False
-        
-        available_copies = result[0]
+        # Lend the scanned copy, or claim any available one (due 14 days from now)
+        if barcode:
+            loan_id, message = checkout_by_barcode(cursor, barcode, user_id, book_id)
+            if not loan_id:
+                messagebox.showinfo("Not Available", message)
+                return False
+            connection.commit()
+            return True
         
-        if available_copies > 0:
-            # Create loan record with due date 14 days from now
-            due_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
-            
-            cursor.execute(
-                "INSERT INTO Loans (user_id, book_id, loan_date, due_date) VALUES (%s, %s, CURDATE(), %s)", 
-                (user_id, book_id, due_date)
-            )
-            
-            # Decrement available copies
-            cursor.execute(
-                "UPDATE Books SET available_copies = available_copies - 1 WHERE book_id = %s", 
-                (book_id,)
-            )
-            
+        if checkout_book(cursor, book_id, user_id):
             connection.commit()
             return True
         else:
@@ -384,6 +468,7 @@ def get_user_fines(user_id):
             cursor.close()
             connection.close()
 
+@metrics.counted(metrics.FINE_PAYMENTS)
 def pay_fine(fine_id, user_id):
     """Mark a fine as paid"""
     connection = connect_db()
@@ -558,6 +643,9 @@ def get_user_summary(user_id):
 class LibraryApp:
     def __init__(self, root, start_page=None):
         self.root = root
+        theme.use_root(root)
+        ui_metrics.install(root, "home")
+        profiling.install(self, "home")
         self.root.title("Library Management System - User Dashboard")
         self.root.geometry("1200x700")
         
@@ -565,14 +653,9 @@ class LibraryApp:
         ctk.set_appearance_mode("light")
         ctk.set_default_color_theme("green")
         
-        # Verify database first
-        if not verify_database():
-            messagebox.showerror("Database Error", "Database verification failed. Please run main.py first.")
-            self.root.destroy()
-            try:
-                os.system("python main.py")
-            except:
-                pass
+        # Verify database first; with fast start the check runs in the background instead
+        if not fast_start.ENABLED and not verify_database():
+            self.open_setup()
             return
         
         # Load user session
@@ -583,6 +666,7 @@ class LibraryApp:
             return
         
         print(f"User session loaded successfully: {self.user['first_name']} {self.user['last_name']}")
+        sessions.watch(self.root, SESSION_KIND, self.logout)
         
         # Initialize frames dictionary to keep track of different pages
         self.frames = {}
@@ -597,7 +681,14 @@ class LibraryApp:
         # Create main content area
         self.create_main_content()
         
-        # Show appropriate start page
+        if fast_start.ENABLED:
+            fast_start.run_in_background(self.root, check_schema, self.schema_checked)
+        
+        # Show the start page once the shell is on screen
+        fast_start.after_first_paint(self.root, lambda: self.show_start_page(start_page))
+    
+    def show_start_page(self, start_page):
+        """Show the page the screen was opened with"""
         if start_page == "borrowed":
             self.show_borrowed_books()
         elif start_page == "fines":
@@ -608,6 +699,24 @@ class LibraryApp:
             # By default, show dashboard
             self.show_dashboard()
     
+    def schema_checked(self, result):
+        """Handle the background database verification"""
+        if isinstance(result, Exception):
+            result = (False, f"Database verification failed: {result}")
+        ok, message = result
+        if not ok:
+            messagebox.showerror("Database Error", message)
+            self.open_setup()
+    
+    def open_setup(self):
+        """Send the user to main.py to create or repair the database"""
+        messagebox.showerror("Database Error", "Database verification failed. Please run main.py first.")
+        self.root.destroy()
+        try:
+            os.system("python main.py")
+        except:
+            pass
+    
     def create_sidebar(self):
         """Create the sidebar with navigation buttons"""
         sidebar = ctk.CTkFrame(self.root, width=210, fg_color="#116636", corner_radius=0)
@@ -615,14 +724,14 @@ class LibraryApp:
         sidebar.grid_propagate(False)  # Prevent the frame from shrinking
 
         # Sidebar Title
-        title_label = ctk.CTkLabel(sidebar, text="📑 Library System", font=ctk.CTkFont(size=16, weight="bold"), 
+        title_label = ctk.CTkLabel(sidebar, text="📑 Library System", font=theme.font(size=16, weight="bold"), 
                                   text_color="white", anchor="w", padx=10, pady=10)
         title_label.pack(fill="x", pady=(20, 10))
         
         # User welcome message
         user_welcome = ctk.CTkLabel(sidebar, 
                                   text=f"Welcome,\n{self.user['first_name']} {self.user['last_name']}", 
-                                  font=ctk.CTkFont(size=12, weight="bold"), 
+                                  font=theme.font(size=12, weight="bold"), 
                                   text_color="white", anchor="w", padx=10, pady=10)
         user_welcome.pack(fill="x", pady=(0, 20))
         
@@ -642,7 +751,7 @@ class LibraryApp:
         ]
 
         for text, command in menu_items:
-            button = ctk.CTkButton(sidebar, text=text, font=ctk.CTkFont(size=12), 
+            button = ctk.CTkButton(sidebar, text=text, font=theme.font(size=12), 
                                   fg_color="transparent", text_color="white", anchor="w",
                                   hover_color="#0d4f29", corner_radius=0, height=40,
                                   command=command)
@@ -670,6 +779,7 @@ class LibraryApp:
             widget.destroy()
     
     # ------------------- Page Navigation -------------------
+    @ui_metrics.timed()
     def show_dashboard(self):
         """Show the dashboard page"""
         print("Loading dashboard...")
@@ -681,7 +791,7 @@ class LibraryApp:
         title_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
 
         dash_title = ctk.CTkLabel(title_frame, text="Your Library Dashboard", 
-                                 font=ctk.CTkFont(size=20, weight="bold"))
+                                 font=theme.font(size=20, weight="bold"))
         dash_title.pack(pady=10)
 
         # Separator line
@@ -708,7 +818,7 @@ class LibraryApp:
             box_frame = ctk.CTkFrame(summary_frame, fg_color="white", border_width=1, border_color="#d1d1d1", corner_radius=5)
             box_frame.grid(row=0, column=i, padx=10, sticky="nsew", ipadx=15, ipady=15)
             
-            summary_title = ctk.CTkLabel(box_frame, text=title, font=ctk.CTkFont(size=12))
+            summary_title = ctk.CTkLabel(box_frame, text=title, font=theme.font(size=12))
             summary_title.pack(anchor="center")
             
             # Make the value red if it's a positive number of due books or a non-zero fine
@@ -716,7 +826,7 @@ class LibraryApp:
                                       (title == "Pending Fines" and value != "$0.00")) else "black"
             
             summary_value = ctk.CTkLabel(box_frame, text=value, 
-                                        font=ctk.CTkFont(size=24, weight="bold"),
+                                        font=theme.font(size=24, weight="bold"),
                                         text_color=text_color)
             summary_value.pack(anchor="center", pady=10)
 
@@ -725,17 +835,17 @@ class LibraryApp:
         search_frame.grid(row=3, column=0, sticky="ew", pady=10)
 
         search_label = ctk.CTkLabel(search_frame, text="🔍 Quick Search", 
-                                   font=ctk.CTkFont(size=14, weight="bold"), anchor="w")
+                                   font=theme.font(size=14, weight="bold"), anchor="w")
         search_label.pack(anchor="w", pady=(10, 5))
 
         search_entry_frame = ctk.CTkFrame(search_frame, fg_color="transparent")
         search_entry_frame.pack(fill="x")
 
         search_entry = ctk.CTkEntry(search_entry_frame, placeholder_text="Enter book title, author, or genre", 
-                                   font=ctk.CTkFont(size=12), height=35, border_width=1, border_color="#d1d1d1")
+                                   font=theme.font(size=12), height=35, border_width=1, border_color="#d1d1d1")
         search_entry.pack(side="left", fill="x", expand=True)
 
-        search_button = ctk.CTkButton(search_entry_frame, text="🔍 Search", font=ctk.CTkFont(size=12), 
+        search_button = ctk.CTkButton(search_entry_frame, text="🔍 Search", font=theme.font(size=12), 
                                      fg_color="#116636", hover_color="#0d4f29", corner_radius=3, height=35,
                                      command=lambda: self.show_search_results(search_entry.get()))
         search_button.pack(side="left", padx=(10, 0))
@@ -753,21 +863,17 @@ class LibraryApp:
         books_frame.grid_columnconfigure(0, weight=1)
 
         books_label = ctk.CTkLabel(books_frame, text="📚 Recent Borrowed Books", 
-                                  font=ctk.CTkFont(size=14, weight="bold"), anchor="w")
+                                  font=theme.font(size=14, weight="bold"), anchor="w")
         books_label.grid(row=0, column=0, sticky="w", pady=(20, 10))
         
         # Button to view all borrowed books
-        view_all_button = ctk.CTkButton(books_frame, text="View All", font=ctk.CTkFont(size=12), 
+        view_all_button = ctk.CTkButton(books_frame, text="View All", font=theme.font(size=12), 
                                       fg_color="#116636", hover_color="#0d4f29", corner_radius=3, height=30,
                                       command=self.show_borrowed_books)
         view_all_button.grid(row=0, column=1, sticky="e", pady=(20, 10))
 
         # Custom styling for ttk.Treeview
-        style = ttk.Style()
-        style.theme_use("clam")  # Use clam theme as base
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
 
         # Create the treeview with columns
         columns = ("Title", "Author", "Due Date", "Status", "Action")
@@ -806,6 +912,7 @@ class LibraryApp:
                 self.dashboard_loan_ids[item_id] = book['loan_id']
             
             
+            @tracing.traced("return_book_action")
             def on_return_click(tree_item):
                 loan_id = self.dashboard_loan_ids.get(tree_item)
                 if loan_id:
@@ -815,28 +922,12 @@ class LibraryApp:
                     else:
                         messagebox.showerror("Error", "Failed to return book.")
             
-            def create_return_buttons():
-                for item in borrowed_books_tree.get_children():
-                    bbox = borrowed_books_tree.bbox(item, column="Action")
-                    if bbox:
-                        button_frame = ctk.CTkFrame(borrowed_books_tree, fg_color="transparent")
-                        button_frame.place(x=bbox[0] + 30, y=bbox[1])
-                        
-                        return_button = ctk.CTkButton(
-                            button_frame, 
-                            text="↩ Return", 
-                            fg_color="#116636", 
-                            hover_color="#0d4f29",
-                            corner_radius=3, 
-                            width=80, 
-                            height=25, 
-                            font=ctk.CTkFont(size=10),
-                            command=lambda i=item: on_return_click(i)
-                        )
-                        return_button.pack()
-            
-            # Schedule creation of buttons after treeview is ready
-            self.root.after(100, create_return_buttons)
+            # One delegated handler for the Action column (click, right-click, Enter)
+            return_actions = TableActions(borrowed_books_tree, "Action", [
+                RowAction("↩ Return", on_return_click, "<Return>",
+                          enabled=lambda item: item in self.dashboard_loan_ids)
+            ])
+            return_actions.refresh_labels()
         else:
             # No borrowed books message
             no_books_message = borrowed_books_tree.insert("", "end", values=(
@@ -860,7 +951,7 @@ class LibraryApp:
         title_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
 
         title = ctk.CTkLabel(title_frame, text="Search for Books", 
-                           font=ctk.CTkFont(size=20, weight="bold"))
+                           font=theme.font(size=20, weight="bold"))
         title.pack(pady=10)
 
         # Separator line
@@ -872,21 +963,28 @@ class LibraryApp:
         search_frame.grid(row=2, column=0, sticky="ew", pady=15)
 
         search_label = ctk.CTkLabel(search_frame, text="🔍 Search by Title, Author, Genre, or ISBN", 
-                                   font=ctk.CTkFont(size=14, weight="bold"), anchor="w")
+                                   font=theme.font(size=14, weight="bold"), anchor="w")
         search_label.pack(anchor="w", pady=(5, 10))
 
         search_entry_frame = ctk.CTkFrame(search_frame, fg_color="transparent")
         search_entry_frame.pack(fill="x")
 
         self.search_entry = ctk.CTkEntry(search_entry_frame, placeholder_text="Enter search terms...", 
-                                   font=ctk.CTkFont(size=12), height=40, border_width=1, border_color="#d1d1d1")
+                                   font=theme.font(size=12), height=40, border_width=1, border_color="#d1d1d1")
         self.search_entry.pack(side="left", fill="x", expand=True)
 
-        search_button = ctk.CTkButton(search_entry_frame, text="🔍 Search", font=ctk.CTkFont(size=12), 
+        search_button = ctk.CTkButton(search_entry_frame, text="🔍 Search", font=theme.font(size=12), 
                                      fg_color="#116636", hover_color="#0d4f29", corner_radius=3, height=40,
                                      command=lambda: self.perform_search(self.search_entry.get()))
         search_button.pack(side="left", padx=(10, 0))
         
+        # Result ordering
+        self.search_order = ctk.CTkOptionMenu(search_entry_frame, values=list(SORT_OPTIONS), font=theme.font(size=12),
+                                             fg_color="#116636", button_color="#0d4f29", button_hover_color="#0d4f29",
+                                             width=150, height=40)
+        self.search_order.set("Sort: Relevance")
+        self.search_order.pack(side="left", padx=(10, 0))
+        
         # Bind Enter key to search function
         self.search_entry.bind("<Return>", lambda event: self.perform_search(self.search_entry.get()))
         
@@ -897,15 +995,11 @@ class LibraryApp:
         results_frame.grid_columnconfigure(0, weight=1)
 
         self.results_label = ctk.CTkLabel(results_frame, text="Enter a search term above to find books", 
-                                        font=ctk.CTkFont(size=12), anchor="w")
+                                        font=theme.font(size=12), anchor="w")
         self.results_label.grid(row=0, column=0, sticky="w", pady=(10, 5))
 
         # Custom styling for ttk.Treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
 
         # Create the treeview with columns
         columns = ("Title", "Author", "Genre", "Year", "ISBN", "Available", "Action")
@@ -932,7 +1026,11 @@ class LibraryApp:
         
         # Store book_ids for borrow actions
         self.search_book_ids = {}
+        
+        # Delegated Action column handler; perform_search supplies the actions
+        self.borrow_actions = TableActions(self.books_tree, "Action", [], empty_text="Unavailable")
     
+    @tracing.traced()
     def perform_search(self, query):
         """Search for books and display results"""
         if not query or len(query.strip()) == 0:
@@ -946,10 +1044,16 @@ class LibraryApp:
             self.books_tree.delete(item)
         
         # Perform search
-        results = search_books(query)
-        
-        # Update results label
-        self.results_label.configure(text=f"Found {len(results)} books matching '{query}'")
+        results = search_books(query, SORT_OPTIONS[self.search_order.get()])
+        metrics.SEARCHES.inc("ok" if results else "empty")
+        
+        # Update results label; ranked results are loaded only as far as they are shown
+        total = len(results)
+        results = results[:SEARCH_RESULTS_SHOWN]
+        if total > len(results):
+            self.results_label.configure(text=f"Showing the first {len(results)} of {total} books matching '{query}'")
+        else:
+            self.results_label.configure(text=f"Found {total} books matching '{query}'")
         
         # Add results to treeview and store book_ids
         self.search_book_ids = {}
@@ -969,56 +1073,31 @@ class LibraryApp:
                 self.search_book_ids[item_id] = book['book_id']
             
             # Add Borrow buttons for books with available copies
+            @tracing.traced("borrow_book_action")
             def on_borrow_click(tree_item):
                 book_id = self.search_book_ids.get(tree_item)
+                # A search by copy barcode lends that copy
+                barcode = clean_barcode(query) if looks_like_barcode(query) else None
                 if book_id:
-                    if borrow_book(book_id, self.user['user_id']):
+                    if borrow_book(book_id, self.user['user_id'], barcode):
                         messagebox.showinfo("Success", "Book borrowed successfully! You can view it in 'My Borrowed Books'.")
                         self.perform_search(query)  # Refresh results
                     else:
                         messagebox.showerror("Error", "Failed to borrow book.")
             
-            def create_borrow_buttons():
-                for item in self.books_tree.get_children():
-                    values = self.books_tree.item(item, 'values')
-                    try:
-                        available = int(values[5])  # Available copies column
-                    except:
-                        available = 0
-                    
-                    bbox = self.books_tree.bbox(item, column="Action")
-                    if bbox:
-                        button_frame = ctk.CTkFrame(self.books_tree, fg_color="transparent")
-                        button_frame.place(x=bbox[0] + 10, y=bbox[1])
-                        
-                        if available > 0:
-                            borrow_button = ctk.CTkButton(
-                                button_frame, 
-                                text="Borrow", 
-                                fg_color="#116636", 
-                                hover_color="#0d4f29",
-                                corner_radius=3, 
-                                width=80, 
-                                height=25, 
-                                font=ctk.CTkFont(size=10),
-                                command=lambda i=item: on_borrow_click(i)
-                            )
-                            borrow_button.pack()
-                        else:
-                            unavailable_label = ctk.CTkLabel(
-                                button_frame,
-                                text="Unavailable",
-                                fg_color="#f0f0f0",
-                                text_color="gray",
-                                corner_radius=3,
-                                width=80,
-                                height=25,
-                                font=ctk.CTkFont(size=10)
-                            )
-                            unavailable_label.pack()
+            def is_available(item):
+                values = self.books_tree.item(item, 'values')
+                try:
+                    return int(values[5]) > 0  # Available copies column
+                except (ValueError, IndexError):
+                    return False
             
-            # Schedule creation of buttons after treeview is ready
-            self.root.after(100, create_borrow_buttons)
+            # One delegated handler for the Action column (click, right-click, Enter)
+            self.borrow_actions.actions = [
+                RowAction("Borrow", on_borrow_click, enabled=is_available)
+            ]
+            self.borrow_actions.default_action = self.borrow_actions.actions[0]
+            self.borrow_actions.refresh_labels()
         else:
             # No results found
             self.books_tree.insert("", "end", values=(
@@ -1036,7 +1115,7 @@ class LibraryApp:
         title_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
 
         title = ctk.CTkLabel(title_frame, text="My Borrowed Books", 
-                           font=ctk.CTkFont(size=20, weight="bold"))
+                           font=theme.font(size=20, weight="bold"))
         title.pack(pady=10)
 
         # Separator line
@@ -1054,15 +1133,11 @@ class LibraryApp:
         
         books_label = ctk.CTkLabel(books_frame, 
                                  text=f"You currently have {len(borrowed_books)} borrowed books", 
-                                 font=ctk.CTkFont(size=14), anchor="w")
+                                 font=theme.font(size=14), anchor="w")
         books_label.grid(row=0, column=0, sticky="w", pady=(10, 15))
 
         # Custom styling for ttk.Treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
 
         # Create the treeview with columns
         columns = ("Title", "Author", "Borrowed Date", "Due Date", "Status", "Fine", "Action")
@@ -1114,6 +1189,7 @@ class LibraryApp:
                 self.borrowed_loan_ids[item_id] = book['loan_id']
             
             # Add Return buttons
+            @tracing.traced("return_book_action")
             def on_return_click(tree_item):
                 loan_id = self.borrowed_loan_ids.get(tree_item)
                 if loan_id:
@@ -1123,28 +1199,12 @@ class LibraryApp:
                     else:
                         messagebox.showerror("Error", "Failed to return book.")
             
-            def create_return_buttons():
-                for item in borrowed_books_tree.get_children():
-                    bbox = borrowed_books_tree.bbox(item, column="Action")
-                    if bbox:
-                        button_frame = ctk.CTkFrame(borrowed_books_tree, fg_color="transparent")
-                        button_frame.place(x=bbox[0] + 10, y=bbox[1])
-                        
-                        return_button = ctk.CTkButton(
-                            button_frame, 
-                            text="Return", 
-                            fg_color="#116636", 
-                            hover_color="#0d4f29",
-                            corner_radius=3, 
-                            width=80, 
-                            height=25, 
-                            font=ctk.CTkFont(size=10),
-                            command=lambda i=item: on_return_click(i)
-                        )
-                        return_button.pack()
-            
-            # Schedule creation of buttons after treeview is ready
-            self.root.after(100, create_return_buttons)
+            # One delegated handler for the Action column (click, right-click, Enter)
+            return_actions = TableActions(borrowed_books_tree, "Action", [
+                RowAction("↩ Return", on_return_click, "<Return>",
+                          enabled=lambda item: item in self.borrowed_loan_ids)
+            ])
+            return_actions.refresh_labels()
         else:
             # No borrowed books, show message
             no_books_frame = ctk.CTkFrame(books_frame, fg_color="white", corner_radius=10)
@@ -1152,7 +1212,7 @@ class LibraryApp:
             
             no_books_label = ctk.CTkLabel(no_books_frame, 
                                        text="You haven't borrowed any books yet.\nVisit the Search Books page to borrow books!", 
-                                       font=ctk.CTkFont(size=14))
+                                       font=theme.font(size=14))
             no_books_label.pack(pady=50)
             
             search_button = ctk.CTkButton(no_books_frame, text="Search Books", 
@@ -1171,7 +1231,7 @@ class LibraryApp:
         title_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
 
         title = ctk.CTkLabel(title_frame, text="Fines & Fees", 
-                           font=ctk.CTkFont(size=20, weight="bold"))
+                           font=theme.font(size=20, weight="bold"))
         title.pack(pady=10)
 
         # Separator line
@@ -1183,7 +1243,7 @@ class LibraryApp:
         info_frame.grid(row=2, column=0, sticky="ew", pady=15)
         
         info_text = "• Overdue fees are charged at $0.50 per day\n• Payments can be made online or at the library front desk"
-        info_label = ctk.CTkLabel(info_frame, text=info_text, font=ctk.CTkFont(size=12), justify="left")
+        info_label = ctk.CTkLabel(info_frame, text=info_text, font=theme.font(size=12), justify="left")
         info_label.pack(anchor="w")
         
         # Fines Frame
@@ -1203,17 +1263,13 @@ class LibraryApp:
         
         fines_label = ctk.CTkLabel(fines_frame, 
                                  text=f"Outstanding Fines: ${total_outstanding:.2f}", 
-                                 font=ctk.CTkFont(size=14, weight="bold"), 
+                                 font=theme.font(size=14, weight="bold"), 
                                  text_color="#d9534f" if total_outstanding > 0 else "black",
                                  anchor="w")
         fines_label.grid(row=0, column=0, sticky="w", pady=(10, 15))
 
         # Custom styling for ttk.Treeview
-        style = ttk.Style()
-        style.theme_use("clam")
-        style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
-        style.configure("Treeview.Heading", background="#f0f0f0", foreground="black", font=("Arial", 10, "bold"))
-        style.map("Treeview", background=[("selected", "#116636")], foreground=[("selected", "white")])
+        theme.apply_treeview_style()
 
         # Create the treeview with columns
         columns = ("Book", "Amount", "Status", "Action")
@@ -1265,6 +1321,7 @@ class LibraryApp:
                 self.fine_ids[item_id] = fine['fine_id']
             
             # Add Pay buttons for unpaid fines
+            @tracing.traced("pay_fine")
             def on_pay_click(tree_item):
                 fine_id = self.fine_ids.get(tree_item)
                 if fine_id:
@@ -1276,32 +1333,12 @@ class LibraryApp:
                         else:
                             messagebox.showerror("Error", "Failed to process payment.")
             
-            def create_pay_buttons():
-                for item in fines_tree.get_children():
-                    values = fines_tree.item(item, 'values')
-                    status = values[2]
-                    
-                    if status == "Unpaid":
-                        bbox = fines_tree.bbox(item, column="Action")
-                        if bbox:
-                            button_frame = ctk.CTkFrame(fines_tree, fg_color="transparent")
-                            button_frame.place(x=bbox[0] + 30, y=bbox[1])
-                            
-                            pay_button = ctk.CTkButton(
-                                button_frame, 
-                                text="Pay Now", 
-                                fg_color="#d9534f", 
-                                hover_color="#c9302c",
-                                corner_radius=3, 
-                                width=80, 
-                                height=25, 
-                                font=ctk.CTkFont(size=10),
-                                command=lambda i=item: on_pay_click(i)
-                            )
-                            pay_button.pack()
-            
-            # Schedule creation of buttons after treeview is ready
-            self.root.after(100, create_pay_buttons)
+            # One delegated handler for the Action column (click, right-click, Enter)
+            pay_actions = TableActions(fines_tree, "Action", [
+                RowAction("💳 Pay Now", on_pay_click, "<Return>",
+                          enabled=lambda item: fines_tree.item(item, 'values')[2] == "Unpaid")
+            ])
+            pay_actions.refresh_labels()
         else:
             # No fines, show message
             no_fines_frame = ctk.CTkFrame(fines_frame, fg_color="white", corner_radius=10)
@@ -1309,7 +1346,7 @@ class LibraryApp:
             
             no_fines_label = ctk.CTkLabel(no_fines_frame, 
                                        text="You have no fines or fees.\nThank you for returning your books on time!", 
-                                       font=ctk.CTkFont(size=14))
+                                       font=theme.font(size=14))
             no_fines_label.pack(pady=50)
     
     def show_profile(self):
@@ -1329,7 +1366,7 @@ class LibraryApp:
         title_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
 
         title = ctk.CTkLabel(title_frame, text="My Profile", 
-                           font=ctk.CTkFont(size=20, weight="bold"))
+                           font=theme.font(size=20, weight="bold"))
         title.pack(pady=10)
 
         # Separator line
@@ -1346,11 +1383,11 @@ class LibraryApp:
         header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 30), ipady=10)
         
         role_text = f"Account Type: {profile['role'].capitalize()}"
-        role_label = ctk.CTkLabel(header_frame, text=role_text, font=ctk.CTkFont(size=14, weight="bold"))
+        role_label = ctk.CTkLabel(header_frame, text=role_text, font=theme.font(size=14, weight="bold"))
         role_label.pack(side="left", padx=20)
         
         joined_text = f"Member Since: {format_date(profile['registration_date'])}"
-        joined_label = ctk.CTkLabel(header_frame, text=joined_text, font=ctk.CTkFont(size=14))
+        joined_label = ctk.CTkLabel(header_frame, text=joined_text, font=theme.font(size=14))
         joined_label.pack(side="right", padx=20)
         
         # Profile form
@@ -1359,20 +1396,20 @@ class LibraryApp:
         form_frame.grid_columnconfigure(1, weight=1)
         
         # First Name
-        ctk.CTkLabel(form_frame, text="First Name:", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, sticky="w", pady=(10, 5))
-        first_name_entry = ctk.CTkEntry(form_frame, width=300, height=35, font=ctk.CTkFont(size=12))
+        ctk.CTkLabel(form_frame, text="First Name:", font=theme.font(size=14, weight="bold")).grid(row=0, column=0, sticky="w", pady=(10, 5))
+        first_name_entry = ctk.CTkEntry(form_frame, width=300, height=35, font=theme.font(size=12))
         first_name_entry.grid(row=0, column=1, sticky="w", pady=(10, 5))
         first_name_entry.insert(0, profile['first_name'])
         
         # Last Name
-        ctk.CTkLabel(form_frame, text="Last Name:", font=ctk.CTkFont(size=14, weight="bold")).grid(row=1, column=0, sticky="w", pady=5)
-        last_name_entry = ctk.CTkEntry(form_frame, width=300, height=35, font=ctk.CTkFont(size=12))
+        ctk.CTkLabel(form_frame, text="Last Name:", font=theme.font(size=14, weight="bold")).grid(row=1, column=0, sticky="w", pady=5)
+        last_name_entry = ctk.CTkEntry(form_frame, width=300, height=35, font=theme.font(size=12))
         last_name_entry.grid(row=1, column=1, sticky="w", pady=5)
         last_name_entry.insert(0, profile['last_name'])
         
         # Email
-        ctk.CTkLabel(form_frame, text="Email:", font=ctk.CTkFont(size=14, weight="bold")).grid(row=2, column=0, sticky="w", pady=5)
-        email_entry = ctk.CTkEntry(form_frame, width=300, height=35, font=ctk.CTkFont(size=12))
+        ctk.CTkLabel(form_frame, text="Email:", font=theme.font(size=14, weight="bold")).grid(row=2, column=0, sticky="w", pady=5)
+        email_entry = ctk.CTkEntry(form_frame, width=300, height=35, font=theme.font(size=12))
         email_entry.grid(row=2, column=1, sticky="w", pady=5)
         email_entry.insert(0, profile['email'])
         
@@ -1385,21 +1422,21 @@ class LibraryApp:
         password_frame.grid(row=3, column=0, sticky="nsew", padx=40, pady=10)
         password_frame.grid_columnconfigure(1, weight=1)
         
-        ctk.CTkLabel(password_frame, text="Change Password", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 10))
+        ctk.CTkLabel(password_frame, text="Change Password", font=theme.font(size=14, weight="bold")).grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 10))
         
         # Current Password
-        ctk.CTkLabel(password_frame, text="Current Password:", font=ctk.CTkFont(size=14)).grid(row=1, column=0, sticky="w", pady=5)
-        current_password_entry = ctk.CTkEntry(password_frame, width=300, height=35, font=ctk.CTkFont(size=12), show="•")
+        ctk.CTkLabel(password_frame, text="Current Password:", font=theme.font(size=14)).grid(row=1, column=0, sticky="w", pady=5)
+        current_password_entry = ctk.CTkEntry(password_frame, width=300, height=35, font=theme.font(size=12), show="•")
         current_password_entry.grid(row=1, column=1, sticky="w", pady=5)
         
         # New Password
-        ctk.CTkLabel(password_frame, text="New Password:", font=ctk.CTkFont(size=14)).grid(row=2, column=0, sticky="w", pady=5)
-        new_password_entry = ctk.CTkEntry(password_frame, width=300, height=35, font=ctk.CTkFont(size=12), show="•")
+        ctk.CTkLabel(password_frame, text="New Password:", font=theme.font(size=14)).grid(row=2, column=0, sticky="w", pady=5)
+        new_password_entry = ctk.CTkEntry(password_frame, width=300, height=35, font=theme.font(size=12), show="•")
         new_password_entry.grid(row=2, column=1, sticky="w", pady=5)
         
         # Confirm New Password
-        ctk.CTkLabel(password_frame, text="Confirm New Password:", font=ctk.CTkFont(size=14)).grid(row=3, column=0, sticky="w", pady=5)
-        confirm_password_entry = ctk.CTkEntry(password_frame, width=300, height=35, font=ctk.CTkFont(size=12), show="•")
+        ctk.CTkLabel(password_frame, text="Confirm New Password:", font=theme.font(size=14)).grid(row=3, column=0, sticky="w", pady=5)
+        confirm_password_entry = ctk.CTkEntry(password_frame, width=300, height=35, font=theme.font(size=12), show="•")
         confirm_password_entry.grid(row=3, column=1, sticky="w", pady=5)
         
         # Action buttons
@@ -1456,7 +1493,7 @@ class LibraryApp:
                     self.show_profile()  # Refresh page
         
         # Save button
-        save_button = ctk.CTkButton(button_frame, text="Save Changes", font=ctk.CTkFont(size=14), 
+        save_button = ctk.CTkButton(button_frame, text="Save Changes", font=theme.font(size=14), 
                                   fg_color="#116636", hover_color="#0d4f29", width=150, height=40,
                                   command=save_profile)
         save_button.pack(side="right")
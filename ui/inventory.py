@@ -0,0 +1,176 @@
+import re
+
+# ------------------- Constants -------------------
+COPY_STATUSES = ("available", "on_loan", "lost", "withdrawn")
+COPY_CONDITIONS = ("new", "good", "worn", "damaged")
+
+LOAN_DAYS = 14
+
+# Barcodes the library prints for its own copies: "C" + zero-padded copy_id
+BARCODE_FORMAT = "C{:08d}"
+BARCODE_PATTERN = re.compile(r"^C\d{8}$")
+
+# Availability is derived from BookCopies.status rather than stored counters.
+# Each fragment is a range count on the (book_id, status) index for one book
+# and expects the outer query to alias Books as "b".
+AVAILABLE_COPIES_SQL = (
+    "(SELECT COUNT(*) FROM BookCopies c WHERE c.book_id = b.book_id AND c.status = 'available')"
+)
+ON_LOAN_COPIES_SQL = (
+    "(SELECT COUNT(*) FROM BookCopies c WHERE c.book_id = b.book_id AND c.status = 'on_loan')"
+)
+TOTAL_COPIES_SQL = (
+    "(SELECT COUNT(*) FROM BookCopies c WHERE c.book_id = b.book_id AND c.status <> 'withdrawn')"
+)
+HAS_AVAILABLE_COPY_SQL = (
+    "EXISTS (SELECT 1 FROM BookCopies c WHERE c.book_id = b.book_id AND c.status = 'available')"
+)
+
+# ------------------- Barcodes -------------------
+def clean_barcode(text):
+    """Strip whitespace a scanner may add and uppercase the barcode"""
+    if text is None:
+        return ""
+    return str(text).strip().upper()
+
+def looks_like_barcode(text):
+    """Check if input has the shape of a library copy barcode"""
+    return BARCODE_PATTERN.match(clean_barcode(text)) is not None
+
+def find_copy_by_barcode(cursor, barcode):
+    """Return (copy_id, book_id, status) for a barcode via its unique index, or None"""
+    cursor.execute(
+        "SELECT copy_id, book_id, status FROM BookCopies WHERE barcode = %s",
+        (clean_barcode(barcode),)
+    )
+    return cursor.fetchone()
+
+# ------------------- Copy Management -------------------
+def add_copies(cursor, book_id, count, condition="good", location=None):
+    """Add count physical copies of a book and give each a barcode"""
+    if count <= 0:
+        return
+
+    cursor.executemany(
+        "INSERT INTO BookCopies (book_id, status, copy_condition, location) VALUES (%s, 'available', %s, %s)",
+        [(book_id, condition, location)] * count
+    )
+
+    # Barcodes derive from the new copy ids, assigned in one statement
+    cursor.execute(
+        "UPDATE BookCopies SET barcode = CONCAT('C', LPAD(copy_id, 8, '0')) WHERE book_id = %s AND barcode IS NULL",
+        (book_id,)
+    )
+
+def set_copy_count(cursor, book_id, total):
+    """Add or withdraw copies so a book has total copies in circulation
+
+    Only copies on the shelf can be withdrawn; returns (success, message).
+    """
+    cursor.execute(
+        "SELECT status, COUNT(*) FROM BookCopies WHERE book_id = %s AND status <> 'withdrawn' GROUP BY status",
+        (book_id,)
+    )
+    counts = dict(cursor.fetchall())
+    current = sum(counts.values())
+
+    if total > current:
+        add_copies(cursor, book_id, total - current)
+    elif total < current:
+        surplus = current - total
+        if surplus > counts.get("available", 0):
+            return False, "Cannot remove copies that are currently on loan or lost"
+
+        cursor.execute(
+            """
+            UPDATE BookCopies SET status = 'withdrawn'
+            WHERE book_id = %s AND status = 'available'
+            ORDER BY copy_id DESC
+            LIMIT %s
+            """,
+            (book_id, surplus)
+        )
+
+    return True, "Copies updated"
+
+# ------------------- Checkout and Return -------------------
+def checkout_copy(cursor, copy_id, user_id):
+    """Lend a specific copy to a user; returns the new loan_id, or None if the copy is not on the shelf"""
+    # The status guard makes the claim atomic: two desks cannot lend one copy
+    cursor.execute(
+        "UPDATE BookCopies SET status = 'on_loan' WHERE copy_id = %s AND status = 'available'",
+        (copy_id,)
+    )
+    if cursor.rowcount == 0:
+        return None
+
+    cursor.execute(
+        """
+        INSERT INTO Loans (user_id, book_id, copy_id, loan_date, due_date)
+        SELECT %s, book_id, copy_id, CURDATE(), DATE_ADD(CURDATE(), INTERVAL %s DAY)
+        FROM BookCopies WHERE copy_id = %s
+        """,
+        (user_id, LOAN_DAYS, copy_id)
+    )
+    return cursor.lastrowid
+
+def checkout_book(cursor, book_id, user_id):
+    """Lend any available copy of a book; returns the loan_id, or None if none is available"""
+    cursor.execute(
+        """
+        SELECT copy_id FROM BookCopies
+        WHERE book_id = %s AND status = 'available'
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+        """,
+        (book_id,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return checkout_copy(cursor, row[0], user_id)
+
+def checkout_by_barcode(cursor, barcode, user_id, book_id=None):
+    """Lend the scanned copy to a user; returns (loan_id or None, message)
+
+    With book_id, the copy must belong to that book.
+    """
+    copy = find_copy_by_barcode(cursor, barcode)
+    if not copy:
+        return None, "No copy with this barcode"
+
+    copy_id, copy_book_id, status = copy
+    if book_id is not None and copy_book_id != book_id:
+        return None, "This barcode belongs to a different book"
+    if status != "available":
+        return None, f"This copy is {status.replace('_', ' ')}"
+
+    loan_id = checkout_copy(cursor, copy_id, user_id)
+    if loan_id is None:
+        return None, "This copy was just lent out"
+    return loan_id, "Book borrowed successfully"
+
+def checkin_loan(cursor, loan_id):
+    """Put the copy of a loan returned today back on the shelf; open loans are left alone"""
+    cursor.execute(
+        """
+        UPDATE BookCopies c
+        JOIN Loans l ON l.copy_id = c.copy_id
+        SET c.status = 'available'
+        WHERE l.loan_id = %s AND l.return_date = CURDATE() AND c.status = 'on_loan'
+        """,
+        (loan_id,)
+    )
+
+def find_open_loan_by_barcode(cursor, barcode):
+    """Return (loan_id, user_id, due_date) of the open loan for a scanned copy, or None"""
+    cursor.execute(
+        """
+        SELECT l.loan_id, l.user_id, l.due_date
+        FROM BookCopies c
+        JOIN Loans l ON l.copy_id = c.copy_id AND l.return_date IS NULL
+        WHERE c.barcode = %s
+        """,
+        (clean_barcode(barcode),)
+    )
+    return cursor.fetchone()
@@ -0,0 +1,76 @@
+import re
+
+# ------------------- Constants -------------------
+ISBN_PATTERN = re.compile(r"^(\d{9}[\dX]|\d{13})$")
+ISBN_FRAGMENT_PATTERN = re.compile(r"^\d+X?$")
+SEPARATORS = re.compile(r"[\s\-]")
+
+# ------------------- Cleaning -------------------
+def clean_isbn(text):
+    """Strip hyphens and spaces from scanned or typed input"""
+    if text is None:
+        return ""
+    return SEPARATORS.sub("", str(text)).upper()
+
+def looks_like_isbn(text):
+    """Check if input has the shape of an ISBN-10 or ISBN-13"""
+    return ISBN_PATTERN.match(clean_isbn(text)) is not None
+
+def looks_like_isbn_fragment(text):
+    """Check if input could be part of an ISBN: digits, hyphens, spaces and a final X"""
+    return ISBN_FRAGMENT_PATTERN.match(clean_isbn(text)) is not None
+
+# ------------------- Check Digits -------------------
+def isbn10_check_digit(first_nine):
+    """Compute the ISBN-10 check character for nine digits"""
+    total = sum((10 - i) * int(d) for i, d in enumerate(first_nine))
+    check = (11 - total % 11) % 11
+    return "X" if check == 10 else str(check)
+
+def isbn13_check_digit(first_twelve):
+    """Compute the ISBN-13 check digit for twelve digits"""
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(first_twelve))
+    return str((10 - total % 10) % 10)
+
+def is_valid_isbn10(isbn):
+    isbn = clean_isbn(isbn)
+    return (
+        len(isbn) == 10 and isbn[:9].isdigit() and
+        (isbn[9].isdigit() or isbn[9] == "X") and
+        isbn10_check_digit(isbn[:9]) == isbn[9]
+    )
+
+def is_valid_isbn13(isbn):
+    isbn = clean_isbn(isbn)
+    return len(isbn) == 13 and isbn.isdigit() and isbn13_check_digit(isbn[:12]) == isbn[12]
+
+def is_valid_isbn(isbn):
+    """Check if input is a valid ISBN-10 or ISBN-13"""
+    return is_valid_isbn10(isbn) or is_valid_isbn13(isbn)
+
+# ------------------- Conversion -------------------
+def isbn10_to_isbn13(isbn10):
+    """Convert a valid ISBN-10 to its 978-prefixed ISBN-13"""
+    body = "978" + clean_isbn(isbn10)[:9]
+    return body + isbn13_check_digit(body)
+
+def isbn13_to_isbn10(isbn13):
+    """Convert a 978-prefixed ISBN-13 to ISBN-10, or None if it has no ISBN-10 form"""
+    isbn13 = clean_isbn(isbn13)
+    if not isbn13.startswith("978"):
+        return None
+    body = isbn13[3:12]
+    return body + isbn10_check_digit(body)
+
+def normalize_isbn(text):
+    """Return the canonical 13-digit form of an ISBN, or None if it is invalid
+
+    ISBN-10 and ISBN-13 spellings of the same book normalize to the same value,
+    which is what the indexed Books.isbn_normalized column stores.
+    """
+    isbn = clean_isbn(text)
+    if is_valid_isbn13(isbn):
+        return isbn
+    if is_valid_isbn10(isbn):
+        return isbn10_to_isbn13(isbn)
+    return None
@@ -0,0 +1,287 @@
+"""Load test the data layer with concurrent simulated patrons
+
+Each patron runs a loop: pick an operation from the mix, run the same
+function the UI calls, then wait an exponential think time. Patrons run
+as threads or as processes. At the end the report gives:
+
+- throughput and p50/p95/p99 latency per operation
+- error and rejection counts
+- invariant violations found in the database afterwards
+
+    python loadtest.py --database library_perf --patrons 50 --duration 120 \\
+        --mix search=50,borrow=15,return=15,pay_fine=5,dashboard=15 --think-ms 500
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# ------------------- Constants -------------------
+DEFAULT_MIX = "search=50,borrow=15,return=15,pay_fine=5,dashboard=15"
+SEARCH_TERMS = (
+    "shadow", "river", "garden", "winter", "secret", "light", "night", "ocean", "lost", "crown",
+    "fiction", "mystery", "fantasy", "history", "smith", "garcia", "chen", "the", "of", "star",
+)
+USER_SAMPLE = 5000
+
+# Each query counts rows that break a rule the application relies on
+INVARIANTS = {
+    "copy_with_two_open_loans": """
+        SELECT COUNT(*) FROM (
+            SELECT copy_id FROM Loans
+            WHERE return_date IS NULL AND copy_id IS NOT NULL
+            GROUP BY copy_id HAVING COUNT(*) > 1
+        ) t
+    """,
+    "copy_on_loan_without_open_loan": """
+        SELECT COUNT(*) FROM BookCopies c
+        WHERE c.status = 'on_loan'
+        AND NOT EXISTS (SELECT 1 FROM Loans l WHERE l.copy_id = c.copy_id AND l.return_date IS NULL)
+    """,
+    "open_loan_on_available_copy": """
+        SELECT COUNT(*) FROM Loans l
+        JOIN BookCopies c ON c.copy_id = l.copy_id
+        WHERE l.return_date IS NULL AND c.status <> 'on_loan'
+    """,
+    "user_with_same_book_twice": """
+        SELECT COUNT(*) FROM (
+            SELECT user_id, book_id FROM Loans
+            WHERE return_date IS NULL
+            GROUP BY user_id, book_id HAVING COUNT(*) > 1
+        ) t
+    """,
+    "paid_fine_without_date": "SELECT COUNT(*) FROM Fines WHERE paid = 1 AND payment_date IS NULL",
+}
+
+# ------------------- Setup -------------------
+_dialog_errors = threading.local()
+
+def prepare_modules(database):
+    """Point the UI modules at the target database and make their dialogs non-blocking"""
+    from tkinter import messagebox
+
+    def record_dialog(title, message, *args, **kwargs):
+        _dialog_errors.last = f"{title}: {message}"
+
+    messagebox.showerror = record_dialog
+    messagebox.showwarning = record_dialog
+    messagebox.showinfo = lambda *args, **kwargs: None
+
+    import browse
+    import borrow
+    import fine
+    import home
+    for module in (browse, borrow, fine, home):
+        module.DB_CONFIG["database"] = database
+    return browse, borrow, fine, home
+
+def sample_targets(database):
+    """Member ids and the book id range to draw operations from"""
+    import mysql.connector
+    import browse
+
+    connection = mysql.connector.connect(**dict(browse.DB_CONFIG, database=database))
+    cursor = connection.cursor()
+    cursor.execute("SELECT user_id FROM Users WHERE role = 'member' ORDER BY user_id LIMIT %s", (USER_SAMPLE,))
+    user_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT MIN(book_id), MAX(book_id) FROM Books")
+    book_range = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return user_ids, book_range
+
+def check_invariants(database):
+    import mysql.connector
+    import browse
+
+    connection = mysql.connector.connect(**dict(browse.DB_CONFIG, database=database))
+    cursor = connection.cursor()
+    violations = {}
+    for name, query in INVARIANTS.items():
+        cursor.execute(query)
+        violations[name] = cursor.fetchone()[0]
+    cursor.close()
+    connection.close()
+    return violations
+
+# ------------------- Operations -------------------
+def op_search(modules, rng, user_id, book_range):
+    browse = modules[0]
+    browse.get_books(rng.choice(SEARCH_TERMS))
+    return True, None
+
+def op_borrow(modules, rng, user_id, book_range):
+    browse = modules[0]
+    book_id = rng.randint(*book_range)
+    success, message = browse.borrow_book(book_id, user_id)
+    if success:
+        return True, None
+    return message.startswith("Database"), message
+
+def op_return(modules, rng, user_id, book_range):
+    borrow = modules[1]
+    loans = borrow.get_active_loans(user_id)
+    if not loans:
+        return True, "nothing to return"
+    loan = rng.choice(loans)
+    return borrow.return_book(loan["loan_id"], user_id), None
+
+def op_pay_fine(modules, rng, user_id, book_range):
+    fine = modules[2]
+    fines = fine.get_pending_fines(user_id)
+    if not fines:
+        return True, "nothing to pay"
+    success, message = fine.pay_fine(rng.choice(fines)["fine_id"], user_id)
+    if success:
+        return True, None
+    return message.startswith("Database"), message
+
+def op_dashboard(modules, rng, user_id, book_range):
+    home = modules[3]
+    home.get_user_summary(user_id)
+    return True, None
+
+OPERATIONS = {
+    "search": op_search,
+    "borrow": op_borrow,
+    "return": op_return,
+    "pay_fine": op_pay_fine,
+    "dashboard": op_dashboard,
+}
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+# ------------------- Patron Loop -------------------
+def run_patron(patron, database, mix, think_ms, duration, seed, user_ids, book_range):
+    """Run one simulated patron; returns {op: [(latency_ms, outcome), ...]}"""
+    modules = prepare_modules(database)
+    rng = random.Random(seed * 100003 + patron)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    user_id = user_ids[patron % len(user_ids)]
+
+    samples = defaultdict(list)
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        _dialog_errors.last = None
+
+        start = time.perf_counter()
+        try:
+            ok, note = OPERATIONS[name](modules, rng, user_id, book_range)
+        except Exception as err:
+            ok, note = False, repr(err)
+        latency = (time.perf_counter() - start) * 1000
+
+        if _dialog_errors.last:
+            ok = False
+        outcome = "ok" if ok and not note else ("rejected" if ok else "error")
+        samples[name].append((latency, outcome))
+
+        if think_ms:
+            time.sleep(rng.expovariate(1000 / think_ms))
+
+    return dict(samples)
+
+# ------------------- Report -------------------
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def build_report(results, elapsed, violations, args):
+    merged = defaultdict(list)
+    for samples in results:
+        for name, values in samples.items():
+            merged[name].extend(values)
+
+    operations = {}
+    total = 0
+    total_errors = 0
+    for name, values in sorted(merged.items()):
+        latencies = sorted(latency for latency, _ in values)
+        errors = sum(1 for _, outcome in values if outcome == "error")
+        operations[name] = {
+            "count": len(values),
+            "throughput_per_s": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+            "errors": errors,
+            "rejected": sum(1 for _, outcome in values if outcome == "rejected"),
+        }
+        total += len(values)
+        total_errors += errors
+
+    return {
+        "config": {
+            "database": args.database, "patrons": args.patrons, "mode": args.mode,
+            "duration_s": args.duration, "think_ms": args.think_ms, "mix": args.mix, "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "operations": total,
+        "throughput_per_s": round(total / elapsed, 2),
+        "errors": total_errors,
+        "by_operation": operations,
+        "invariant_violations": violations,
+    }
+
+# ------------------- Main Execution -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Load test the library data layer")
+    parser.add_argument("--database", default="library_system")
+    parser.add_argument("--patrons", type=int, default=20, help="concurrent simulated patrons")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--think-ms", type=float, default=250, help="mean think time between operations")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. search=50,borrow=15")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    prepare_modules(args.database)
+    user_ids, book_range = sample_targets(args.database)
+    if not user_ids or book_range[0] is None:
+        raise SystemExit("The database needs members and books; generate some with datagen.py")
+
+    executor_class = ThreadPoolExecutor if args.mode == "thread" else ProcessPoolExecutor
+    started = time.perf_counter()
+    # The UI functions print progress; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with executor_class(max_workers=args.patrons) as executor:
+            futures = [
+                executor.submit(run_patron, patron, args.database, mix, args.think_ms, args.duration,
+                                args.seed, user_ids, book_range)
+                for patron in range(args.patrons)
+            ]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    report = build_report(results, elapsed, check_invariants(args.database), args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    broken = sum(report["invariant_violations"].values())
+    return 1 if broken else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
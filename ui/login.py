@@ -1,11 +1,16 @@
+import profiling
 import tkinter as tk
 from tkinter import messagebox, Entry, StringVar
 import customtkinter as ctk
+import theme
 from PIL import Image, ImageTk
-import mysql.connector
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import sessions
 import hashlib
 import os
-import json
+from covers import load_resized
 
 # Set appearance mode and default color theme for CustomTkinter
 ctk.set_appearance_mode("light")  # Modes: "System" (standard), "Dark", "Light"
@@ -19,12 +24,12 @@ DB_CONFIG = {
     "database": "library_system"
 }
 
-SESSION_FILE = 'user_session.json'
+SESSION_KIND = "user"
 
 # ------------------- Database Connection -------------------
 def connect_db():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return query_log.connect(**DB_CONFIG)
     except mysql.connector.Error as err:
         messagebox.showerror("Database Connection Error", f"Failed to connect to database: {err}")
         return None
@@ -35,9 +40,8 @@ def hash_password(password):
 
 # ------------------- Session Management -------------------
 def save_session(user_data):
-    """Save user data to session file"""
-    with open(SESSION_FILE, 'w') as f:
-        json.dump(user_data, f)
+    """Start a user session after login"""
+    sessions.start(SESSION_KIND, user_data)
 
 # ------------------- Login Function -------------------
 def login_user():
@@ -100,6 +104,7 @@ def forgot_password():
 
 # ------------------- Create Main Window -------------------
 root = ctk.CTk()
+theme.use_root(root)
 root.title("Library Management System")
 root.geometry("1000x600")
 root.resizable(False, False)
@@ -119,7 +124,7 @@ right_frame.pack(side="right", fill="both", expand=True, padx=40, pady=40)
 heading_label = ctk.CTkLabel(
     right_frame, 
     text="Library Login", 
-    font=ctk.CTkFont(family="Arial", size=32, weight="bold"),
+    font=theme.font(family="Arial", size=32, weight="bold"),
     text_color="#15883e"
 )
 heading_label.pack(pady=(20, 10))
@@ -129,7 +134,7 @@ desc_text = "Access thousands of books, track borrowed items, and manage\nyour l
 desc_label = ctk.CTkLabel(
     right_frame,
     text=desc_text,
-    font=ctk.CTkFont(family="Arial", size=12),
+    font=theme.font(family="Arial", size=12),
     text_color="gray"
 )
 desc_label.pack(pady=(0, 30))
@@ -138,7 +143,7 @@ desc_label.pack(pady=(0, 30))
 email_label = ctk.CTkLabel(
     right_frame,
     text="Email Address",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     text_color="#333333",
     anchor="w"
 )
@@ -148,7 +153,7 @@ email_entry = ctk.CTkEntry(
     right_frame,
     width=350,
     height=40,
-    font=ctk.CTkFont(family="Arial", size=13),
+    font=theme.font(family="Arial", size=13),
     border_width=1,
     corner_radius=5
 )
@@ -158,7 +163,7 @@ email_entry.pack(pady=(0, 20))
 password_label = ctk.CTkLabel(
     right_frame,
     text="Password",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     text_color="#333333",
     anchor="w"
 )
@@ -168,7 +173,7 @@ password_entry = ctk.CTkEntry(
     right_frame,
     width=350,
     height=40,
-    font=ctk.CTkFont(family="Arial", size=13),
+    font=theme.font(family="Arial", size=13),
     border_width=1,
     corner_radius=5,
     show="•"
@@ -179,7 +184,7 @@ password_entry.pack(pady=(0, 30))
 login_button = ctk.CTkButton(
     right_frame,
     text="Login",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     corner_radius=5,
     height=45,
     width=350,
@@ -198,7 +203,7 @@ links_frame.pack(fill="x", pady=(0, 20))
 forgot_link = ctk.CTkButton(
     links_frame,
     text="🔑 Forgot Password?",
-    font=ctk.CTkFont(family="Arial", size=12),
+    font=theme.font(family="Arial", size=12),
     fg_color="transparent",
     hover_color="#f0f0f0",
     text_color="#15883e",
@@ -215,7 +220,7 @@ spacer_label.pack(side="left", padx=20)
 signup_link = ctk.CTkButton(
     links_frame,
     text="👤 New User? Sign Up Here",
-    font=ctk.CTkFont(family="Arial", size=12),
+    font=theme.font(family="Arial", size=12),
     fg_color="transparent",
     hover_color="#f0f0f0",
     text_color="#15883e",
@@ -228,8 +233,7 @@ signup_link.pack(side="left")
 try:
     # Load and resize the image
     image_path = "library.png"  # Replace with your image path
-    pil_image = Image.open(image_path)
-    pil_image = pil_image.resize((400, 400))
+    pil_image = load_resized(image_path, (400, 400))
     img = ImageTk.PhotoImage(pil_image)
     
     # Create image label
@@ -242,7 +246,7 @@ except Exception as e:
     placeholder = ctk.CTkLabel(
         left_frame,
         text="Library\nManagement\nSystem",
-        font=ctk.CTkFont(family="Arial", size=32, weight="bold"),
+        font=theme.font(family="Arial", size=32, weight="bold"),
         text_color="#15883e"
     )
     placeholder.pack(expand=True)
@@ -1,11 +1,20 @@
+import profiling
 import tkinter as tk
 import customtkinter as ctk
+import theme
 from tkinter import messagebox
-import mysql.connector
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
+import bootstrap
 import os
 import sys
 import subprocess
 from PIL import Image, ImageTk
+from isbn import normalize_isbn
+from genres import genre_key, get_or_create_genre_id, normalize_genre_name
+from inventory import add_copies
+from covers import load_resized
 
 # ------------------- Constants -------------------
 DB_CONFIG = {
@@ -15,30 +24,13 @@ DB_CONFIG = {
 }
 
 DB_NAME = "library_system"
+BOOTSTRAP_CONFIG = dict(DB_CONFIG, database=DB_NAME)
 
 # ------------------- Database Setup Functions -------------------
-def check_database_exists():
-    """Check if the library_system database exists"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
-        # Check if database exists
-        cursor.execute("SHOW DATABASES LIKE %s", (DB_NAME,))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
-        return result is not None
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Failed to connect to MySQL: {err}")
-        return False
-
 def create_database():
     """Create the library_system database and tables"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = query_log.connect(**DB_CONFIG)
         cursor = connection.cursor()
         
         # Create database
@@ -55,7 +47,17 @@ def create_database():
                 password VARCHAR(255) NOT NULL,
                 role ENUM('member', 'admin') DEFAULT 'member',
                 registration_date DATE DEFAULT (CURRENT_DATE),
-                CONSTRAINT email_unique UNIQUE (email)
+                CONSTRAINT email_unique UNIQUE (email),
+                INDEX idx_users_registration (registration_date)
+            )
+        """)
+        
+        # Create Genres lookup table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Genres (
+                genre_id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(50) NOT NULL,
+                UNIQUE KEY idx_genres_name (name)
             )
         """)
         
@@ -66,11 +68,30 @@ def create_database():
                 title VARCHAR(255) NOT NULL,
                 author VARCHAR(100) NOT NULL,
                 isbn VARCHAR(20) UNIQUE,
+                isbn_normalized CHAR(13),
                 publication_year INT,
-                genre VARCHAR(50),
+                genre_id INT,
                 description TEXT,
-                total_copies INT DEFAULT 1,
-                available_copies INT DEFAULT 1
+                UNIQUE KEY idx_books_isbn_normalized (isbn_normalized),
+                INDEX idx_books_title (title),
+                INDEX idx_books_author (author),
+                INDEX idx_books_genre (genre_id),
+                FOREIGN KEY (genre_id) REFERENCES Genres(genre_id)
+            )
+        """)
+        
+        # Create BookCopies table (one row per physical copy)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS BookCopies (
+                copy_id INT AUTO_INCREMENT PRIMARY KEY,
+                book_id INT NOT NULL,
+                barcode VARCHAR(32) NULL,
+                status ENUM('available', 'on_loan', 'lost', 'withdrawn') NOT NULL DEFAULT 'available',
+                copy_condition ENUM('new', 'good', 'worn', 'damaged') NOT NULL DEFAULT 'good',
+                location VARCHAR(100),
+                UNIQUE KEY idx_copies_barcode (barcode),
+                INDEX idx_copies_book_status (book_id, status),
+                FOREIGN KEY (book_id) REFERENCES Books(book_id)
             )
         """)
         
@@ -80,11 +101,14 @@ def create_database():
                 loan_id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT,
                 book_id INT,
+                copy_id INT,
                 loan_date DATE DEFAULT (CURRENT_DATE),
                 due_date DATE,
                 return_date DATE NULL,
+                INDEX idx_loans_copy_open (copy_id, return_date),
                 FOREIGN KEY (user_id) REFERENCES Users(user_id),
-                FOREIGN KEY (book_id) REFERENCES Books(book_id)
+                FOREIGN KEY (book_id) REFERENCES Books(book_id),
+                FOREIGN KEY (copy_id) REFERENCES BookCopies(copy_id)
             )
         """)
         
@@ -97,6 +121,7 @@ def create_database():
                 description VARCHAR(255),
                 paid BOOLEAN DEFAULT FALSE,
                 payment_date DATE NULL,
+                INDEX idx_fines_paid_id (paid, fine_id DESC),
                 FOREIGN KEY (loan_id) REFERENCES Loans(loan_id)
             )
         """)
@@ -133,10 +158,17 @@ def create_database():
                 ("Harry Potter and the Sorcerer's Stone", "J.K. Rowling", "9780590353427", 1997, "Fantasy", "Fantasy novel", 6, 6)
             ]
             
-            cursor.executemany("""
-                INSERT INTO Books (title, author, isbn, publication_year, genre, description, total_copies, available_copies)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, sample_books)
+            for title, author, isbn, year, genre, description, copies, _ in sample_books:
+                # Store the normalized ISBN alongside the display form and the genre by id
+                cursor.execute("""
+                    INSERT INTO Books (title, author, isbn, isbn_normalized, publication_year, genre_id, description)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (title, author, isbn, normalize_isbn(isbn), year, get_or_create_genre_id(connection, genre), description))
+                
+                add_copies(cursor, cursor.lastrowid, copies)
+        
+        # New databases start at the current schema
+        bootstrap.record_version(cursor)
         
         connection.commit()
         cursor.close()
@@ -148,10 +180,195 @@ def create_database():
         messagebox.showerror("Database Setup Error", f"Failed to set up database: {err}")
         return False
 
+# ------------------- Schema Upgrades -------------------
+def column_exists(cursor, table, column):
+    """Check if a column exists in a table of the library database"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (DB_NAME, table, column))
+    return cursor.fetchone()[0] > 0
+
+def index_exists(cursor, table, index):
+    """Check if a named index exists on a table of the library database"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (DB_NAME, table, index))
+    return cursor.fetchone()[0] > 0
+
+def add_isbn_normalized(cursor):
+    """Add and backfill the indexed Books.isbn_normalized column"""
+    if column_exists(cursor, "Books", "isbn_normalized"):
+        return
+    
+    print("Upgrading Books: adding normalized ISBN index...")
+    cursor.execute("ALTER TABLE Books ADD COLUMN isbn_normalized CHAR(13) NULL AFTER isbn")
+    
+    cursor.execute("SELECT book_id, isbn FROM Books ORDER BY book_id")
+    updates = []
+    seen = set()
+    for book_id, raw_isbn in cursor.fetchall():
+        normalized = normalize_isbn(raw_isbn)
+        if normalized is None:
+            continue
+        if normalized in seen:
+            # ISBN-10 and ISBN-13 entries for the same edition; keep the first
+            print(f"Book {book_id}: ISBN {raw_isbn} duplicates another book, left unindexed")
+            continue
+        seen.add(normalized)
+        updates.append((normalized, book_id))
+    
+    cursor.executemany("UPDATE Books SET isbn_normalized = %s WHERE book_id = %s", updates)
+    cursor.execute("ALTER TABLE Books ADD UNIQUE INDEX idx_books_isbn_normalized (isbn_normalized)")
+
+def normalize_genres(cursor):
+    """Move free-text Books.genre into the Genres table, keyed by Books.genre_id"""
+    if column_exists(cursor, "Books", "genre_id"):
+        return
+    
+    print("Upgrading Books: moving genres into the Genres table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Genres (
+            genre_id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(50) NOT NULL,
+            UNIQUE KEY idx_genres_name (name)
+        )
+    """)
+    
+    # Group spellings that differ only in case or whitespace; the most
+    # used spelling becomes the genre's name
+    cursor.execute("SELECT BINARY genre, COUNT(*) FROM Books WHERE genre IS NOT NULL GROUP BY BINARY genre")
+    spellings = {}
+    for raw_genre, count in cursor.fetchall():
+        raw_genre = raw_genre.decode() if isinstance(raw_genre, (bytes, bytearray)) else raw_genre
+        key = genre_key(raw_genre)
+        if key:
+            spellings.setdefault(key, []).append((count, raw_genre))
+    
+    genre_ids = {}
+    for key, variants in spellings.items():
+        name = normalize_genre_name(max(variants)[1])
+        cursor.execute("INSERT INTO Genres (name) VALUES (%s)", (name,))
+        genre_ids[key] = cursor.lastrowid
+    
+    cursor.execute("ALTER TABLE Books ADD COLUMN genre_id INT NULL AFTER publication_year")
+    
+    updates = [
+        (genre_ids[key], raw_genre)
+        for key, variants in spellings.items()
+        for _, raw_genre in variants
+    ]
+    cursor.executemany("UPDATE Books SET genre_id = %s WHERE BINARY genre = %s", updates)
+    
+    cursor.execute("""
+        ALTER TABLE Books 
+            ADD INDEX idx_books_genre (genre_id),
+            ADD FOREIGN KEY (genre_id) REFERENCES Genres(genre_id),
+            DROP COLUMN genre
+    """)
+    print(f"Merged {len(updates)} genre spellings into {len(genre_ids)} genres")
+
+def add_book_copies(cursor):
+    """Replace the Books copy counters with one BookCopies row per physical copy"""
+    if column_exists(cursor, "Loans", "copy_id"):
+        return
+    
+    print("Upgrading Books: creating per-copy inventory...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS BookCopies (
+            copy_id INT AUTO_INCREMENT PRIMARY KEY,
+            book_id INT NOT NULL,
+            barcode VARCHAR(32) NULL,
+            status ENUM('available', 'on_loan', 'lost', 'withdrawn') NOT NULL DEFAULT 'available',
+            copy_condition ENUM('new', 'good', 'worn', 'damaged') NOT NULL DEFAULT 'good',
+            location VARCHAR(100),
+            UNIQUE KEY idx_copies_barcode (barcode),
+            INDEX idx_copies_book_status (book_id, status),
+            FOREIGN KEY (book_id) REFERENCES Books(book_id)
+        )
+    """)
+    cursor.execute("""
+        ALTER TABLE Loans 
+            ADD COLUMN copy_id INT NULL AFTER book_id,
+            ADD INDEX idx_loans_copy_open (copy_id, return_date),
+            ADD FOREIGN KEY (copy_id) REFERENCES BookCopies(copy_id)
+    """)
+    
+    cursor.execute("SELECT loan_id, book_id FROM Loans WHERE return_date IS NULL ORDER BY loan_id")
+    open_loans = {}
+    for loan_id, book_id in cursor.fetchall():
+        open_loans.setdefault(book_id, []).append(loan_id)
+    
+    cursor.execute("SELECT book_id, total_copies FROM Books ORDER BY book_id")
+    for book_id, total_copies in cursor.fetchall():
+        loans = open_loans.get(book_id, [])
+        # Counters may have drifted; never create fewer copies than are on loan
+        add_copies(cursor, book_id, max(total_copies or 0, len(loans)))
+        
+        if loans:
+            cursor.execute(
+                "SELECT copy_id FROM BookCopies WHERE book_id = %s ORDER BY copy_id LIMIT %s",
+                (book_id, len(loans))
+            )
+            copy_ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(
+                "UPDATE BookCopies SET status = 'on_loan' WHERE copy_id = %s",
+                [(copy_id,) for copy_id in copy_ids]
+            )
+            cursor.executemany(
+                "UPDATE Loans SET copy_id = %s WHERE loan_id = %s",
+                list(zip(copy_ids, loans))
+            )
+    
+    cursor.execute("ALTER TABLE Books DROP COLUMN total_copies, DROP COLUMN available_copies")
+
+def add_sort_indexes(cursor):
+    """Index the columns the admin tables sort by, so sorted windows avoid a filesort"""
+    indexes = [
+        ("Books", "idx_books_title", "title"),
+        ("Books", "idx_books_author", "author"),
+        ("Users", "idx_users_registration", "registration_date"),
+        # The fines pages' order and keyset: unpaid first, then newest first
+        ("Fines", "idx_fines_paid_id", "paid, fine_id DESC")
+    ]
+    
+    for table, index, column in indexes:
+        if not index_exists(cursor, table, index):
+            print(f"Upgrading {table}: adding index on {column}...")
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({column})")
+
+def upgrade_database():
+    """Bring a database created by an older version up to the current schema
+
+    Runs only when SchemaInfo is behind bootstrap.SCHEMA_VERSION; bump it
+    when adding a step here.
+    """
+    try:
+        connection = query_log.connect(**DB_CONFIG)
+        cursor = connection.cursor()
+        cursor.execute(f"USE {DB_NAME}")
+        
+        add_isbn_normalized(cursor)
+        normalize_genres(cursor)
+        add_book_copies(cursor)
+        add_sort_indexes(cursor)
+        bootstrap.record_version(cursor)
+        
+        connection.commit()
+        cursor.close()
+        connection.close()
+        return True
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Upgrade Error", f"Failed to upgrade database: {err}")
+        return False
+
 # ------------------- Main Application Class -------------------
 class LibraryManagementSystem:
     def __init__(self, root):
         self.root = root
+        theme.use_root(root)
+        profiling.install(self, "main")
         self.root.title("Library Management System")
         self.root.geometry("800x600")
         
@@ -171,7 +388,7 @@ class LibraryManagementSystem:
         title_label = ctk.CTkLabel(
             title_frame,
             text="Library Management System",
-            font=ctk.CTkFont(size=28, weight="bold"),
+            font=theme.font(size=28, weight="bold"),
             text_color="#116636"
         )
         title_label.pack()
@@ -180,7 +397,7 @@ class LibraryManagementSystem:
         subtitle_label = ctk.CTkLabel(
             title_frame,
             text="Your Gateway to Knowledge and Discovery",
-            font=ctk.CTkFont(size=14),
+            font=theme.font(size=14),
             text_color="#555555"
         )
         subtitle_label.pack(pady=(5, 0))
@@ -199,7 +416,7 @@ class LibraryManagementSystem:
         login_button = ctk.CTkButton(
             buttons_frame,
             text="User Login",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             fg_color="#116636",
             hover_color="#0d4f29",
             width=200,
@@ -213,7 +430,7 @@ class LibraryManagementSystem:
         signup_button = ctk.CTkButton(
             buttons_frame,
             text="New User? Sign Up",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             fg_color="#2196f3",
             hover_color="#1976d2",
             width=200,
@@ -227,7 +444,7 @@ class LibraryManagementSystem:
         admin_button = ctk.CTkButton(
             buttons_frame,
             text="Admin Login",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=theme.font(size=14, weight="bold"),
             fg_color="#757575",
             hover_color="#616161",
             width=200,
@@ -242,12 +459,12 @@ class LibraryManagementSystem:
         footer_frame.pack(side="bottom", fill="x", padx=20, pady=20)
         
         # Add default admin credentials if we just created the database
-        if not check_database_exists():
-            create_database()
+        readiness = bootstrap.current(BOOTSTRAP_CONFIG)
+        if readiness and readiness.created:
             admin_info = ctk.CTkLabel(
                 footer_frame,
                 text="Default Admin Login: admin@library.com / Password: admin123",
-                font=ctk.CTkFont(size=12, weight="bold"),
+                font=theme.font(size=12, weight="bold"),
                 text_color="#116636"
             )
             admin_info.pack()
@@ -265,7 +482,7 @@ class LibraryManagementSystem:
             placeholder = ctk.CTkLabel(
                 image_frame,
                 text="📚",
-                font=ctk.CTkFont(size=120),
+                font=theme.font(size=120),
                 text_color="#116636"
             )
             placeholder.pack()
@@ -274,9 +491,8 @@ class LibraryManagementSystem:
             image_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
             image_frame.pack(pady=20)
             
-            # Load and resize the image
-            pil_image = Image.open(image_path)
-            pil_image = pil_image.resize((300, 200))
+            # Load the resized image, cached on disk after the first launch
+            pil_image = load_resized(image_path, (300, 200))
             img = ImageTk.PhotoImage(pil_image)
             
             # Create image label
@@ -301,11 +517,13 @@ class LibraryManagementSystem:
 
 # ------------------- Main Execution -------------------
 if __name__ == "__main__":
-    # Check and create database if needed
-    if not check_database_exists():
-        print("Setting up database...")
-        if not create_database():
-            sys.exit(1)
+    # One readiness probe; setup and schema upgrades run only if it finds them needed
+    readiness = bootstrap.ensure_ready(BOOTSTRAP_CONFIG, create_database, upgrade_database)
+    if readiness.error:
+        messagebox.showerror("Database Error", f"Failed to connect to MySQL: {readiness.error}")
+        sys.exit(1)
+    if not readiness.ready:
+        sys.exit(1)
     
     # Check if required files exist
     required_files = ["login.py", "signup.py", "admin.py", "home.py", "browse.py", "borrow.py"]
@@ -319,6 +537,8 @@ if __name__ == "__main__":
         )
     
     # Start the application
-    root = ctk.CTk()
-    app = LibraryManagementSystem(root)
+    with bootstrap.timed("window"):
+        root = ctk.CTk()
+        app = LibraryManagementSystem(root)
+    fast_start.after_first_paint(root, bootstrap.report)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Prometheus metrics for the library screens
+
+Enabled by setting either of these environment variables:
+
+- LIBRARY_METRICS_TEXTFILE_DIR: a node-exporter textfile collector
+  directory. Each screen writes library_<screen>.prom there when it
+  starts, every few seconds and once more on exit, so its final counts
+  stay until the screen is opened again.
+- LIBRARY_METRICS_PORT: serve /metrics on 127.0.0.1 from a background
+  thread. Every screen runs in its own process, so the port belongs to the
+  first process that binds it; use the textfile mode to follow a whole
+  session.
+
+Every series carries the screen label, so files from different screens
+do not collide.
+
+Exported metrics:
+
+- counters for borrows, returns, fine payments and searches
+- database connect and statement latency, fed by query_log
+- open connections
+- screen build time and event-loop lag, fed by ui_metrics
+
+When disabled, @counted returns the function unchanged and nothing is
+recorded.
+"""
+import atexit
+import bisect
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------- Constants -------------------
+TEXTFILE_DIR = os.environ.get("LIBRARY_METRICS_TEXTFILE_DIR", "")
+PORT = int(os.environ.get("LIBRARY_METRICS_PORT", "0") or 0)
+ENABLED = bool(TEXTFILE_DIR or PORT)
+
+FLUSH_SECONDS = 15
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SCREEN = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+CONSTANT_LABELS = (("screen", SCREEN),)
+
+# ------------------- Metric Types -------------------
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names, values):
+    pairs = CONSTANT_LABELS + tuple(zip(names, values))
+    return ",".join(f'{name}="{escape(value)}"' for name, value in pairs)
+
+class Counter:
+    """A monotonically increasing count per label set"""
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for label_values, value in sorted(values.items()):
+            yield f"{self.name}{{{format_labels(self.labels, label_values)}}} {value}"
+
+class Gauge(Counter):
+    """A value that goes up and down"""
+    kind = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+class Histogram:
+    """Observations in cumulative buckets, in seconds"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}     # label values -> [per-bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            counts = self.values.get(label_values)
+            if counts is None:
+                counts = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += seconds
+
+    def samples(self):
+        with self.lock:
+            values = {key: list(counts) for key, counts in self.values.items()}
+        for label_values, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = format_labels(self.labels + ("le",), label_values + (bound,))
+                yield f"{self.name}_bucket{{{labels}}} {cumulative}"
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{{{labels}}} {counts[-1]:.6f}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+# ------------------- Metrics -------------------
+BORROWS = Counter("library_borrows_total", "Borrow attempts by outcome", ("outcome",))
+RETURNS = Counter("library_returns_total", "Book returns by outcome", ("outcome",))
+FINE_PAYMENTS = Counter("library_fine_payments_total", "Fine payments by outcome", ("outcome",))
+SEARCHES = Counter("library_searches_total", "Searches run from the search box, ok or empty", ("outcome",))
+
+DB_CONNECT_SECONDS = Histogram("library_db_connect_seconds", "Time to open a database connection")
+DB_STATEMENT_SECONDS = Histogram(
+    "library_db_statement_seconds", "Statement execution and fetch time by statement kind", ("kind",)
+)
+DB_ERRORS = Counter("library_db_errors_total", "Failed connects and statements", ("event",))
+DB_CONNECTIONS_OPEN = Gauge("library_db_connections_open", "Database connections currently open")
+
+SCREEN_BUILD_SECONDS = Histogram("library_screen_build_seconds", "Time to build a screen or view", ("view",))
+UI_LAG_SECONDS = Histogram("library_ui_lag_seconds", "How late the event loop ran a heartbeat callback")
+
+REGISTRY = (
+    BORROWS, RETURNS, FINE_PAYMENTS, SEARCHES,
+    DB_CONNECT_SECONDS, DB_STATEMENT_SECONDS, DB_ERRORS, DB_CONNECTIONS_OPEN,
+    SCREEN_BUILD_SECONDS, UI_LAG_SECONDS,
+)
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+# ------------------- Recording -------------------
+def outcome_of(result):
+    """ok or failed, from a (success, message) tuple, a bool or any other result"""
+    if isinstance(result, tuple) and result and isinstance(result[0], bool):
+        return "ok" if result[0] else "failed"
+    if isinstance(result, bool):
+        return "ok" if result else "failed"
+    return "ok"
+
+def counted(counter):
+    """Decorator counting calls by outcome; a no-op unless metrics are enabled"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                counter.inc("error")
+                raise
+            counter.inc(outcome_of(result))
+            return result
+        return wrapper
+    return decorate
+
+_STATEMENT_KIND = re.compile(r"\s*(\w+)")
+
+def on_database_event(event, start, ms, info):
+    """query_log listener"""
+    if event == "statement":
+        match = _STATEMENT_KIND.match(info["fingerprint"])
+        DB_STATEMENT_SECONDS.observe(ms / 1000, match.group(1).upper() if match else "OTHER")
+        if "error" in info:
+            DB_ERRORS.inc("statement")
+    elif event == "connect":
+        DB_CONNECT_SECONDS.observe(ms / 1000)
+        if "error" in info:
+            DB_ERRORS.inc("connect")
+        else:
+            DB_CONNECTIONS_OPEN.inc()
+    elif event == "close":
+        DB_CONNECTIONS_OPEN.dec()
+
+def observe_ui(name, ms):
+    """ui_metrics hook: event-loop lag and screen builds; per-callback timings are left out"""
+    import ui_metrics
+
+    if name == ui_metrics.LAG_METRIC:
+        UI_LAG_SECONDS.observe(ms / 1000)
+    elif not name.startswith("callback:"):
+        SCREEN_BUILD_SECONDS.observe(ms / 1000, name)
+
+# ------------------- Export -------------------
+def textfile_path():
+    return os.path.join(TEXTFILE_DIR, f"library_{SCREEN}.prom")
+
+def write_textfile():
+    """Write the metrics atomically so the collector never reads half a file"""
+    os.makedirs(TEXTFILE_DIR, exist_ok=True)
+    path = textfile_path()
+    with open(path + ".tmp", "w") as f:
+        f.write(render())
+    os.replace(path + ".tmp", path)
+
+def flush():
+    try:
+        write_textfile()
+    except OSError as err:
+        print(f"Metrics: could not write {textfile_path()}: {err}", file=sys.stderr)
+
+def flush_loop():
+    while True:
+        flush()
+        time.sleep(FLUSH_SECONDS)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes would flood the console
+
+def serve(port):
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    except OSError as err:
+        print(f"Metrics: port {port} unavailable ({err}); not serving", file=sys.stderr)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def start():
+    """Hook into query_log and start the exporters"""
+    import query_log
+
+    query_log.add_listener(on_database_event)
+    if TEXTFILE_DIR:
+        threading.Thread(target=flush_loop, name="metrics-textfile", daemon=True).start()
+        atexit.register(flush)
+    if PORT:
+        serve(PORT)
+
+if ENABLED:
+    start()
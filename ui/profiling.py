@@ -0,0 +1,181 @@
+"""Opt-in cProfile hooks for startup, screens and data functions
+
+Enable with LIBRARY_PROFILE=1, or by passing --profile to any screen. The
+flag is copied into the environment, so the screens it opens are profiled
+too. LIBRARY_PROFILE can also be a comma-separated list of entry-point
+patterns, e.g. "startup,LibraryBrowseApp.show_*,browse.get_books".
+
+Profiled entry points:
+
+- startup: from the first import of this module until the window is idle,
+  so screens import it first. login and signup build their window at import
+  and never call install(), so their startup profile runs until exit.
+- each show_* method of the app passed to install()
+- each data function of the app's module, i.e. every function that
+  calls connect_db
+
+For each run, two profiles are written to LIBRARY_PROFILE_DIR (default
+profiles/):
+
+- <screen>-<pid>-startup.prof, the startup profile
+- <screen>-<pid>.prof, all the entry-point calls merged
+
+Each .prof file comes with a .txt summary listing the top cumulative
+functions. Field staff can send the folder as it is; open the .prof
+files with pstats or snakeviz.
+"""
+import atexit
+import cProfile
+import fnmatch
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+# ------------------- Constants -------------------
+if "--profile" in sys.argv:
+    sys.argv.remove("--profile")
+    os.environ.setdefault("LIBRARY_PROFILE", "1")
+
+SETTING = os.environ.get("LIBRARY_PROFILE", "")
+ENABLED = SETTING not in ("", "0")
+PATTERNS = () if SETTING.lower() in ("1", "all", "true") else tuple(
+    pattern.strip() for pattern in SETTING.split(",") if pattern.strip()
+)
+PROFILE_DIR = os.environ.get("LIBRARY_PROFILE_DIR", "profiles")
+TOP = int(os.environ.get("LIBRARY_PROFILE_TOP", "30"))
+
+# ------------------- State -------------------
+_local = threading.local()
+_lock = threading.Lock()
+_screen = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+_startup = None
+_merged = None          # pstats.Stats of every entry-point call
+_calls = {}             # entry point -> [calls, total ms, max ms]
+
+def selected(name):
+    return not PATTERNS or any(fnmatch.fnmatchcase(name, pattern) for pattern in PATTERNS)
+
+def base_path(suffix=""):
+    return os.path.join(PROFILE_DIR, f"{_screen}-{os.getpid()}{suffix}")
+
+def write_summary(stats, path, header):
+    """Write the top cumulative functions of stats to path"""
+    text = io.StringIO()
+    text.write(header)
+    stats.stream = text
+    stats.sort_stats("cumulative").print_stats(TOP)
+    with open(path, "w") as f:
+        f.write(text.getvalue())
+
+# ------------------- Startup -------------------
+def start_startup():
+    global _startup
+    if not ENABLED or not selected("startup"):
+        return
+    _startup = cProfile.Profile()
+    _local.active = True
+    _startup.enable()
+
+def stop_startup():
+    """Stop the startup profile and write it; later calls do nothing"""
+    global _startup
+    profile, _startup = _startup, None
+    if profile is None:
+        return
+    profile.disable()
+    _local.active = False
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = base_path("-startup")
+    profile.dump_stats(path + ".prof")
+    write_summary(pstats.Stats(profile), path + ".txt", f"Startup profile of {_screen}\n\n")
+
+# ------------------- Entry Points -------------------
+def profiled(name, func):
+    """Wrap func so each outermost call on a thread runs under cProfile"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_local, "active", False):
+            # cProfile cannot nest; the outer profile already covers this call
+            return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        _local.active = True
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            _local.active = False
+            record(name, profile, (time.perf_counter() - start) * 1000)
+    return wrapper
+
+def record(name, profile, ms):
+    global _merged
+    with _lock:
+        stats = _calls.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += ms
+        stats[2] = max(stats[2], ms)
+        if _merged is None:
+            _merged = pstats.Stats(profile)
+        else:
+            _merged.add(profile)
+
+def data_functions(module):
+    """Module-level functions of module that open a database connection"""
+    for name, value in vars(module).items():
+        if name == "connect_db" or not inspect.isfunction(value) or value.__module__ != module.__name__:
+            continue
+        if "connect_db" in inspect.unwrap(value).__code__.co_names:
+            yield name, value
+
+def install(app, screen):
+    """Profile app startup until the window is idle, its show_* methods and its module's data functions"""
+    global _screen
+    if not ENABLED:
+        return
+    _screen = screen
+
+    for name in dir(type(app)):
+        if name.startswith("show_") and callable(getattr(app, name)):
+            entry = f"{type(app).__name__}.{name}"
+            if selected(entry):
+                setattr(app, name, profiled(entry, getattr(app, name)))
+
+    module = sys.modules[type(app).__module__]
+    for name, func in data_functions(module):
+        entry = f"{screen}.{name}"
+        if selected(entry):
+            setattr(module, name, profiled(entry, func))
+
+    app.root.after_idle(stop_startup)
+
+# ------------------- Export -------------------
+def write_run():
+    """Write the merged entry-point profile and its summary"""
+    stop_startup()
+    if _merged is None:
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = base_path()
+    _merged.dump_stats(path + ".prof")
+
+    header = io.StringIO()
+    header.write(f"Entry points of {_screen}\n\n")
+    header.write(f"{'calls':>7} {'total ms':>10} {'max ms':>9}  entry point\n")
+    for name, (calls, total, worst) in sorted(_calls.items(), key=lambda item: -item[1][1]):
+        header.write(f"{calls:>7} {total:>10.1f} {worst:>9.1f}  {name}\n")
+    header.write("\n")
+    write_summary(_merged, path + ".txt", header.getvalue())
+
+if ENABLED:
+    atexit.register(write_run)
+    start_startup()
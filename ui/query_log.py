@@ -0,0 +1,318 @@
+"""Statement timing, slow-query log and top-N report
+
+Every module opens its connections through query_log.connect(). With
+LIBRARY_QUERY_LOG=1 the returned connection hands out timing cursors that
+record, for each statement:
+
+- execution and fetch time
+- rows returned or affected
+- errors
+- the calling function
+
+Statements are aggregated by a normalized fingerprint, so literals and
+parameters do not split them. Statements slower than
+LIBRARY_SLOW_QUERY_MS (default 200) are appended as JSON lines to
+slow_queries.log. On exit, the top LIBRARY_QUERY_TOP statements (default
+20) by total time go to stderr, and to LIBRARY_QUERY_REPORT as JSON when
+that is set.
+
+Other modules can follow connections and statements with add_listener().
+Without LIBRARY_QUERY_LOG, capture or listeners, connect() returns the plain
+connection.
+"""
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+
+# ------------------- Constants -------------------
+ENABLED = os.environ.get("LIBRARY_QUERY_LOG", "") not in ("", "0")
+SLOW_QUERY_MS = float(os.environ.get("LIBRARY_SLOW_QUERY_MS", "200"))
+SLOW_LOG_FILE = os.environ.get("LIBRARY_SLOW_QUERY_LOG", "slow_queries.log")
+REPORT_FILE = os.environ.get("LIBRARY_QUERY_REPORT", "")
+REPORT_TOP = int(os.environ.get("LIBRARY_QUERY_TOP", "20"))
+
+MAX_LOGGED_STATEMENT = 2000
+
+# ------------------- Fingerprints -------------------
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+def fingerprint(statement):
+    """Normalize a statement so that calls differing only in values group together"""
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf-8", "replace")
+    text = _COMMENTS.sub(" ", statement)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _LISTS.sub("(?+)", text)
+    return _SPACES.sub(" ", text).strip()
+
+# ------------------- Statistics -------------------
+class StatementStats:
+    __slots__ = ("fingerprint", "count", "total_ms", "max_ms", "rows", "errors", "callers")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.callers = {}
+
+    def as_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "errors": self.errors,
+            "callers": dict(sorted(self.callers.items(), key=lambda item: -item[1])),
+        }
+
+_stats = {}
+_lock = threading.Lock()
+_samples = None
+_listeners = []
+
+def add_listener(callback):
+    """Call callback(event, start, ms, info) for each connect, close and statement
+
+    start is a time.perf_counter() value. info holds the fingerprint, rows
+    and caller of a statement, and "error" when the connect or statement
+    failed.
+    """
+    _listeners.append(callback)
+
+def notify(event, start, ms, info):
+    for callback in _listeners:
+        callback(event, start, ms, info)
+
+def capture(samples):
+    """Time every connection and keep one example of each statement in samples
+
+    samples maps fingerprint to {"statement", "params", "caller"} for the
+    first execution seen. Pass None to stop capturing.
+    """
+    global _samples
+    _samples = samples
+
+def stats_for(statement):
+    key = fingerprint(statement)
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = StatementStats(key)
+    return entry
+
+def calling_function():
+    """module.function:line of the first frame outside this module"""
+    frame = sys._getframe(2)
+    while frame and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+
+def log_slow(statement, ms, rows, caller):
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "ms": round(ms, 3),
+        "rows": rows,
+        "caller": caller,
+        # Parameters are left out on purpose: they can hold passwords
+        "statement": _SPACES.sub(" ", str(statement)).strip()[:MAX_LOGGED_STATEMENT],
+    }
+    with _lock:
+        with open(SLOW_LOG_FILE, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+# ------------------- Timing Cursor -------------------
+class TimedCursor:
+    """Cursor proxy that times execute() and the fetches that follow it"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._entry = None
+        self._statement = None
+        self._caller = None
+        self._start = 0.0
+        self._ms = 0.0
+        self._rows = 0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _finish(self):
+        """Close the accounting of the previous statement"""
+        entry = self._entry
+        if entry is None:
+            return
+        self._entry = None
+        with _lock:
+            entry.count += 1
+            entry.total_ms += self._ms
+            entry.max_ms = max(entry.max_ms, self._ms)
+            entry.rows += self._rows
+            entry.callers[self._caller] = entry.callers.get(self._caller, 0) + 1
+        if self._ms >= SLOW_QUERY_MS:
+            log_slow(self._statement, self._ms, self._rows, self._caller)
+        if _listeners:
+            notify("statement", self._start, self._ms,
+                   {"fingerprint": entry.fingerprint, "rows": self._rows, "caller": self._caller})
+
+    def _timed(self, method, statement, *args, **kwargs):
+        self._finish()
+        entry = stats_for(statement)
+        caller = calling_function()
+
+        start = time.perf_counter()
+        try:
+            result = method(statement, *args, **kwargs)
+        except mysql.connector.Error as err:
+            with _lock:
+                entry.errors += 1
+                entry.callers[caller] = entry.callers.get(caller, 0) + 1
+            if _listeners:
+                notify("statement", start, (time.perf_counter() - start) * 1000,
+                       {"fingerprint": entry.fingerprint, "rows": 0, "caller": caller, "error": str(err)})
+            raise
+
+        if _samples is not None and entry.fingerprint not in _samples:
+            params = args[0] if args else kwargs.get("params")
+            if method == self._cursor.executemany and params:
+                params = params[0]
+            _samples[entry.fingerprint] = {"statement": statement, "params": params, "caller": caller}
+
+        self._entry = entry
+        self._statement = statement
+        self._caller = caller
+        self._start = start
+        self._ms = (time.perf_counter() - start) * 1000
+        # Affected rows for writes; reads add their rows as they are fetched
+        self._rows = max(self._cursor.rowcount, 0) if not self._cursor.with_rows else 0
+        return result
+
+    def execute(self, statement, params=None, *args, **kwargs):
+        return self._timed(self._cursor.execute, statement, params, *args, **kwargs)
+
+    def executemany(self, statement, seq_params, *args, **kwargs):
+        return self._timed(self._cursor.executemany, statement, seq_params, *args, **kwargs)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._entry is not None:
+            self._ms += (time.perf_counter() - start) * 1000
+            if isinstance(result, list):
+                self._rows += len(result)
+            elif result is not None:
+                self._rows += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, size=1):
+        return self._fetch(self._cursor.fetchmany, size)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+class TimedConnection:
+    """Connection proxy whose cursors are timed"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursors = []
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = TimedCursor(self._connection.cursor(*args, **kwargs))
+        self._cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        # Account for statements whose cursor was never closed
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors = []
+        if _listeners:
+            notify("close", time.perf_counter(), 0.0, {})
+        return self._connection.close()
+
+def connect(**config):
+    """mysql.connector.connect(), with timed cursors when the query log, capture or a listener is on"""
+    if not _listeners:
+        connection = mysql.connector.connect(**config)
+        return TimedConnection(connection) if ENABLED or _samples is not None else connection
+
+    start = time.perf_counter()
+    try:
+        connection = mysql.connector.connect(**config)
+    except mysql.connector.Error as err:
+        notify("connect", start, (time.perf_counter() - start) * 1000, {"error": str(err)})
+        raise
+    notify("connect", start, (time.perf_counter() - start) * 1000, {})
+    return TimedConnection(connection)
+
+# ------------------- Report -------------------
+def top_statements(n=REPORT_TOP):
+    with _lock:
+        entries = sorted(_stats.values(), key=lambda entry: entry.total_ms, reverse=True)
+        return [entry.as_dict() for entry in entries[:n]]
+
+def report(stream=sys.stderr, n=REPORT_TOP):
+    """Print the top statements by total time, and write them to REPORT_FILE if set"""
+    top = top_statements(n)
+    if not top:
+        return
+    if REPORT_FILE:
+        with open(REPORT_FILE, "w") as f:
+            json.dump(top, f, indent=2)
+
+    print(f"\nTop {len(top)} statements by total time:", file=stream)
+    print(f"{'total ms':>10} {'calls':>7} {'mean ms':>9} {'max ms':>9} {'rows':>9}  statement", file=stream)
+    for entry in top:
+        caller = next(iter(entry["callers"]), "?")
+        print(
+            f"{entry['total_ms']:>10.1f} {entry['count']:>7} {entry['mean_ms']:>9.2f} {entry['max_ms']:>9.2f} "
+            f"{entry['rows']:>9}  {entry['fingerprint'][:100]}  [{caller}]",
+            file=stream
+        )
+
+if ENABLED:
+    atexit.register(report)
@@ -0,0 +1,242 @@
+import heapq
+import math
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from operator import itemgetter
+
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+
+# ------------------- Ranking Parameters -------------------
+# Field weights for BM25F scoring: a hit in the title counts far more
+# than the same word buried in the description.
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "author": 2.0,
+    "genre": 1.0,
+    "description": 0.5
+}
+FIELDS = tuple(FIELD_WEIGHTS)
+
+K1 = 1.2
+B = 0.75
+
+# Query words also match longer index terms they are a prefix of
+# ("ring" -> "rings"), at a reduced weight and capped per word.
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+
+INDEX_MAX_AGE = 300  # seconds before the cached index is rebuilt
+# Touched by invalidate_index(); screens in other processes rebuild when it is newer than their index
+STAMP_FILE = os.environ.get("LIBRARY_SEARCH_STAMP", ".search_index.stamp")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# ------------------- Tokenizing -------------------
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+# ------------------- Search Index -------------------
+class SearchIndex:
+    """Inverted index over the catalogue with field-weighted BM25 ranking"""
+
+    def __init__(self, books):
+        # term -> {book_id: (tf_title, tf_author, tf_genre, tf_description)}
+        self.postings = defaultdict(dict)
+        # book_id -> (len_title, len_author, len_genre, len_description)
+        self.field_lengths = {}
+        # book_id -> genre_id and decade, so filters and facets need no database round trip
+        self.genres = {}
+        self.decades = {}
+        self.built_at = time.time()
+
+        totals = [0] * len(FIELDS)
+
+        for book in books:
+            book_id = book["book_id"]
+            lengths = []
+            counts = defaultdict(lambda: [0] * len(FIELDS))
+
+            for f_idx, field in enumerate(FIELDS):
+                tokens = tokenize(book.get(field))
+                lengths.append(len(tokens))
+                totals[f_idx] += len(tokens)
+                for token in tokens:
+                    counts[token][f_idx] += 1
+
+            for term, tfs in counts.items():
+                self.postings[term][book_id] = tuple(tfs)
+
+            self.field_lengths[book_id] = tuple(lengths)
+            self.genres[book_id] = book.get("genre_id")
+            year = book.get("publication_year")
+            self.decades[book_id] = year // 10 * 10 if year else None
+
+        self.doc_count = len(self.field_lengths)
+        self.avg_lengths = [
+            (total / self.doc_count) if self.doc_count else 0.0 for total in totals
+        ]
+        self.vocabulary = sorted(self.postings)
+
+    def __len__(self):
+        return self.doc_count
+
+    def idf(self, df):
+        """Inverse document frequency for a document count (BM25 variant, always positive)"""
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def expand(self, word):
+        """Return (term, weight) pairs an individual query word should match"""
+        matches = []
+        if word in self.postings:
+            matches.append((word, 1.0))
+
+        start = bisect_left(self.vocabulary, word)
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(word):
+                break
+            if term != word:
+                matches.append((term, PREFIX_WEIGHT))
+        return matches
+
+    def score_terms(self, query):
+        """Accumulate BM25F scores for every book matching the query"""
+        scores = defaultdict(float)
+
+        for word in set(tokenize(query)):
+            # A word and its prefix expansions act as one term: their weighted,
+            # length-normalized frequencies are pooled per book before saturation
+            pooled = defaultdict(float)
+
+            for term, weight in self.expand(word):
+                for book_id, tfs in self.postings[term].items():
+                    lengths = self.field_lengths[book_id]
+
+                    for f_idx, field in enumerate(FIELDS):
+                        if tfs[f_idx]:
+                            avg = self.avg_lengths[f_idx] or 1.0
+                            norm = 1 - B + B * (lengths[f_idx] / avg)
+                            pooled[book_id] += weight * FIELD_WEIGHTS[field] * tfs[f_idx] / norm
+
+            idf = self.idf(len(pooled))
+            for book_id, tf in pooled.items():
+                scores[book_id] += idf * (tf * (K1 + 1)) / (tf + K1)
+
+        return scores
+
+    def scored(self, query, genre_id=None, decade=None):
+        """Unordered (book_id, score) pairs of every match, optionally within a genre and decade"""
+        scores = self.score_terms(query)
+        return [
+            (book_id, score) for book_id, score in scores.items()
+            if (genre_id is None or self.genres.get(book_id) == genre_id)
+            and (decade is None or self.decades.get(book_id) == decade)
+        ]
+
+class RankedResults:
+    """Every match of a search, best first, read from the database a page at a time
+
+    Holds only the scores. Slicing picks the page with a heap and loads
+    just those books through fetch_rows(ids), so no statement ever binds
+    the whole match set.
+    """
+
+    def __init__(self, scored, fetch_rows):
+        self.scored = scored
+        self.fetch_rows = fetch_rows
+
+    def __len__(self):
+        return len(self.scored)
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice):
+            raise TypeError("ranked results are read a page at a time; use a slice")
+        start, stop, _ = page.indices(len(self.scored))
+        if start >= stop:
+            return []
+        # Partial selection with a heap; the full match set is never sorted
+        ids = [book_id for book_id, _ in heapq.nlargest(stop, self.scored, key=itemgetter(1))[start:]]
+        rows = {row["book_id"]: row for row in self.fetch_rows(ids)}
+        return [rows[book_id] for book_id in ids if book_id in rows]
+
+# ------------------- Index Cache -------------------
+_index = None
+
+def load_index(connection):
+    """Build a fresh index from the Books table"""
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT b.book_id, b.title, b.author, b.genre_id, g.name AS genre, b.publication_year, b.description
+            FROM Books b
+            LEFT JOIN Genres g ON g.genre_id = b.genre_id
+        """)
+        return SearchIndex(cursor.fetchall())
+    finally:
+        cursor.close()
+
+def get_index(connect):
+    """Return the cached index, rebuilding it when missing or stale"""
+    global _index
+
+    if _index is not None and time.time() - _index.built_at < INDEX_MAX_AGE and not changed_since(_index.built_at):
+        return _index
+
+    connection = connect()
+    if not connection:
+        return _index
+
+    try:
+        _index = load_index(connection)
+    except mysql.connector.Error as err:
+        print(f"Failed to build search index: {err}")
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+    return _index
+
+def changed_since(built_at):
+    """Check if the catalogue was edited, in any process, after built_at"""
+    try:
+        return os.path.getmtime(STAMP_FILE) >= built_at
+    except OSError:
+        return False
+
+def invalidate_index():
+    """Drop the cached index so the next search rebuilds it, here and in other open screens"""
+    global _index
+    _index = None
+    try:
+        with open(STAMP_FILE, "a"):
+            os.utime(STAMP_FILE)
+    except OSError as err:
+        print(f"Failed to mark search index stale: {err}")
+
+def scored_books(connect, query, genre_id=None, decade=None):
+    """Unordered (book_id, score) pairs of every book matching a query"""
+    index = get_index(connect)
+    if index is None:
+        return []
+    return index.scored(query, genre_id, decade)
+
+def facet_counts(connect, book_ids):
+    """Count books by genre and by decade from the index, without a query"""
+    genres, decades = defaultdict(int), defaultdict(int)
+    index = get_index(connect)
+    if index is None:
+        return genres, decades
+    for book_id in book_ids:
+        genre_id = index.genres.get(book_id)
+        decade = index.decades.get(book_id)
+        if genre_id is not None:
+            genres[genre_id] += 1
+        if decade is not None:
+            decades[decade] += 1
+    return genres, decades
@@ -0,0 +1,329 @@
+"""Login sessions kept in memory instead of user_session.json / admin_session.json
+
+Each login starts a Session held by this process. Screens open each other
+with os.system(), so the active session is also exported as a signed token
+in the environment (LIBRARY_USER_SESSION / LIBRARY_ADMIN_SESSION). The
+screen that opens next reads it from there, without touching the disk.
+Separate logins live in separate process chains, so two people on a shared
+kiosk no longer overwrite each other's session.
+
+Sessions end on logout, LIBRARY_SESSION_LIFETIME seconds after login
+(default 8 hours), or after LIBRARY_SESSION_IDLE seconds without input
+(default 30 minutes).
+
+Crash recovery is opt-in: with LIBRARY_SESSION_RECOVERY=1 each session
+is also written to LIBRARY_SESSION_DIR (default sessions/) as a signed
+token, together with the pid of the screen that wrote it. Logging out and
+closing the window remove the file, so one left behind whose process is
+gone marks a crash. A screen started without a session resumes the most
+recently used such session that has not expired. Tokens are signed with
+LIBRARY_SESSION_SECRET. If that is unset, a random key is generated; with
+recovery on it is kept in session.key so it survives a restart.
+"""
+import base64
+import glob
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+# ------------------- Constants -------------------
+ENV_VARS = {"user": "LIBRARY_USER_SESSION", "admin": "LIBRARY_ADMIN_SESSION"}
+SECRET_ENV = "LIBRARY_SESSION_SECRET"
+
+LIFETIME = float(os.environ.get("LIBRARY_SESSION_LIFETIME", str(8 * 3600)))
+IDLE_TIMEOUT = float(os.environ.get("LIBRARY_SESSION_IDLE", str(30 * 60)))
+RECOVERY = os.environ.get("LIBRARY_SESSION_RECOVERY", "") not in ("", "0")
+RECOVERY_DIR = os.environ.get("LIBRARY_SESSION_DIR", "sessions")
+KEY_FILE = "session.key"
+
+TOUCH_EXPORT_S = 30     # refresh the exported token at most this often while active
+WATCH_MS = 15000        # how often open screens check for expiry
+ACTIVITY_EVENTS = ("<KeyPress>", "<ButtonPress>", "<MouseWheel>")
+
+# ------------------- Signing -------------------
+_secret = None
+
+def secret():
+    """The signing key, shared with child screens through the environment"""
+    global _secret
+    if _secret is None:
+        value = os.environ.get(SECRET_ENV)
+        if not value and RECOVERY:
+            value = load_key_file()
+        if not value:
+            value = secrets.token_hex(32)
+        os.environ[SECRET_ENV] = value
+        _secret = value.encode()
+    return _secret
+
+def load_key_file():
+    """Read session.key, creating it readable by this user only"""
+    if os.path.exists(KEY_FILE):
+        with open(KEY_FILE) as f:
+            return f.read().strip()
+    value = secrets.token_hex(32)
+    fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(value)
+    return value
+
+def sign(payload):
+    body = base64.urlsafe_b64encode(json.dumps(payload, default=str).encode()).decode()
+    signature = hmac.new(secret(), body.encode(), hashlib.sha256).hexdigest()
+    return f"{body}.{signature}"
+
+def verify(token):
+    """The payload of a token signed with our key, or None"""
+    body, _, signature = token.strip().rpartition(".")
+    expected = hmac.new(secret(), body.encode(), hashlib.sha256).hexdigest()
+    if not body or not hmac.compare_digest(signature.encode(), expected.encode()):
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(body.encode()))
+    except ValueError:
+        return None
+
+# ------------------- Sessions -------------------
+class Session:
+    """One logged-in user or admin"""
+
+    def __init__(self, kind, data, session_id=None, created_at=None, last_seen=None):
+        now = time.time()
+        self.kind = kind
+        self.data = data
+        self.id = session_id or secrets.token_hex(8)
+        self.created_at = created_at or now
+        self.last_seen = last_seen or now
+
+    def expired(self, now=None):
+        now = now or time.time()
+        return now - self.created_at > LIFETIME or now - self.last_seen > IDLE_TIMEOUT
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    def token(self):
+        return sign({
+            "id": self.id, "kind": self.kind, "data": self.data,
+            "created_at": self.created_at, "last_seen": self.last_seen,
+        })
+
+    @classmethod
+    def from_token(cls, token, kind):
+        payload = verify(token)
+        if not payload or payload.get("kind") != kind:
+            return None
+        return cls(kind, payload["data"], payload["id"], payload["created_at"], payload["last_seen"])
+
+class SessionManager:
+    """Every session this process knows, and the active one of each kind"""
+
+    def __init__(self):
+        self._sessions = {}     # id -> Session
+        self._active = {}       # kind -> session id
+        self._exported = {}     # session id -> last_seen when last exported
+        self._lock = threading.RLock()
+
+    # ----- lifecycle -----
+    def start(self, kind, data):
+        """Begin a session after a successful login and make it active"""
+        with self._lock:
+            previous = self._active.get(kind)
+            if previous:
+                self.end(self._sessions[previous])
+            session = Session(kind, dict(data))
+            self._sessions[session.id] = session
+            self._active[kind] = session.id
+            self.export(session)
+            return session
+
+    def end(self, session):
+        with self._lock:
+            self._sessions.pop(session.id, None)
+            self._exported.pop(session.id, None)
+            if self._active.get(session.kind) == session.id:
+                del self._active[session.kind]
+                os.environ.pop(ENV_VARS[session.kind], None)
+            if RECOVERY:
+                remove_quietly(recovery_path(session))
+
+    def sessions(self, kind=None):
+        """Live sessions held by this process, dropping expired ones"""
+        with self._lock:
+            for session in list(self._sessions.values()):
+                if session.expired():
+                    self.end(session)
+            return [s for s in self._sessions.values() if kind is None or s.kind == kind]
+
+    # ----- the active session -----
+    def active(self, kind):
+        """The active session of a kind held in memory, without looking further"""
+        with self._lock:
+            session_id = self._active.get(kind)
+            return self._sessions.get(session_id) if session_id else None
+
+    def current(self, kind):
+        """The active session of a kind, or None
+
+        Looked up in memory first, then in the token handed down by the
+        screen that opened this one, then in the recovery files.
+        """
+        with self._lock:
+            session = self.active(kind)
+            if session is None:
+                session = self.inherited(kind) or (self.recovered(kind) if RECOVERY else None)
+                if session is None:
+                    return None
+                self._sessions[session.id] = session
+                self._active[kind] = session.id
+
+            if session.expired():
+                self.end(session)
+                return None
+            session.touch()
+            self.export(session)
+            return session
+
+    def inherited(self, kind):
+        token = os.environ.get(ENV_VARS[kind])
+        return Session.from_token(token, kind) if token else None
+
+    def recovered(self, kind):
+        """The most recently used unexpired session left on disk by a crashed screen"""
+        found = []
+        for path in glob.glob(os.path.join(RECOVERY_DIR, f"{kind}-*.token")):
+            try:
+                with open(path) as f:
+                    owner, _, token = f.read().partition("\n")
+            except OSError:
+                continue
+            session = Session.from_token(token, kind)
+            if session is None or session.expired() or not owner.isdigit():
+                remove_quietly(path)
+            elif not process_alive(int(owner)):
+                found.append(session)
+        return max(found, key=lambda s: s.last_seen, default=None)
+
+    def update(self, kind, data):
+        """Replace the data of the active session, e.g. after a profile edit"""
+        with self._lock:
+            session = self.current(kind)
+            if session is None:
+                return None
+            session.data = dict(data)
+            self._exported.pop(session.id, None)
+            self.export(session)
+            return session
+
+    def export(self, session):
+        """Hand the session to child screens and, if enabled, the recovery file"""
+        if session.last_seen - self._exported.get(session.id, 0) < TOUCH_EXPORT_S:
+            return
+        self._exported[session.id] = session.last_seen
+        token = session.token()
+        os.environ[ENV_VARS[session.kind]] = token
+        if RECOVERY:
+            os.makedirs(RECOVERY_DIR, exist_ok=True)
+            path = recovery_path(session)
+            fd = os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{os.getpid()}\n{token}")
+            os.replace(path + ".tmp", path)
+
+    def release(self, session):
+        """Drop the recovery file of a session whose screen closed normally"""
+        if RECOVERY:
+            with self._lock:
+                self._exported.pop(session.id, None)
+                remove_quietly(recovery_path(session))
+
+def recovery_path(session):
+    return os.path.join(RECOVERY_DIR, f"{session.kind}-{session.id}.token")
+
+def process_alive(pid):
+    """Whether the screen that wrote a recovery file is still running"""
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)     # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259                              # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+manager = SessionManager()
+
+# ------------------- Screen Helpers -------------------
+def start(kind, data):
+    """Start a session; returns its data"""
+    return manager.start(kind, data).data
+
+def current(kind):
+    """Data of the active session, or None if there is none or it expired"""
+    session = manager.current(kind)
+    return session.data if session else None
+
+def update(kind, data):
+    manager.update(kind, data)
+
+def end(kind):
+    """Log out the active session of a kind"""
+    session = manager.current(kind)
+    if session:
+        manager.end(session)
+
+def watch(root, kind, on_expired):
+    """Keep a screen's session alive on input; call on_expired once it times out
+
+    Closing the window also removes the session's recovery file, so a
+    normal close is not mistaken for a crash.
+    """
+    def activity(event=None):
+        session = manager.active(kind)
+        if session and not session.expired():
+            session.touch()
+
+    def check():
+        session = manager.active(kind)
+        if session and session.expired():
+            manager.end(session)
+            from tkinter import messagebox
+            messagebox.showinfo("Session Expired", "Your session has expired. Please log in again.")
+            on_expired()
+            return
+        if session:
+            manager.export(session)
+        try:
+            root.after(WATCH_MS, check)
+        except Exception:
+            pass  # the window is gone
+
+    def closed():
+        session = manager.active(kind)
+        if session:
+            manager.release(session)
+        root.destroy()
+
+    for sequence in ACTIVITY_EVENTS:
+        root.bind_all(sequence, activity, add="+")
+    root.protocol("WM_DELETE_WINDOW", closed)
+    root.after(WATCH_MS, check)
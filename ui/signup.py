@@ -1,11 +1,16 @@
+import profiling
 import tkinter as tk
 from tkinter import messagebox
 import customtkinter as ctk
+import theme
 from PIL import Image, ImageTk
-import mysql.connector
+import fast_start
+mysql = fast_start.lazy_import("mysql.connector")
+import query_log
 import hashlib
 import os
 import re
+from covers import load_resized
 
 # Set appearance mode and default color theme for CustomTkinter
 ctk.set_appearance_mode("light")  # Modes: "System", "Dark", "Light"
@@ -13,7 +18,7 @@ ctk.set_default_color_theme("green")  # Themes: "blue", "green", "dark-blue"
 
 # ------------------- Database Connection -------------------
 def connect_db():
-    return mysql.connector.connect(
+    return query_log.connect(
         host="localhost",
         user="root",  # Replace with your MySQL username
         password="new_password",  # Replace with your MySQL password
@@ -99,6 +104,7 @@ def open_login_page():
 
 # ----------------- Setup Main Window -----------------
 root = ctk.CTk()
+theme.use_root(root)
 root.title("Library Management System - Sign Up")
 root.geometry("1200x800")
 root.resizable(False, False)
@@ -118,7 +124,7 @@ right_frame.pack(side="right", fill="both", expand=True, padx=40, pady=40)
 heading_label = ctk.CTkLabel(
     right_frame, 
     text="Create an Account", 
-    font=ctk.CTkFont(family="Arial", size=30, weight="bold"),
+    font=theme.font(family="Arial", size=30, weight="bold"),
     text_color="#15aa3e"
 )
 heading_label.pack(pady=(20, 10))
@@ -128,7 +134,7 @@ desc_text = "Sign up to explore books, borrow items, and manage your library acc
 desc_label = ctk.CTkLabel(
     right_frame,
     text=desc_text,
-    font=ctk.CTkFont(family="Arial", size=12),
+    font=theme.font(family="Arial", size=12),
     text_color="gray"
 )
 desc_label.pack(pady=(0, 30))
@@ -137,7 +143,7 @@ desc_label.pack(pady=(0, 30))
 full_name_label = ctk.CTkLabel(
     right_frame,
     text="Full Name",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     text_color="#333333",
     anchor="w"
 )
@@ -147,7 +153,7 @@ full_name_entry = ctk.CTkEntry(
     right_frame,
     width=350,
     height=40,
-    font=ctk.CTkFont(family="Arial", size=13),
+    font=theme.font(family="Arial", size=13),
     border_width=1,
     corner_radius=5,
     placeholder_text=" "
@@ -158,7 +164,7 @@ full_name_entry.pack(pady=(0, 15))
 email_label = ctk.CTkLabel(
     right_frame,
     text="Email Address",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     text_color="#333333",
     anchor="w"
 )
@@ -168,7 +174,7 @@ email_entry = ctk.CTkEntry(
     right_frame,
     width=350,
     height=40,
-    font=ctk.CTkFont(family="Arial", size=13),
+    font=theme.font(family="Arial", size=13),
     border_width=1,
     corner_radius=5,
     placeholder_text=" "
@@ -179,7 +185,7 @@ email_entry.pack(pady=(0, 15))
 password_label = ctk.CTkLabel(
     right_frame,
     text="Password",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     text_color="#333333",
     anchor="w"
 )
@@ -189,7 +195,7 @@ password_entry = ctk.CTkEntry(
     right_frame,
     width=350,
     height=40,
-    font=ctk.CTkFont(family="Arial", size=13),
+    font=theme.font(family="Arial", size=13),
     border_width=1,
     corner_radius=5,
     placeholder_text=" ",
@@ -201,7 +207,7 @@ password_entry.pack(pady=(0, 15))
 confirm_password_label = ctk.CTkLabel(
     right_frame,
     text="Confirm Password",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     text_color="#333333",
     anchor="w"
 )
@@ -211,7 +217,7 @@ confirm_password_entry = ctk.CTkEntry(
     right_frame,
     width=350,
     height=40,
-    font=ctk.CTkFont(family="Arial", size=13),
+    font=theme.font(family="Arial", size=13),
     border_width=1,
     corner_radius=5,
     placeholder_text=" ",
@@ -223,7 +229,7 @@ confirm_password_entry.pack(pady=(0, 25))
 signup_button = ctk.CTkButton(
     right_frame,
     text="Sign Up",
-    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+    font=theme.font(family="Arial", size=14, weight="bold"),
     corner_radius=5,
     height=45,
     width=350,
@@ -238,7 +244,7 @@ signup_button.pack(pady=(5, 15))
 login_link = ctk.CTkButton(
     right_frame,
     text="Already have an account? Login here",
-    font=ctk.CTkFont(family="Arial", size=12),
+    font=theme.font(family="Arial", size=12),
     fg_color="transparent",
     hover_color="#f0f0f0",
     text_color="#15aa3e",
@@ -251,8 +257,7 @@ login_link.pack(pady=(5, 0))
 try:
     # Load and resize the image
     image_path = "library.png"  # Replace with your image path
-    pil_image = Image.open(image_path)
-    pil_image = pil_image.resize((600, 600))
+    pil_image = load_resized(image_path, (600, 600))
     img = ImageTk.PhotoImage(pil_image)
     
     # Create image label
@@ -265,7 +270,7 @@ except Exception as e:
     placeholder = ctk.CTkLabel(
         left_frame,
         text="Library\nManagement\nSystem",
-        font=ctk.CTkFont(family="Arial", size=32, weight="bold"),
+        font=theme.font(family="Arial", size=32, weight="bold"),
         text_color="#15aa3e"
     )
     placeholder.pack(expand=True)
@@ -0,0 +1,148 @@
+import tkinter as tk
+
+# ------------------- Constants -------------------
+LABEL_SEPARATOR = "  |  "
+
+# ------------------- Row Actions -------------------
+class RowAction:
+    """One action offered on table rows
+
+    command is called with the Treeview item the action applies to.
+    shortcut is a Tk key sequence (e.g. "<Delete>") acting on the selected
+    row, and enabled(item) decides if the action applies to a given row.
+    """
+
+    def __init__(self, label, command, shortcut=None, enabled=None):
+        self.label = label
+        self.command = command
+        self.shortcut = shortcut
+        self.enabled = enabled
+
+    def is_enabled(self, item):
+        return self.enabled is None or bool(self.enabled(item))
+
+class TableActions:
+    """Delegated event layer for the row actions of a ttk.Treeview
+
+    The action column holds plain text labels instead of button widgets.
+    A single set of bindings on the Treeview resolves clicks on that column,
+    the right-click menu and keyboard shortcuts to the row under the cursor
+    (or the selected row), so nothing has to be created per row and the
+    labels scroll with the rows.
+    """
+
+    def __init__(self, tree, column, actions, empty_text="", default_action=None):
+        self.tree = tree
+        self.column = column
+        self.actions = actions
+        self.empty_text = empty_text
+        self.default_action = default_action or (actions[0] if actions else None)
+
+        self.menu = tk.Menu(tree, tearoff=0)
+
+        tree.bind("<Button-1>", self.on_click, add="+")
+        tree.bind("<Double-1>", self.on_double_click, add="+")
+        tree.bind("<Button-3>", self.on_context_menu, add="+")
+        tree.bind("<Motion>", self.on_motion, add="+")
+        for action in actions:
+            if action.shortcut:
+                tree.bind(action.shortcut, lambda event, a=action: self.run_on_selection(a), add="+")
+
+    # ------------------- Labels -------------------
+    def enabled_actions(self, item):
+        return [action for action in self.actions if action.is_enabled(item)]
+
+    def label_for(self, item):
+        """Text shown in the action cell of a row"""
+        actions = self.enabled_actions(item)
+        if not actions:
+            return self.empty_text
+        return LABEL_SEPARATOR.join(action.label for action in actions)
+
+    def refresh_labels(self, items=None):
+        """Write the action labels of the given rows, or of every row
+
+        Call after rows are inserted or changed.
+        """
+        for item in self.tree.get_children() if items is None else items:
+            self.tree.set(item, self.column, self.label_for(item))
+
+    # ------------------- Hit Testing -------------------
+    def is_action_cell(self, event):
+        if self.tree.identify_region(event.x, event.y) != "cell":
+            return False
+        column = self.tree.identify_column(event.x)
+        columns = list(self.tree["displaycolumns"])
+        if columns == ["#all"]:
+            columns = list(self.tree["columns"])
+        index = int(column[1:]) - 1
+        return 0 <= index < len(columns) and columns[index] == self.column
+
+    def action_at(self, event):
+        """Return (item, action) under the cursor in the action column, or (None, None)"""
+        if not self.is_action_cell(event):
+            return None, None
+
+        item = self.tree.identify_row(event.y)
+        if not item:
+            return None, None
+
+        actions = self.enabled_actions(item)
+        if not actions:
+            return item, None
+
+        # Labels share the cell evenly; pick the one under the cursor
+        bbox = self.tree.bbox(item, self.column)
+        if not bbox or len(actions) == 1:
+            return item, actions[0]
+        x, _, width, _ = bbox
+        index = int((event.x - x) * len(actions) / max(width, 1))
+        return item, actions[max(0, min(index, len(actions) - 1))]
+
+    # ------------------- Events -------------------
+    def on_click(self, event):
+        item, action = self.action_at(event)
+        if item and action:
+            self.tree.selection_set(item)
+            self.tree.focus(item)
+            action.command(item)
+            return "break"
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item and self.default_action and self.default_action.is_enabled(item):
+            self.default_action.command(item)
+            return "break"
+
+    def on_context_menu(self, event):
+        item = self.tree.identify_row(event.y)
+        if not item:
+            return
+        actions = self.enabled_actions(item)
+        if not actions:
+            return
+
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+
+        self.menu.delete(0, "end")
+        for action in actions:
+            self.menu.add_command(label=action.label, command=lambda a=action: a.command(item))
+        try:
+            self.menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            self.menu.grab_release()
+        return "break"
+
+    def on_motion(self, event):
+        # Hand cursor over clickable action labels
+        item, action = self.action_at(event)
+        cursor = "hand2" if item and action else ""
+        if str(self.tree.cget("cursor")) != cursor:
+            self.tree.configure(cursor=cursor)
+
+    def run_on_selection(self, action):
+        selection = self.tree.selection()
+        if selection and action.is_enabled(selection[0]):
+            action.command(selection[0])
+            return "break"
@@ -0,0 +1,88 @@
+# ------------------- Table Sync -------------------
+class TableSync:
+    """Keyed, diff-based updates for a ttk.Treeview
+
+    Each row is inserted with its primary key as the Treeview item id and a
+    hash of its values is remembered. sync() compares a fresh list of rows
+    against what is displayed and only inserts, updates, moves or deletes
+    the rows that changed, so selection and scroll position survive a refresh.
+
+    Rows that arrive in chunks can be reconciled incrementally with begin(),
+    apply() for each chunk, and finish() once the last chunk is in. resume()
+    instead of begin() appends to the rows already shown.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.hashes = {}  # item id -> hash of (values, tags)
+        self.order = []
+        self.changed = []
+
+    def sync(self, rows):
+        """Reconcile the Treeview with rows, a list of (key, values, tags) in display order
+
+        Returns the item ids that were inserted or updated.
+        """
+        self.begin()
+        self.apply(rows)
+        return self.finish()
+
+    def begin(self):
+        """Start a refresh; rows not passed to apply() before finish() are removed"""
+        self.first_visible = self.tree.yview()[0]
+        self.order = []
+        self.changed = []
+
+    def resume(self):
+        """Start appending chunks below the rows already shown, which are kept"""
+        self.first_visible = self.tree.yview()[0]
+        self.order = list(self.tree.get_children())
+        self.changed = []
+
+    def apply(self, rows):
+        """Insert or update one chunk of (key, values, tags) rows, in display order"""
+        tree = self.tree
+        for key, values, tags in rows:
+            item = str(key)
+            values = tuple(values)
+            tags = tuple(tags)
+            row_hash = hash((values, tags))
+
+            if item in self.hashes:
+                if self.hashes[item] != row_hash:
+                    tree.item(item, values=values, tags=tags)
+                    self.hashes[item] = row_hash
+                    self.changed.append(item)
+            else:
+                tree.insert("", len(self.order), iid=item, values=values, tags=tags)
+                self.hashes[item] = row_hash
+                self.changed.append(item)
+
+            self.order.append(item)
+
+    def finish(self):
+        """Remove rows that were not seen and fix the order; returns changed item ids"""
+        tree = self.tree
+        seen = set(self.order)
+
+        stale = [item for item in tree.get_children() if item not in seen]
+        if stale:
+            tree.delete(*stale)
+            for item in stale:
+                self.hashes.pop(item, None)
+
+        if list(tree.get_children()) != self.order:
+            # Rows were reordered; put them in place in one call
+            tree.set_children("", *self.order)
+
+        if stale or self.changed:
+            tree.yview_moveto(self.first_visible)
+
+        return self.changed
+
+    def clear(self):
+        """Remove every row"""
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.hashes.clear()
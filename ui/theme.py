@@ -0,0 +1,54 @@
+from tkinter import ttk
+import customtkinter as ctk
+
+# ------------------- Colors -------------------
+PRIMARY = "#116636"
+HEADING_BACKGROUND = "#f0f0f0"
+HEADING_FONT = ("Arial", 10, "bold")
+
+# ------------------- Registry -------------------
+# Fonts and styles belong to a Tk interpreter, so both registries are
+# reset when a screen registers a new root window with use_root().
+_root = None
+_fonts = {}
+_styles = set()
+
+def use_root(root):
+    """Register the window fonts and styles are created for; call once per root"""
+    global _root
+    if root is not _root:
+        _root = root
+        _fonts.clear()
+        _styles.clear()
+
+def font(size=None, weight=None, family=None, slant="roman"):
+    """Return the shared CTkFont for a family, size and weight
+
+    Every widget asking for the same font gets the same object instead of a
+    new named Tk font.
+    """
+    key = (family, size, weight, slant)
+    shared = _fonts.get(key)
+    if shared is None:
+        shared = _fonts[key] = ctk.CTkFont(family=family, size=size, weight=weight, slant=slant)
+    return shared
+
+def apply_treeview_style(heading_background=HEADING_BACKGROUND, heading_foreground="black"):
+    """Configure the ttk Treeview style once per window instead of on every screen"""
+    key = ("Treeview", heading_background, heading_foreground)
+    if key in _styles:
+        return
+
+    style = ttk.Style()
+    style.theme_use("clam")
+    style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
+    style.configure("Treeview.Heading", background=heading_background, foreground=heading_foreground, font=HEADING_FONT)
+    style.map("Treeview", background=[("selected", PRIMARY)], foreground=[("selected", "white")])
+
+    # Another heading color replaces this one, so only the last call is current
+    _styles.clear()
+    _styles.add(key)
+
+def font_count():
+    """Number of fonts in the registry"""
+    return len(_fonts)
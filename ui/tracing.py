@@ -0,0 +1,175 @@
+"""Per-action tracing from the click down to each SQL statement
+
+Set LIBRARY_TRACE=1 to enable. Each traced user action opens a span (see
+@traced), and everything it waits on becomes a child span:
+
+- connecting to the database and running each statement, through the
+  query_log listener
+- modal message boxes, so time spent reading a dialog is not mistaken
+  for slowness
+
+Spans are appended to LIBRARY_TRACE_FILE (default traces.jsonl), one
+Chrome trace event per line. Each event's args carry trace, span and
+parent ids. To open a file in Perfetto or chrome://tracing, convert it
+to a JSON array first:
+
+    python tracing.py traces.jsonl > trace.json
+
+When disabled, @traced returns the function unchanged.
+"""
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+# ------------------- Constants -------------------
+ENABLED = os.environ.get("LIBRARY_TRACE", "") not in ("", "0")
+TRACE_FILE = os.environ.get("LIBRARY_TRACE_FILE", "traces.jsonl")
+
+MAX_STATEMENT = 300
+DIALOGS = ("showinfo", "showwarning", "showerror", "askyesno", "askokcancel", "askquestion", "askretrycancel")
+
+# perf_counter() is precise but has no epoch; this maps it onto wall-clock time
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+_PID = os.getpid()
+
+# ------------------- Spans -------------------
+_ids = itertools.count(1)
+_local = threading.local()
+_write_lock = threading.Lock()
+_output = None
+
+def new_id():
+    return f"{_PID:x}-{next(_ids):x}"
+
+def current_span():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+class Span:
+    """One timed operation; the root span of an action starts a new trace"""
+
+    def __init__(self, name, category, parent=None, start=None, **attributes):
+        self.name = name
+        self.category = category
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else new_id()
+        self.span_id = new_id()
+        self.start = time.perf_counter() if start is None else start
+        self.attributes = attributes
+
+    def end(self, ms=None):
+        if ms is None:
+            ms = (time.perf_counter() - self.start) * 1000
+        write_event(self, ms)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.stack.pop()
+        if exc is not None:
+            self.attributes["error"] = repr(exc)
+        self.end()
+
+def span(name, category="action", **attributes):
+    """Context manager for a span under the current one, or a new trace"""
+    return Span(name, category, current_span(), **attributes)
+
+def write_event(span, ms):
+    global _output
+    args = {"trace_id": span.trace_id, "span_id": span.span_id}
+    if span.parent:
+        args["parent_id"] = span.parent.span_id
+    args.update(span.attributes)
+
+    event = {
+        "name": span.name,
+        "cat": span.category,
+        "ph": "X",
+        "ts": round((span.start + _EPOCH_OFFSET) * 1e6),
+        "dur": round(ms * 1000),
+        "pid": _PID,
+        "tid": threading.get_ident(),
+        "args": args,
+    }
+    line = json.dumps(event, default=str) + "\n"
+    with _write_lock:
+        if _output is None:
+            _output = open(TRACE_FILE, "a", buffering=1)
+        _output.write(line)
+
+def traced(name=None):
+    """Decorator running each call inside an action span
+
+    A no-op unless tracing is enabled.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# ------------------- Child Spans -------------------
+def on_database_event(event, start, ms, info):
+    """query_log listener: connects and statements under the active span"""
+    parent = current_span()
+    if parent is None or event == "close":
+        return
+
+    if event == "connect":
+        child = Span("connect", "db", parent, start)
+    else:
+        child = Span(
+            "statement", "db", parent, start,
+            statement=info["fingerprint"][:MAX_STATEMENT],
+            rows=info["rows"],
+            caller=info["caller"]
+        )
+    if "error" in info:
+        child.attributes["error"] = info["error"]
+    child.end(ms)
+
+def _trace_dialogs():
+    """Wrap the blocking message boxes so waiting on the user shows as its own span"""
+    from tkinter import messagebox
+
+    def wrap(dialog_name, dialog):
+        @functools.wraps(dialog)
+        def wrapper(*args, **kwargs):
+            if current_span() is None:
+                return dialog(*args, **kwargs)
+            with span(f"dialog:{dialog_name}", "dialog"):
+                return dialog(*args, **kwargs)
+        return wrapper
+
+    for dialog_name in DIALOGS:
+        setattr(messagebox, dialog_name, wrap(dialog_name, getattr(messagebox, dialog_name)))
+
+def start():
+    import query_log
+
+    query_log.add_listener(on_database_event)
+    _trace_dialogs()
+
+if ENABLED:
+    start()
+
+# ------------------- Main Execution -------------------
+if __name__ == "__main__":
+    # Convert a JSON-lines trace into the JSON array format trace viewers load
+    source = open(sys.argv[1]) if len(sys.argv) > 1 else sys.stdin
+    json.dump([json.loads(line) for line in source if line.strip()], sys.stdout)
@@ -0,0 +1,213 @@
+"""Opt-in UI responsiveness instrumentation
+
+Set LIBRARY_UI_METRICS=1 to enable. Once enabled, the module measures:
+
+- event-loop lag, from a heartbeat `after` callback that records how late it runs
+- screen builds, for functions decorated with @timed
+- every Tk callback (button commands, bindings and `after` callbacks)
+
+Durations go into rolling histograms. Those are written every few seconds
+and on exit to ui_metrics/<screen>.json and ui_metrics/<screen>.csv. Use
+LIBRARY_UI_METRICS_DIR to choose another directory. When disabled, @timed
+returns the function unchanged and install() does nothing.
+
+The same measurements feed the lag and screen build histograms of the
+metrics module when that is enabled; the log files are only written with
+LIBRARY_UI_METRICS.
+"""
+import atexit
+import csv
+import functools
+import json
+import os
+import time
+import tkinter as tk
+from collections import deque
+
+import metrics
+
+# ------------------- Constants -------------------
+WRITE_LOGS = os.environ.get("LIBRARY_UI_METRICS", "") not in ("", "0")
+ENABLED = WRITE_LOGS or metrics.ENABLED
+LOG_DIR = os.environ.get("LIBRARY_UI_METRICS_DIR", "ui_metrics")
+
+HEARTBEAT_MS = 50
+FLUSH_MS = 10000
+WINDOW = 2000            # samples kept per metric for the rolling histogram
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+LAG_METRIC = "event_loop_lag"
+
+# ------------------- Histograms -------------------
+class RollingHistogram:
+    """The most recent WINDOW durations of one metric, in milliseconds"""
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0          # all-time, not only the window
+        self.worst = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.worst = max(self.worst, ms)
+
+    def percentile(self, ordered, fraction):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        buckets = {f"<={bound}": 0 for bound in BUCKETS_MS}
+        buckets[f">{BUCKETS_MS[-1]}"] = 0
+        for ms in ordered:
+            for bound in BUCKETS_MS:
+                if ms <= bound:
+                    buckets[f"<={bound}"] += 1
+                    break
+            else:
+                buckets[f">{BUCKETS_MS[-1]}"] += 1
+
+        return {
+            "count": self.count,
+            "window": len(ordered),
+            "p50_ms": round(self.percentile(ordered, 0.50), 3),
+            "p95_ms": round(self.percentile(ordered, 0.95), 3),
+            "p99_ms": round(self.percentile(ordered, 0.99), 3),
+            "max_ms": round(self.worst, 3),
+            "buckets": buckets,
+        }
+
+_histograms = {}
+_screen = None
+
+def record(name, ms):
+    """Add one duration to a metric's histogram"""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = RollingHistogram()
+    histogram.add(ms)
+    if metrics.ENABLED:
+        metrics.observe_ui(name, ms)
+
+def snapshot():
+    """Summaries of every metric, by name"""
+    return {name: histogram.summary() for name, histogram in sorted(_histograms.items())}
+
+# ------------------- Timing -------------------
+def timed(name=None):
+    """Decorator recording how long each call takes
+
+    A no-op unless instrumentation is enabled.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        metric = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+def _patch_callbacks():
+    """Time every Tk callback by wrapping tkinter's callback dispatcher"""
+    original = tk.CallWrapper.__call__
+    if getattr(original, "_ui_metrics", False):
+        return
+
+    def call(self, *args):
+        start = time.perf_counter()
+        try:
+            return original(self, *args)
+        finally:
+            func = getattr(self.func, "__func__", self.func)
+            name = getattr(func, "__name__", None) or type(func).__name__
+            if name != "heartbeat_tick":
+                # after() wraps its callback in a local function carrying only the __name__
+                label = getattr(func, "__qualname__", name)
+                if "<locals>" in label:
+                    label = name
+                record(f"callback:{label}", (time.perf_counter() - start) * 1000)
+
+    call._ui_metrics = True
+    tk.CallWrapper.__call__ = call
+
+# ------------------- Heartbeat -------------------
+class Heartbeat:
+    """Measure event-loop lag: how late a periodic `after` callback runs"""
+
+    def __init__(self, root, interval_ms=HEARTBEAT_MS):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.expected = None
+
+    def start(self):
+        self.expected = time.perf_counter() + self.interval
+        self.root.after(self.interval_ms, self.heartbeat_tick)
+
+    def heartbeat_tick(self):
+        now = time.perf_counter()
+        record(LAG_METRIC, max(0.0, (now - self.expected) * 1000))
+        self.expected = now + self.interval
+        try:
+            self.root.after(self.interval_ms, self.heartbeat_tick)
+        except tk.TclError:
+            pass  # the window is gone
+
+# ------------------- Export -------------------
+def write_logs(directory=LOG_DIR, screen=None):
+    """Write the histograms to <screen>.json and <screen>.csv"""
+    screen = screen or _screen or "ui"
+    data = snapshot()
+    if not data:
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, screen)
+
+    payload = {"screen": screen, "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "metrics": data}
+    with open(base + ".json.tmp", "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(base + ".json.tmp", base + ".json")
+
+    bucket_names = list(next(iter(data.values()))["buckets"])
+    with open(base + ".csv.tmp", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["metric", "count", "window", "p50_ms", "p95_ms", "p99_ms", "max_ms"] + bucket_names)
+        for name, summary in data.items():
+            writer.writerow(
+                [name, summary["count"], summary["window"], summary["p50_ms"], summary["p95_ms"],
+                 summary["p99_ms"], summary["max_ms"]]
+                + [summary["buckets"][bucket] for bucket in bucket_names]
+            )
+    os.replace(base + ".csv.tmp", base + ".csv")
+
+def install(root, screen):
+    """Start the heartbeat, callback timing and periodic log writes for a window"""
+    global _screen
+    if not ENABLED:
+        return
+    _screen = screen
+
+    _patch_callbacks()
+    Heartbeat(root).start()
+    if not WRITE_LOGS:
+        return
+
+    def flush():
+        write_logs()
+        try:
+            root.after(FLUSH_MS, flush)
+        except tk.TclError:
+            pass
+
+    root.after(FLUSH_MS, flush)
+    atexit.register(write_logs)
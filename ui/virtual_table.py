@@ -0,0 +1,221 @@
+from collections import OrderedDict
+from tkinter import ttk
+
+# ------------------- Constants -------------------
+PAGE_SIZE = 100         # rows fetched from the server per request
+MAX_CACHED_PAGES = 8    # pages kept in memory; older pages are dropped
+VISIBLE_ROWS = 20
+
+SORT_ASC_MARK = " ▲"
+SORT_DESC_MARK = " ▼"
+
+# ------------------- Virtual Table -------------------
+class VirtualTable:
+    """Treeview that shows a window onto a large server-side result set
+
+    Only the visible rows exist as Treeview items; they are reused as the
+    user scrolls. Rows are fetched in pages through fetch_rows and a bounded
+    number of pages is cached. Clicking a sortable heading re-sorts on the
+    server.
+
+    columns is a list of (heading, width, sort_key) tuples; sort_key is the
+    value passed to fetch_rows for that column, or None if it cannot be sorted.
+    fetch_rows(offset, limit, sort_key, descending) returns a list of rows,
+    count_rows() the size of the result set, and format_row(row) the tuple
+    of values to display. on_render(items) is called with the items whose
+    values changed after each render.
+    """
+
+    def __init__(self, master, columns, fetch_rows, count_rows, format_row,
+                 sort_key=None, descending=False, height=VISIBLE_ROWS, on_render=None):
+        self.columns = columns
+        self.fetch_rows = fetch_rows
+        self.count_rows = count_rows
+        self.format_row = format_row
+        self.sort_key = sort_key
+        self.descending = descending
+        self.visible_rows = height
+        self.on_render = on_render
+
+        self.total = 0
+        self.offset = 0
+        self.pages = OrderedDict()
+        self.items = []          # reusable Treeview items, top to bottom
+        self.item_rows = {}      # item -> row currently shown in it
+        self.item_values = {}    # item -> values currently written to it
+        self.selected_index = None
+
+        self.tree = ttk.Treeview(
+            master,
+            columns=[heading for heading, _, _ in columns],
+            show="headings",
+            height=height,
+            selectmode="browse"
+        )
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        # The scrollbar spans the whole result set, not the Treeview contents
+        self.scrollbar = ttk.Scrollbar(master, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        for heading, width, key in columns:
+            self.tree.heading(heading, text=heading)
+            if key is not None:
+                self.tree.heading(heading, command=lambda k=key: self.sort_by(k))
+            self.tree.column(heading, width=width, anchor="w" if heading != "Actions" else "center")
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.move_selection(self.visible_rows))
+
+    # ------------------- Data -------------------
+    def reload(self):
+        """Drop cached rows and fetch the result set again from the top"""
+        self.pages.clear()
+        self.total = self.count_rows()
+        self.offset = 0
+        self.selected_index = None
+        self.update_headings()
+        self.render()
+
+    def refresh(self):
+        """Re-fetch rows at the current position (after an edit)"""
+        self.pages.clear()
+        self.total = self.count_rows()
+        self.render()
+
+    def get_page(self, page_index):
+        """Return one page of rows, fetching it if it is not cached"""
+        if page_index in self.pages:
+            self.pages.move_to_end(page_index)
+            return self.pages[page_index]
+
+        rows = self.fetch_rows(page_index * PAGE_SIZE, PAGE_SIZE, self.sort_key, self.descending)
+        self.pages[page_index] = rows
+        if len(self.pages) > MAX_CACHED_PAGES:
+            self.pages.popitem(last=False)
+        return rows
+
+    def get_row(self, index):
+        """Return the row at an absolute position in the result set"""
+        page = self.get_page(index // PAGE_SIZE)
+        position = index % PAGE_SIZE
+        return page[position] if position < len(page) else None
+
+    def row_for_item(self, item):
+        """Return the row shown in a Treeview item, or None for placeholder and stale items"""
+        return self.item_rows.get(item)
+
+    # ------------------- Sorting -------------------
+    def sort_by(self, key):
+        """Sort on the server by a column, toggling direction on repeat clicks"""
+        if self.sort_key == key:
+            self.descending = not self.descending
+        else:
+            self.sort_key = key
+            self.descending = False
+        self.reload()
+
+    def update_headings(self):
+        """Mark the sorted column with its direction"""
+        for heading, _, key in self.columns:
+            text = heading
+            if key is not None and key == self.sort_key:
+                text += SORT_DESC_MARK if self.descending else SORT_ASC_MARK
+            self.tree.heading(heading, text=text)
+
+    # ------------------- Rendering -------------------
+    def render(self):
+        """Show the rows of the current window in the reusable items"""
+        self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        count = max(0, min(self.visible_rows, self.total - self.offset))
+
+        # Grow or shrink the item pool to the number of rows in view
+        while len(self.items) < count:
+            self.items.append(self.tree.insert("", "end", values=()))
+        while len(self.items) > count:
+            item = self.items.pop()
+            self.item_rows.pop(item, None)
+            self.item_values.pop(item, None)
+            self.tree.delete(item)
+
+        # Only write items whose values differ from what they already show
+        changed = []
+        selected_item = None
+        for position, item in enumerate(self.items):
+            index = self.offset + position
+            row = self.get_row(index)
+            values = self.format_row(row) if row else ()
+            self.item_rows[item] = row
+            if self.item_values.get(item) != values:
+                self.tree.item(item, values=values)
+                self.item_values[item] = values
+                changed.append(item)
+            if index == self.selected_index:
+                selected_item = item
+
+        # Selection follows the row, not the reused item
+        if selected_item:
+            self.tree.selection_set(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, (self.offset + count) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+        if self.on_render and changed:
+            self.on_render(changed)
+
+    # ------------------- Scrolling -------------------
+    def scroll_to(self, offset):
+        """Move the window so that row offset is at the top"""
+        offset = max(0, min(offset, self.total - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+        return "break"
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120; macOS reports small deltas
+        if abs(event.delta) >= 120:
+            steps = int(event.delta / 120)
+        elif event.delta:
+            steps = 1 if event.delta > 0 else -1
+        else:
+            return "break"
+        return self.scroll_to(self.offset - steps * 3)
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.items:
+            self.selected_index = self.offset + self.items.index(selection[0])
+
+    def move_selection(self, step):
+        """Move the selection by step rows, scrolling to keep it in view"""
+        if not self.total:
+            return "break"
+
+        current = self.selected_index if self.selected_index is not None else self.offset - 1
+        index = max(0, min(self.total - 1, current + step))
+        self.selected_index = index
+
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_rows:
+            self.offset = index - self.visible_rows + 1
+        self.render()
+        return "break"